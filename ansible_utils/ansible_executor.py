@@ -1,38 +1,50 @@
 import os
-import shutil
+import json
 import ansible_runner
-import sys
-import tempfile
 import logging
+from db.database import notify_installation_changed
+from .role_catalog import bundled_roles_dir, role_catalog
+from .workspace import collect_garbage, new_run_dir, roles_workspace
 
-def setup_runner_environment(host, play_source, custom_roles_path=None):
-    base_path = tempfile.mkdtemp(prefix="ansible_runner_")
+DEFAULT_FORKS = 20
+DEFAULT_STRATEGY = 'free'
+
+def setup_runner_environment(host, play_source, custom_roles_path=None, inventory=None):
+    collect_garbage()
+    base_path = new_run_dir()
     project_path = os.path.join(base_path, 'project')
     roles_path = os.path.join(project_path, 'roles')
     inventory_path = os.path.join(base_path, 'inventories')
 
     os.makedirs(project_path, exist_ok=True)
-    os.makedirs(roles_path, exist_ok=True)
     os.makedirs(inventory_path, exist_ok=True)
 
     playbook_path = os.path.join(project_path, 'playbook.yml')
     with open(playbook_path, 'w') as playbook_file:
         playbook_file.write(play_source)
 
-    roles_src_path = os.path.join(sys._MEIPASS, 'ansible_utils', 'roles')
+    roles_paths = []
+    roles_src_path = bundled_roles_dir()
     if os.path.exists(roles_src_path):
-        shutil.copytree(roles_src_path, roles_path, dirs_exist_ok=True)
+        roles_paths.append(roles_src_path)
     else:
         logging.warning(f"Roles directory does not exist at {roles_src_path}")
 
-    if custom_roles_path and os.path.exists(custom_roles_path):
-        shutil.copytree(custom_roles_path, roles_path, dirs_exist_ok=True)
-    else:
-        if custom_roles_path:
-            logging.warning(f"Custom roles directory does not exist at {custom_roles_path}")
+    custom_roles_paths = [custom_roles_path] if isinstance(custom_roles_path, str) else (custom_roles_path or [])
+    for path in custom_roles_paths:
+        if os.path.exists(path):
+            roles_paths.append(path)
+        else:
+            logging.warning(f"Custom roles directory does not exist at {path}")
+
+    os.symlink(roles_workspace(roles_paths), roles_path)
 
     hosts_path = os.path.join(inventory_path, 'hosts')
-    if host:
+    if inventory:
+        hosts_path = os.path.join(inventory_path, 'hosts.json')
+        with open(hosts_path, 'w') as hosts_file:
+            json.dump(inventory, hosts_file, indent=2)
+    elif host:
         with open(hosts_path, 'w') as hosts_file:
             if isinstance(host, str):
                 hosts_file.write('[all]\n' + host)
@@ -48,46 +60,107 @@ def setup_runner_environment(host, play_source, custom_roles_path=None):
 
     return base_path, 'playbook.yml', inventory_path
 
-def install_tool(host, role_name, sudo_password=None, custom_roles_path=None):
-    play_source = f"""
+def build_inventory(hosts, sudo_passwords=None):
+    sudo_passwords = sudo_passwords or {}
+    inventory_hosts = {}
+    envvars = {}
+    for index, host in enumerate(hosts):
+        host_vars = {}
+        if sudo_passwords.get(host):
+            env_name = f"ANSIBLE_BECOME_PASSWORD_{index}"
+            envvars[env_name] = sudo_passwords[host]
+            host_vars['ansible_become_password'] = f"{{{{ lookup('env', '{env_name}') }}}}"
+        inventory_hosts[host] = host_vars
+    return {'all': {'hosts': inventory_hosts}}, envvars
+
+def read_runner_stdout(runner):
+    try:
+        with runner.stdout as f:
+            return f.read()
+    except Exception:
+        return "No log file found."
+
+# runner stats key -> the counter name reported per host
+HOST_COUNTERS = (('ok', 'ok'), ('changed', 'changed'), ('failures', 'failed'), ('dark', 'unreachable'), ('skipped', 'skipped'))
+
+
+def collect_host_results(runner, hosts, include_logs=True):
+    stats = runner.stats or {}
+    failed_hosts = set(stats.get('failures', {})) | set(stats.get('dark', {}))
+    seen_hosts = set()
+    for key in ('ok', 'changed', 'skipped', 'failures', 'dark', 'processed'):
+        seen_hosts.update(stats.get(key, {}))
+
+    if not include_logs:
+        results = {}
+        for host in hosts:
+            status = 'failed' if host in failed_hosts or host not in seen_hosts else 'successful'
+            counters = {name: stats.get(key, {}).get(host, 0) for key, name in HOST_COUNTERS}
+            results[host] = (status, counters)
+        return results
+
+    host_logs = {host: [] for host in hosts}
+    for event in runner.events:
+        if not event.get('stdout'):
+            continue
+        event_host = event.get('event_data', {}).get('host')
+        if event_host is None:
+            for lines in host_logs.values():
+                lines.append(event['stdout'])
+        elif event_host in host_logs:
+            host_logs[event_host].append(event['stdout'])
+
+    results = {}
+    for host in hosts:
+        status = 'failed' if host in failed_hosts or host not in seen_hosts else 'successful'
+        if host in seen_hosts:
+            logs = "\n".join(host_logs[host])
+        else:
+            logs = read_runner_stdout(runner)
+        results[host] = (status, logs)
+    return results
+
+def build_play_source(role_name, strategy=DEFAULT_STRATEGY, role_vars=None):
+    role_entry = f"- role: {role_name}"
+    if role_vars:
+        # JSON is valid YAML, and keeps arbitrary values quoted correctly
+        role_entry += f"\n      vars: {json.dumps(role_vars, sort_keys=True)}"
+    return f"""
 ---
 - name: Install and configure {role_name}
   hosts: all
   become: true
+  strategy: {strategy}
   roles:
-    - {role_name}
-  vars:
-    ansible_become_password: "{{{{ lookup('env', 'ANSIBLE_BECOME_PASSWORD') }}}}"
+    {role_entry}
     """
-    logging.debug(f"Generated Playbook For {host}:\n{play_source}")
-    base_path, playbook_name, inventory_path = setup_runner_environment(host, play_source, custom_roles_path)
-    logging.debug(f"Running Ansible Runner with playbook at {os.path.join(base_path, playbook_name)}")
+
+def install_tool_on_hosts(hosts, role_name, sudo_passwords=None, custom_roles_path=None, forks=DEFAULT_FORKS, strategy=DEFAULT_STRATEGY, event_handler=None, role_vars=None):
+    play_source = build_play_source(role_name, strategy, role_vars)
+    logging.debug(f"Generated Playbook For {len(hosts)} hosts:\n{play_source}")
+    custom_roles_paths = [custom_roles_path] if isinstance(custom_roles_path, str) else custom_roles_path
+    if role_catalog.get(role_name, custom_roles_paths) is None:
+        logging.warning(f"Role {role_name} was not found in the role catalog")
+    inventory, password_envvars = build_inventory(hosts, sudo_passwords)
+    base_path, playbook_name, inventory_path = setup_runner_environment(hosts, play_source, custom_roles_path, inventory=inventory)
+    logging.debug(f"Running Ansible Runner with playbook at {os.path.join(base_path, playbook_name)} and {forks} forks")
 
     envvars = {
         'ANSIBLE_STDOUT_CALLBACK': 'default',
         'ANSIBLE_LOAD_CALLBACK_PLUGINS': 'True',
     }
+    envvars.update(password_envvars)
 
-    if sudo_password:
-        os.environ['ANSIBLE_BECOME_PASSWORD'] = sudo_password
-        logging.debug(f"Environment Variables: {envvars}")
-    else:
-        logging.debug("No sudo password provided.")
-
-    r = ansible_runner.run(private_data_dir=base_path, playbook=playbook_name, inventory=inventory_path, envvars=envvars, verbosity=3)
+    r = ansible_runner.run(private_data_dir=base_path, playbook=playbook_name, inventory=inventory_path,
+                           envvars=envvars, forks=forks, verbosity=3, event_handler=event_handler,
+                           quiet=event_handler is not None)
     logging.debug(f"Ansible Runner finished with status: {r.status}")
-    
-    # Finding the log file in the artifacts directory
-    log_dir = os.path.join(base_path, 'artifacts')
-    logs = "No log file found."
-
-    if os.path.exists(log_dir):
-        for root, dirs, files in os.walk(log_dir):
-            for file in files:
-                if file == 'stdout':
-                    log_file = os.path.join(root, file)
-                    with open(log_file, 'r') as f:
-                        logs = f.read()
-                        break
-
-    return r.status, logs
+    for host in hosts:
+        notify_installation_changed(host)
+
+    # Streaming callers already saw every event, so skip rebuilding the logs
+    return collect_host_results(r, hosts, include_logs=event_handler is None)
+
+def install_tool(host, role_name, sudo_password=None, custom_roles_path=None, role_vars=None):
+    results = install_tool_on_hosts([host], role_name, {host: sudo_password}, custom_roles_path, forks=1, role_vars=role_vars)
+    return results[host]
@@ -1,3 +1,5 @@
+import shlex
+import threading
 from ansible.parsing.dataloader import DataLoader
 from ansible.inventory.manager import InventoryManager
 from ansible.vars.manager import VariableManager
@@ -7,82 +9,127 @@ from ansible.module_utils.common.collections import ImmutableDict
 from ansible.utils.display import Display
 from ansible import context
 from ansible.plugins.callback import CallbackBase
+from ssh.probe import extract_version
+
+DEFAULT_FORKS = 10
+CHECK_TASK = "Check which tools are installed"
+VERSION_TASK = "Get installed tool versions"
+
+# context.CLIARGS is process-global, so probes are run one at a time
+_probe_lock = threading.Lock()
 
 class ResultCallback(CallbackBase):
     def __init__(self):
         super().__init__()
         self.results = {}
+        self.unreachable = {}
+
+    def _store(self, result):
+        host_results = self.results.setdefault(result._host.get_name(), {})
+        host_results[result._task.get_name()] = result._result
 
     def v2_runner_on_ok(self, result):
-        self.results[result._host.get_name()] = result._result
+        self._store(result)
 
     def v2_runner_on_failed(self, result, ignore_errors=False):
-        self.results[result._host.get_name()] = result._result
-
-def check_tool_remote(nickname, tool_name):
-    loader = DataLoader()
-    inventory = InventoryManager(loader=loader, sources=[nickname + ','])
-    variable_manager = VariableManager(loader=loader, inventory=inventory)
-
-    # Suppress Ansible logs
-    display = Display(verbosity=0)
-    context.CLIARGS = ImmutableDict(
-        connection='ssh',
-        module_path=None,
-        forks=10,
-        become=None,
-        become_method=None,
-        become_user=None,
-        check=False,
-        diff=False,
-        remote_user=None,
-        verbosity=0
-    )
+        self._store(result)
+
+    def v2_runner_on_unreachable(self, result):
+        self.unreachable[result._host.get_name()] = result._result.get('msg', 'unreachable')
+
+    def tool_matrix(self, hosts, tools):
+        # host -> tool -> (state, version), in the same states ssh.probe reports
+        matrix = {}
+        for host in hosts:
+            if host in self.unreachable:
+                matrix[host] = {tool: (f"SSH Error: {self.unreachable[host]}", "N/A") for tool in tools}
+                continue
+            if host not in self.results:
+                matrix[host] = {tool: ("Error: no result", "N/A") for tool in tools}
+                continue
+
+            host_results = self.results[host]
+            checks = {item.get('item'): item for item in host_results.get(CHECK_TASK, {}).get('results', [])}
+            versions = {item.get('item', {}).get('item'): item for item in host_results.get(VERSION_TASK, {}).get('results', [])}
 
-    play_source = dict(
-        name="Check Tool",
-        hosts=nickname,
+            matrix[host] = {}
+            for tool in tools:
+                if checks.get(tool, {}).get('rc') != 0:
+                    matrix[host][tool] = ("Not Available", "N/A")
+                    continue
+                output = versions.get(tool, {}).get('stdout', '')
+                matrix[host][tool] = ("Available", extract_version(output) or "N/A")
+        return matrix
+
+def build_probe_play(tools, config_path=None):
+    play = dict(
+        name="Check Tools",
+        hosts='all',
         gather_facts='no',
         tasks=[
             dict(
-                name=f"Check if {tool_name.lower()} is installed",
-                action=dict(module='command', args=dict(cmd=f'which {tool_name.lower()}')),
+                name=CHECK_TASK,
+                action=dict(module='shell', args=dict(cmd='command -v {{ item | quote }}')),
+                loop=tools,
                 register='tool_check',
-                failed_when="tool_check.rc != 0",
-                ignore_errors=True
+                changed_when=False,
+                failed_when=False
             ),
             dict(
-                name=f"Get {tool_name.lower()} version",
-                action=dict(module='command', args=dict(cmd=f'{tool_name.lower()} --version')),
+                name=VERSION_TASK,
+                action=dict(module='shell', args=dict(cmd='{{ item.item | quote }} --version 2>&1 || {{ item.item | quote }} -v 2>&1')),
+                loop="{{ tool_check.results }}",
+                when="item.rc == 0",
                 register='tool_version',
-                when="tool_check.rc == 0",
-                failed_when="tool_version.rc != 0",
-                ignore_errors=True
+                changed_when=False,
+                failed_when=False
             )
         ]
     )
+    if config_path:
+        # Host nicknames resolve through the same SSH config the paramiko probes use
+        play['vars'] = {'ansible_ssh_common_args': f"-F {shlex.quote(config_path)}"}
+    return play
+
+# One TaskQueueManager run across every host and tool, `forks` hosts at a time
+def check_tools_remote(hosts, tools, forks=DEFAULT_FORKS, config_path=None):
+    with _probe_lock:
+        loader = DataLoader()
+        inventory = InventoryManager(loader=loader, sources=[','.join(hosts) + ','])
+        variable_manager = VariableManager(loader=loader, inventory=inventory)
 
-    play = Play().load(play_source, variable_manager=variable_manager, loader=loader)
-    callback = ResultCallback()
-
-    tqm = None
-    try:
-        tqm = TaskQueueManager(
-            inventory=inventory,
-            variable_manager=variable_manager,
-            loader=loader,
-            passwords=dict(),
-            stdout_callback=callback,
+        # Display is a process-wide singleton; keep it from echoing task output
+        Display().verbosity = 0
+        context.CLIARGS = ImmutableDict(
+            connection='ssh',
+            module_path=None,
+            forks=forks,
+            become=None,
+            become_method=None,
+            become_user=None,
+            check=False,
+            diff=False,
+            remote_user=None,
+            verbosity=0
         )
-        tqm.run(play)
-    finally:
-        if tqm is not None:
-            tqm.cleanup()
-
-    host_result = callback.results.get(nickname)
-    if host_result:
-        installed = host_result.get('tool_check', {}).get('rc') == 0
-        version = host_result.get('tool_version', {}).get('stdout', 'N/A') if installed else 'N/A'
-        return installed, version
-
-    return False, "N/A"
+
+        play = Play().load(build_probe_play(tools, config_path), variable_manager=variable_manager, loader=loader)
+        callback = ResultCallback()
+
+        tqm = None
+        try:
+            tqm = TaskQueueManager(
+                inventory=inventory,
+                variable_manager=variable_manager,
+                loader=loader,
+                passwords=dict(),
+                stdout_callback=callback,
+                forks=forks,
+            )
+            tqm.run(play)
+        finally:
+            if tqm is not None:
+                tqm.cleanup()
+            loader.cleanup_all_tmp_files()
+
+    return callback.tool_matrix(hosts, tools)
@@ -0,0 +1,66 @@
+HOST_EVENTS = {
+    'runner_on_ok': 'ok',
+    'runner_on_failed': 'failed',
+    'runner_on_unreachable': 'unreachable',
+    'runner_on_skipped': 'skipped',
+}
+
+
+def new_counters():
+    return {'ok': 0, 'changed': 0, 'failed': 0, 'unreachable': 0, 'skipped': 0}
+
+
+class InstallProgress:
+
+    def __init__(self, hosts):
+        self.counters = {host: new_counters() for host in hosts}
+        self.current_task = None
+        self.finished = False
+
+    def update(self, event):
+        kind = event.get('event')
+        event_data = event.get('event_data', {})
+        if kind == 'playbook_on_task_start':
+            self.current_task = event_data.get('task')
+        elif kind == 'playbook_on_stats':
+            self.finished = True
+        elif kind in HOST_EVENTS:
+            counters = self.counters.setdefault(event_data.get('host'), new_counters())
+            if kind == 'runner_on_failed' and event_data.get('ignore_errors'):
+                counters['ok'] += 1
+            else:
+                counters[HOST_EVENTS[kind]] += 1
+            if kind == 'runner_on_ok' and event_data.get('res', {}).get('changed'):
+                counters['changed'] += 1
+
+    def summary(self):
+        totals = {'ok': 0, 'changed': 0, 'failed': 0, 'unreachable': 0}
+        for counters in self.counters.values():
+            for key in totals:
+                totals[key] += counters[key]
+        task = f" | task: {self.current_task}" if self.current_task else ""
+        return f"{len(self.counters)} hosts | " + " ".join(f"{key}={value}" for key, value in totals.items()) + task
+
+
+def format_event(event):
+    kind = event.get('event')
+    event_data = event.get('event_data', {})
+    host = event_data.get('host')
+    result = event_data.get('res', {})
+    message = result.get('msg') or result.get('stderr') or ''
+
+    if kind == 'playbook_on_play_start':
+        return f"PLAY [{event_data.get('play')}]"
+    if kind == 'playbook_on_task_start':
+        return f"TASK [{event_data.get('task')}]"
+    if kind == 'runner_on_ok':
+        return f"  {host}: {'changed' if result.get('changed') else 'ok'}"
+    if kind == 'runner_on_skipped':
+        return f"  {host}: skipping"
+    if kind == 'runner_on_failed':
+        suffix = " (ignored)" if event_data.get('ignore_errors') else ""
+        return f"  {host}: FAILED{suffix} {message}".rstrip()
+    if kind == 'runner_on_unreachable':
+        return f"  {host}: UNREACHABLE {message}".rstrip()
+    return None
+
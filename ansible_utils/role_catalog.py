@@ -0,0 +1,114 @@
+import os
+import sys
+import threading
+import logging
+from collections import namedtuple
+import yaml
+from .roles_enum import Tools
+
+RoleInfo = namedtuple('RoleInfo', ['name', 'path', 'description', 'platforms', 'binary', 'version_var', 'default_version', 'versions'])
+
+
+def bundled_roles_dir():
+    base_path = getattr(sys, '_MEIPASS', os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return os.path.join(base_path, 'ansible_utils', 'roles')
+
+
+def load_yaml(path):
+    if not os.path.isfile(path):
+        return {}
+    try:
+        with open(path) as f:
+            return yaml.safe_load(f) or {}
+    except yaml.YAMLError as e:
+        logging.warning(f"Could not parse {path}: {e}")
+        return {}
+
+
+def known_tool(name):
+    for tool in Tools:
+        if tool.value['default'] == name:
+            return tool.value
+    return {}
+
+
+def load_role(name, path):
+    meta = load_yaml(os.path.join(path, 'meta', 'main.yml'))
+    defaults = load_yaml(os.path.join(path, 'defaults', 'main.yml'))
+    galaxy_info = meta.get('galaxy_info') or {}
+    # Roles may name the binary used to detect them, either as a
+    # `watchtower: {binary: ...}` meta entry or a `<role>_binary` default
+    watchtower = meta.get('watchtower') or {}
+
+    tool = known_tool(name)
+    platforms = [platform.get('name') for platform in galaxy_info.get('platforms') or [] if isinstance(platform, dict)]
+    version_var = watchtower.get('version_var') or f"{name}_version"
+    binary = watchtower.get('binary') or defaults.get(f"{name}_binary") or tool.get('binary') or name
+
+    return RoleInfo(
+        name=name,
+        path=path,
+        description=galaxy_info.get('description', ''),
+        platforms=platforms,
+        binary=binary,
+        version_var=version_var if version_var in defaults else None,
+        default_version=defaults.get(version_var),
+        versions=tool.get('versions', ['latest']),
+    )
+
+
+# Scans the bundled and custom roles directories once and rescans only when
+# one of those directories' mtime changes (a role was added or removed); call
+# refresh() after editing role metadata in place
+class RoleCatalog:
+
+    def __init__(self):
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def roles_dirs(self, custom_roles_paths=None):
+        return [bundled_roles_dir()] + [path for path in custom_roles_paths or [] if path]
+
+    def index(self, custom_roles_paths=None):
+        roles_dirs = tuple(self.roles_dirs(custom_roles_paths))
+        signature = tuple(os.stat(path).st_mtime_ns if os.path.isdir(path) else None for path in roles_dirs)
+        with self._lock:
+            cached = self._indexes.get(roles_dirs)
+            if cached and cached[0] == signature:
+                return cached[1]
+
+        roles = {}
+        for roles_dir in roles_dirs:
+            if not os.path.isdir(roles_dir):
+                continue
+            for role_name in sorted(os.listdir(roles_dir)):
+                role_path = os.path.join(roles_dir, role_name)
+                if os.path.isdir(role_path):
+                    # Later directories override earlier ones, as when they are merged for a run
+                    roles[role_name] = load_role(role_name, role_path)
+
+        with self._lock:
+            self._indexes[roles_dirs] = (signature, roles)
+        return roles
+
+    def roles(self, custom_roles_paths=None):
+        return list(self.index(custom_roles_paths).values())
+
+    def names(self, custom_roles_paths=None):
+        return list(self.index(custom_roles_paths))
+
+    def get(self, name, custom_roles_paths=None):
+        return self.index(custom_roles_paths).get(name)
+
+    def binary_for(self, name, custom_roles_paths=None):
+        role = self.get(name, custom_roles_paths)
+        if role:
+            return role.binary
+        return known_tool(name).get('binary', name)
+
+    def refresh(self):
+        with self._lock:
+            self._indexes.clear()
+
+
+role_catalog = RoleCatalog()
@@ -0,0 +1,191 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_FETCH_TTL = 900
+DEFAULT_MAX_PARALLEL_FETCHES = 4
+FETCH_STATE_FILE = 'lwt-fetch.json'
+DEFAULT_GIT_TIMEOUT = 600
+
+# git reports progress as "Receiving objects:  45% (9/20)" lines separated by \r
+PROGRESS_PATTERN = re.compile(r"^(?:remote: )?([A-Za-z ]+):\s+(\d+)%")
+COMMIT_PATTERN = re.compile(r"^[0-9a-f]{7,40}$")
+
+
+class RepoFetchError(Exception):
+    pass
+
+
+def parse_repo_spec(spec):
+    # "url#ref" pins a branch, tag or commit; the fragment is never part of a git URL
+    url, _, ref = spec.strip().partition('#')
+    return url, ref or None
+
+
+def normalize_url(url):
+    # Local paths go through file:// so shallow and partial fetches are honoured
+    if os.path.isdir(url):
+        return 'file://' + os.path.abspath(url)
+    return url
+
+
+def repo_dir_name(url, ref=None):
+    name = os.path.basename(url.rstrip('/')) or 'repo'
+    if name.endswith('.git'):
+        name = name[:-4]
+    # Every pinned ref gets its own checkout so pins of one repository don't fight
+    key = f"{url}#{ref}" if ref else url
+    return f"{name}-{hashlib.sha1(key.encode()).hexdigest()[:8]}"
+
+
+def read_git_stderr(stream, progress, stderr_lines):
+    buffer = b''
+    while True:
+        chunk = stream.read1(4096) if hasattr(stream, 'read1') else stream.read(4096)
+        if not chunk:
+            break
+        buffer += chunk
+        *lines, buffer = re.split(rb'[\r\n]', buffer)
+        for line in lines:
+            text = line.decode(errors='replace').strip()
+            if not text:
+                continue
+            match = PROGRESS_PATTERN.match(text)
+            if match and progress:
+                progress(match.group(1).strip(), int(match.group(2)))
+            elif not match:
+                stderr_lines.append(text)
+    if buffer.strip():
+        stderr_lines.append(buffer.decode(errors='replace').strip())
+
+
+def run_git(args, cwd=None, progress=None, timeout=DEFAULT_GIT_TIMEOUT):
+    command = ['git'] + args
+    logging.debug(f"Running {' '.join(command)}")
+    process = subprocess.Popen(command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               env=dict(os.environ, GIT_TERMINAL_PROMPT='0'))
+    # Both pipes are drained at once so neither can fill up and stall git;
+    # stderr is parsed as it arrives to report progress
+    stdout_chunks = []
+    stderr_lines = []
+    readers = [
+        threading.Thread(target=lambda: stdout_chunks.append(process.stdout.read()), daemon=True),
+        threading.Thread(target=read_git_stderr, args=(process.stderr, progress, stderr_lines), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+    try:
+        returncode = process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+        # Helpers git spawned may still hold the pipes, so don't wait on the readers
+        raise RepoFetchError(f"git {args[0]} timed out after {timeout}s")
+    for reader in readers:
+        reader.join()
+    if returncode != 0:
+        raise RepoFetchError(f"git {args[0]} failed: {' '.join(stderr_lines[-3:])}")
+    return b''.join(stdout_chunks).decode(errors='replace').strip()
+
+
+# Keeps one shallow, blob-filtered checkout per repository URL under
+# clone_root. A checkout fetched within the TTL (or already at a pinned
+# commit) is reused without touching the network.
+class RoleRepoCache:
+
+    def __init__(self, clone_root, ttl=DEFAULT_FETCH_TTL, max_workers=DEFAULT_MAX_PARALLEL_FETCHES):
+        self.clone_root = clone_root
+        self.ttl = ttl
+        self.max_workers = max_workers
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def path_for(self, url, ref=None):
+        return os.path.join(self.clone_root, repo_dir_name(url, ref))
+
+    def read_state(self, repo_dir):
+        try:
+            with open(os.path.join(repo_dir, '.git', FETCH_STATE_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write_state(self, repo_dir, ref, commit):
+        with open(os.path.join(repo_dir, '.git', FETCH_STATE_FILE), 'w') as f:
+            json.dump({'ref': ref, 'commit': commit, 'fetched_at': time.time()}, f)
+
+    def is_fresh(self, repo_dir, ref):
+        state = self.read_state(repo_dir)
+        if state is None or state.get('ref') != ref:
+            return False
+        if ref and COMMIT_PATTERN.match(ref) and state.get('commit', '').startswith(ref):
+            return True
+        return time.time() - state.get('fetched_at', 0) < self.ttl
+
+    def fetch(self, spec, progress=None, force=False):
+        url, ref = parse_repo_spec(spec)
+        repo_dir = self.path_for(url, ref)
+        with self._lock:
+            repo_lock = self._locks.setdefault(repo_dir, threading.Lock())
+
+        with repo_lock:
+            if not force and os.path.isdir(os.path.join(repo_dir, '.git')) and self.is_fresh(repo_dir, ref):
+                logging.debug(f"Reusing fresh checkout of {url} at {repo_dir}")
+                return repo_dir
+
+            def report(phase, percent):
+                if progress:
+                    progress(spec, phase, percent)
+
+            if not os.path.isdir(os.path.join(repo_dir, '.git')):
+                os.makedirs(repo_dir, exist_ok=True)
+                run_git(['init', '-q'], cwd=repo_dir)
+                run_git(['remote', 'add', 'origin', normalize_url(url)], cwd=repo_dir)
+            else:
+                run_git(['remote', 'set-url', 'origin', normalize_url(url)], cwd=repo_dir)
+
+            checkout_target = 'FETCH_HEAD'
+            fetch_args = ['fetch', '--progress', '--depth', '1', '--filter=blob:none', 'origin', ref or 'HEAD']
+            try:
+                run_git(fetch_args, cwd=repo_dir, progress=report)
+            except RepoFetchError:
+                if not (ref and COMMIT_PATTERN.match(ref)):
+                    raise
+                # Servers may refuse to serve an abbreviated or unadvertised commit directly
+                logging.debug(f"Fetching commit {ref} of {url} directly failed, fetching full history")
+                fetch_args = ['fetch', '--progress', '--filter=blob:none', 'origin']
+                if os.path.exists(os.path.join(repo_dir, '.git', 'shallow')):
+                    fetch_args.insert(1, '--unshallow')
+                run_git(fetch_args, cwd=repo_dir, progress=report)
+                checkout_target = ref
+
+            run_git(['-c', 'advice.detachedHead=false', 'checkout', '-q', '--force', '--detach', checkout_target],
+                    cwd=repo_dir, progress=report)
+            commit = run_git(['rev-parse', 'HEAD'], cwd=repo_dir)
+            self.write_state(repo_dir, ref, commit)
+            report('Done', 100)
+            logging.debug(f"Checked out {url} at {commit} in {repo_dir}")
+            return repo_dir
+
+    def fetch_all(self, specs, progress=None, force=False):
+        results = {}
+        with ThreadPoolExecutor(max_workers=max(min(self.max_workers, len(specs)), 1)) as executor:
+            futures = {spec: executor.submit(self.fetch, spec, progress, force) for spec in specs}
+            for spec, future in futures.items():
+                try:
+                    results[spec] = future.result()
+                except Exception as e:
+                    results[spec] = e
+        return results
+
+    def fetch_in_background(self, specs, on_done, progress=None, force=False):
+        thread = threading.Thread(target=lambda: on_done(self.fetch_all(specs, progress, force)),
+                                  name="role-repo-fetch", daemon=True)
+        thread.start()
+        return thread
@@ -2,4 +2,4 @@ from enum import Enum
 
 class Tools(Enum):
     NGINX = {'default': 'nginx', 'versions': ['latest']}
-    APACHE = {'default': 'apache', 'versions': ['latest']}
\ No newline at end of file
+    APACHE = {'default': 'apache', 'versions': ['latest'], 'binary': 'apache2'}
\ No newline at end of file
@@ -0,0 +1,134 @@
+import os
+import shutil
+import hashlib
+import tempfile
+import threading
+import time
+import logging
+
+CACHE_ROOT = os.environ.get('LINUXWT_RUNNER_CACHE', os.path.join(tempfile.gettempdir(), 'linuxwt_runner_cache'))
+ROLES_CACHE_DIR = 'roles'
+RUNS_DIR = 'runs'
+
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Workspaces used more recently than this are never pruned for size, a run may still need them
+MIN_RUN_AGE = 3600
+GC_INTERVAL = 600
+
+_lock = threading.Lock()
+_tree_hashes = {}
+_last_gc = 0
+
+
+def tree_signature(root):
+    entries = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            stat = os.stat(path)
+            entries.append((os.path.relpath(path, root), stat.st_size, stat.st_mtime_ns))
+    return tuple(entries)
+
+
+def tree_hash(root):
+    # Contents are only re-read when a file's size or mtime changes
+    signature = tree_signature(root)
+    with _lock:
+        cached = _tree_hashes.get(root)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+    digest = hashlib.sha256()
+    for relpath, _, _ in signature:
+        digest.update(relpath.encode())
+        digest.update(b'\0')
+        with open(os.path.join(root, relpath), 'rb') as f:
+            for chunk in iter(lambda: f.read(65536), b''):
+                digest.update(chunk)
+        digest.update(b'\0')
+
+    with _lock:
+        _tree_hashes[root] = (signature, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def roles_workspace(roles_paths):
+    roles_paths = [path for path in roles_paths if os.path.exists(path)]
+    digest = hashlib.sha256()
+    for path in roles_paths:
+        digest.update(tree_hash(path).encode())
+    key = digest.hexdigest()[:32]
+
+    cache_path = os.path.join(CACHE_ROOT, ROLES_CACHE_DIR, key)
+    if os.path.isdir(cache_path):
+        os.utime(cache_path)
+        logging.debug(f"Reusing cached roles workspace at {cache_path}")
+        return cache_path
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    staging_path = tempfile.mkdtemp(prefix=f".{key}-", dir=os.path.dirname(cache_path))
+    for path in roles_paths:
+        shutil.copytree(path, staging_path, dirs_exist_ok=True)
+    try:
+        os.rename(staging_path, cache_path)
+        logging.debug(f"Created roles workspace at {cache_path}")
+    except OSError:
+        # Another run published the same content first
+        shutil.rmtree(staging_path, ignore_errors=True)
+    return cache_path
+
+
+def new_run_dir():
+    runs_path = os.path.join(CACHE_ROOT, RUNS_DIR)
+    os.makedirs(runs_path, exist_ok=True)
+    return tempfile.mkdtemp(prefix="ansible_runner_", dir=runs_path)
+
+
+def directory_size(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, filename)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def collect_garbage(max_age=DEFAULT_MAX_AGE, max_bytes=DEFAULT_MAX_BYTES, force=False):
+    global _last_gc
+    now = time.time()
+    with _lock:
+        if not force and now - _last_gc < GC_INTERVAL:
+            return
+        _last_gc = now
+
+    entries = []
+    for subdir in (RUNS_DIR, ROLES_CACHE_DIR):
+        parent = os.path.join(CACHE_ROOT, subdir)
+        if not os.path.isdir(parent):
+            continue
+        for name in os.listdir(parent):
+            path = os.path.join(parent, name)
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                continue
+            if now - mtime > max_age:
+                logging.debug(f"Removing stale runner workspace {path}")
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                entries.append((mtime, subdir, path))
+
+    sizes = {path: directory_size(path) for _, _, path in entries}
+    total = sum(sizes.values())
+    for mtime, subdir, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if now - mtime < MIN_RUN_AGE:
+            continue
+        logging.debug(f"Removing runner workspace {path} to stay under {max_bytes} bytes")
+        shutil.rmtree(path, ignore_errors=True)
+        total -= sizes[path]
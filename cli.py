@@ -0,0 +1,328 @@
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_NOT_INSTALLED = 3
+
+BECOME_PASSWORD_ENV = 'LINUXWT_BECOME_PASSWORD'
+
+
+class RecordWriter:
+
+    def __init__(self, stream, output_format, fields):
+        self.stream = stream
+        self.fields = fields
+        self.output_format = output_format
+        if output_format == 'csv':
+            self.csv_writer = csv.DictWriter(stream, fieldnames=fields, extrasaction='ignore')
+            self.csv_writer.writeheader()
+
+    def write(self, record):
+        if self.output_format == 'csv':
+            self.csv_writer.writerow(record)
+        else:
+            self.stream.write(json.dumps(record) + "\n")
+        self.stream.flush()
+
+
+def warn(message):
+    sys.stderr.write(message + "\n")
+
+
+def resolve_hosts(args):
+    from ansible_utils.inventory import get_host_nicknames
+    from fleet.selection import load_groups, select_hosts
+
+    hosts, unmatched = select_hosts(get_host_nicknames(args.config), args.hosts, load_groups(args.groups))
+    for selector in unmatched:
+        warn(f"No hosts matched {selector}")
+    return hosts
+
+
+def resolve_roles(args):
+    from ansible_utils.role_catalog import role_catalog
+
+    custom_roles_paths = args.roles_path or []
+    if not args.tools:
+        return role_catalog.roles(custom_roles_paths)
+    roles = []
+    for name in args.tools:
+        role = role_catalog.get(name, custom_roles_paths)
+        if role is None:
+            raise ValueError(f"Unknown tool: {name} (available: {', '.join(role_catalog.names(custom_roles_paths))})")
+        roles.append(role)
+    return roles
+
+
+def fresh_host_statuses(hosts, max_age):
+    from datetime import datetime
+    from db.database import get_host_statuses
+
+    fresh = {}
+    now = datetime.now()
+    for host, (accessible, needs_sudo_password, last_checked) in get_host_statuses(hosts).items():
+        try:
+            age = (now - datetime.strptime(last_checked, "%Y-%m-%d %H:%M:%S")).total_seconds()
+        except (TypeError, ValueError):
+            continue
+        if age <= max_age:
+            needs = {'1': True, '0': False}.get(str(needs_sudo_password), needs_sudo_password)
+            fresh[host] = (str(accessible) == '1', needs)
+    return fresh
+
+
+def check_state_command(args, out):
+    from db.history import record_tool_observations
+    from fleet.engine import ansible_tool_check, tool_check_engine, tool_states, DEFAULT_MAX_WORKERS, DEFAULT_HOST_TIMEOUT
+
+    if args.probe_backend == 'ansible' and args.max_age is not None:
+        raise ValueError("--max-age reads stored results and cannot be combined with --probe-backend ansible")
+    hosts = resolve_hosts(args)
+    roles = resolve_roles(args)
+    binaries = [role.binary for role in roles]
+    writer = RecordWriter(out, args.format, ['host', 'tool', 'binary', 'state', 'version', 'elapsed', 'error'])
+    if args.probe_backend == 'ansible':
+        results = ansible_tool_check(hosts, binaries, args.config, forks=args.workers or DEFAULT_MAX_WORKERS)
+    else:
+        results = tool_check_engine(binaries, args.config, max_workers=args.workers or DEFAULT_MAX_WORKERS,
+                                    host_timeout=args.timeout or DEFAULT_HOST_TIMEOUT, max_age=args.max_age).run(hosts)
+
+    exit_code = EXIT_OK
+    for result in results:
+        states = tool_states(result, binaries)
+        if args.max_age is None:
+            # The probe cache records what it probes itself
+            record_tool_observations(result.host, states)
+        for role in roles:
+            state, version = states[role.binary]
+            # Probe errors come back as states such as "Timeout" or "SSH Error: ..."
+            if result.error or state not in ("Available", "Not Available"):
+                exit_code = EXIT_FAILED
+            elif state == "Not Available" and exit_code == EXIT_OK:
+                exit_code = EXIT_NOT_INSTALLED
+            writer.write({'host': result.host, 'tool': role.name, 'binary': role.binary, 'state': state,
+                          'version': version, 'elapsed': round(result.elapsed, 3), 'error': result.error})
+    return exit_code
+
+
+def host_status_command(args, out):
+    from fleet.engine import CheckEngine, abort_ssh, DEFAULT_MAX_WORKERS, DEFAULT_HOST_TIMEOUT
+    from fleet.host_status import check_host_status, host_status_from_result, save_host_status
+    from ssh.reachability import check_reachability
+
+    hosts = resolve_hosts(args)
+    writer = RecordWriter(out, args.format, ['host', 'accessible', 'needs_sudo_password', 'latency_ms', 'elapsed', 'error'])
+
+    exit_code = EXIT_OK
+    if args.max_age is not None:
+        # Hosts checked within max_age (e.g. by the watch daemon) are answered from the state store
+        fresh = fresh_host_statuses(hosts, args.max_age)
+        for host in hosts:
+            if host in fresh:
+                accessible, needs_sudo_password = fresh[host]
+                if accessible is not True:
+                    exit_code = EXIT_FAILED
+                writer.write({'host': host, 'accessible': accessible, 'needs_sudo_password': needs_sudo_password,
+                              'latency_ms': None, 'elapsed': 0.0, 'error': None})
+        hosts = [host for host in hosts if host not in fresh]
+
+    reachability = check_reachability(hosts, args.config)
+    engine = CheckEngine(lambda host: check_host_status(host, args.config, reachability[host]),
+                         max_workers=args.workers or DEFAULT_MAX_WORKERS, host_timeout=args.timeout or DEFAULT_HOST_TIMEOUT,
+                         on_timeout=abort_ssh(args.config))
+
+    for result in engine.run(hosts):
+        accessible, needs_sudo_password, latency_ms = host_status_from_result(result)
+        save_host_status(result.host, accessible, needs_sudo_password, latency_ms)
+        if result.error or accessible is not True:
+            exit_code = EXIT_FAILED
+        writer.write({'host': result.host, 'accessible': accessible, 'needs_sudo_password': needs_sudo_password,
+                      'latency_ms': latency_ms, 'elapsed': round(result.elapsed, 3), 'error': result.error})
+    return exit_code
+
+
+def install_command(args, out):
+    from ansible_utils.events import format_event
+    from db.database import log_installation, transaction
+    from fleet.fingerprints import install_with_fingerprints, SKIPPED
+
+    if not args.tools:
+        raise ValueError("install needs at least one --tools entry")
+    hosts = resolve_hosts(args)
+    roles = resolve_roles(args)
+    password = os.environ.get(args.become_password_env)
+    sudo_passwords = {host: password for host in hosts} if password else {}
+    writer = RecordWriter(out, args.format, ['host', 'tool', 'status', 'ok', 'changed', 'failed', 'unreachable', 'skipped', 'elapsed'])
+
+    def on_event(event):
+        if args.verbose:
+            line = format_event(event)
+            if line:
+                warn(line)
+        return True
+
+    exit_code = EXIT_OK
+    for role in roles:
+        if not hosts:
+            break
+        started = time.monotonic()
+        results = install_with_fingerprints(hosts, role.name, args.config, sudo_passwords, args.roles_path,
+                                            forks=args.workers, event_handler=on_event,
+                                            force=args.force, max_age=args.max_age)
+        elapsed = round(time.monotonic() - started, 3)
+        with transaction():
+            for host, (status, counters) in results.items():
+                if status == 'failed':
+                    exit_code = EXIT_FAILED
+                elif status != SKIPPED:
+                    log_installation(host, role.name)
+                record = {'host': host, 'tool': role.name, 'status': status, 'elapsed': elapsed}
+                record.update(counters if isinstance(counters, dict) else {})
+                writer.write(record)
+    return exit_code
+
+
+def reconcile_command(args, out):
+    from ansible_utils.inventory import get_host_nicknames
+    from fleet.engine import DEFAULT_MAX_WORKERS, DEFAULT_HOST_TIMEOUT
+    from fleet.reconcile import load_desired_state, resolve_desired, build_plan, apply_plan
+    from fleet.selection import load_groups, select_hosts
+
+    desired_groups, desired = load_desired_state(args.desired)
+    groups = dict(load_groups(args.groups), **desired_groups)
+    hosts = get_host_nicknames(args.config)
+    if args.hosts:
+        hosts, unmatched = select_hosts(hosts, args.hosts, groups)
+        for selector in unmatched:
+            warn(f"No hosts matched {selector}")
+    desired_by_host = resolve_desired(desired, hosts, groups)
+
+    writer = RecordWriter(out, args.format, ['kind', 'host', 'role', 'desired_version', 'observed_state',
+                                             'observed_version', 'action', 'reason', 'status'])
+    plan = build_plan(desired_by_host, args.config, args.roles_path, max_age=args.max_age,
+                      max_workers=args.workers or DEFAULT_MAX_WORKERS, host_timeout=args.timeout or DEFAULT_HOST_TIMEOUT)
+    for action in plan.actions:
+        writer.write(dict(action._asdict(), kind='plan'))
+    warn(plan.summary())
+
+    exit_code = EXIT_FAILED if plan.unknown() else EXIT_OK
+    if args.dry_run or not plan.drifted():
+        # A dry run over a drifted fleet reports the drift like check-state reports missing tools
+        if plan.drifted() and exit_code == EXIT_OK:
+            return EXIT_NOT_INSTALLED
+        return exit_code
+
+    password = os.environ.get(args.become_password_env)
+    sudo_passwords = {host: password for host in desired_by_host} if password else {}
+    results = apply_plan(plan, args.config, sudo_passwords, args.roles_path, forks=args.workers, force=args.force)
+    for (host, role), (status, _) in results.items():
+        if status == 'failed':
+            exit_code = EXIT_FAILED
+        writer.write({'kind': 'result', 'host': host, 'role': role, 'status': status})
+    return exit_code
+
+
+def watch_command(args, out):
+    import signal
+    import threading
+    from fleet.selection import load_groups
+    from fleet.engine import DEFAULT_HOST_TIMEOUT
+    from fleet.watch import WatchDaemon, DEFAULT_MAX_CONCURRENCY, DEFAULT_PER_HOST_CONCURRENCY
+
+    roles = resolve_roles(args)
+    writer = RecordWriter(out, args.format, ['host', 'accessible', 'needs_sudo_password', 'latency_ms', 'tools', 'elapsed', 'error'])
+    write_lock = threading.Lock()
+
+    def on_result(record):
+        if args.format == 'csv':
+            record = dict(record, tools=json.dumps(record['tools']))
+        with write_lock:
+            writer.write(record)
+
+    daemon = WatchDaemon(args.config, [role.binary for role in roles], selectors=args.hosts, groups=load_groups(args.groups),
+                         interval=args.interval, jitter=args.jitter,
+                         max_concurrency=args.workers or DEFAULT_MAX_CONCURRENCY,
+                         per_host_concurrency=args.per_host or DEFAULT_PER_HOST_CONCURRENCY,
+                         host_timeout=args.timeout or DEFAULT_HOST_TIMEOUT, on_result=on_result)
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: daemon.stop())
+    daemon.run(cycles=args.cycles)
+    return EXIT_OK
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='linuxwt', description="Non-interactive fleet checks and installs")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--config', default=os.path.expanduser("~/.ssh/config"), help="SSH config file listing the hosts")
+    common.add_argument('--hosts', nargs='*', default=[], metavar='SELECTOR',
+                        help="host patterns (web-*), groups (@web) or exclusions (!web-3); default is every host")
+    common.add_argument('--groups', help="YAML file mapping group names to host patterns")
+    common.add_argument('--format', choices=['jsonl', 'csv'], default='jsonl')
+    common.add_argument('--workers', type=int, default=None, help="hosts handled in parallel")
+    common.add_argument('--roles-path', action='append', help="extra roles directory, may be repeated")
+    common.add_argument('--tools', type=lambda value: [tool for tool in value.split(',') if tool], default=[],
+                        help="comma separated role names; default is every role in the catalog")
+    # Only offered by the commands that read them
+    timeout = argparse.ArgumentParser(add_help=False)
+    timeout.add_argument('--timeout', type=float, default=None, help="per-host deadline in seconds")
+    max_age = argparse.ArgumentParser(add_help=False)
+    max_age.add_argument('--max-age', type=float, default=None,
+                         help="reuse stored results younger than this many seconds instead of probing live")
+
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    check_state = subparsers.add_parser('check-state', parents=[common, timeout, max_age], help="probe tool states on hosts")
+    check_state.add_argument('--probe-backend', choices=['ssh', 'ansible'], default='ssh',
+                             help="probe over pooled SSH connections (default) or in one Ansible run across all hosts")
+    subparsers.add_parser('host-status', parents=[common, timeout, max_age], help="check reachability and sudo requirements")
+    install = subparsers.add_parser('install', parents=[common, max_age], help="install tools with one batched Ansible run per tool")
+    install.add_argument('--become-password-env', default=BECOME_PASSWORD_ENV,
+                         help=f"environment variable holding the sudo password (default {BECOME_PASSWORD_ENV})")
+    install.add_argument('--verbose', action='store_true', help="stream Ansible task results to stderr")
+    install.add_argument('--force', action='store_true', help="apply the role even where its install fingerprint is unchanged")
+    reconcile = subparsers.add_parser('reconcile', parents=[common, timeout, max_age], help="install only what drifted from a desired state file")
+    reconcile.add_argument('--desired', required=True, help="YAML file mapping host patterns or @groups to roles and versions")
+    reconcile.add_argument('--dry-run', action='store_true', help="print the plan without running Ansible")
+    reconcile.add_argument('--become-password-env', default=BECOME_PASSWORD_ENV,
+                           help=f"environment variable holding the sudo password (default {BECOME_PASSWORD_ENV})")
+    reconcile.add_argument('--force', action='store_true', help="apply drifted roles even where their install fingerprint is unchanged")
+    watch = subparsers.add_parser('watch', parents=[common, timeout], help="keep re-scanning hosts and store the results")
+    watch.add_argument('--interval', type=float, default=900, help="seconds between scans of the same host")
+    watch.add_argument('--jitter', type=float, default=0.1, help="random spread of each interval, as a fraction")
+    watch.add_argument('--per-host', type=int, default=None, help="concurrent scans allowed per host")
+    watch.add_argument('--cycles', type=int, default=None, help="stop after scanning every host this many times")
+    return parser
+
+
+COMMANDS = {
+    'check-state': check_state_command,
+    'host-status': host_status_command,
+    'install': install_command,
+    'reconcile': reconcile_command,
+    'watch': watch_command,
+}
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    # Results own stdout; the rich consoles used by the fleet modules resolve
+    # sys.stdout lazily, so their progress logs end up on stderr instead
+    out = sys.stdout
+    sys.stdout = sys.stderr
+    try:
+        return COMMANDS[args.command](args, out)
+    except ValueError as e:
+        warn(f"error: {e}")
+        return EXIT_USAGE
+    finally:
+        sys.stdout = out
+
+
+if __name__ == "__main__":
+    sys.exit(main())
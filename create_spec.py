@@ -10,6 +10,8 @@ datas = [
     ("ui", "ui"),
     ("ansible_utils", "ansible_utils"),
     ("db", "db"),
+    ("ssh", "ssh"),
+    ("fleet", "fleet"),
     (BASE_YML, "ansible/config"),
     (RUNTIME_YML, "ansible/config"),
     (COLLECTION, "ansible_collections")
@@ -17,7 +19,9 @@ datas = [
 
 # Hidden imports
 hiddenimports = [
-    "ui", "ansible_utils", "db", "rich", "sqlite3", "customtkinter",
+    "ui", "ansible_utils", "db", "ssh", "fleet", "rich", "paramiko", "yaml", "sqlite3", "customtkinter",
+    # Views are imported lazily from ui.views, list them so they are bundled
+    "ui.set_target", "ui.check_state", "ui.interactive_install_wizard", "ansible_runner",
     "ansible", "ansible.inventory.manager", "ansible.parsing.dataloader",
     "ansible.vars.manager", "ansible.playbook.play",
     "ansible.executor.task_queue_manager", "ansible.module_utils.common.collections",
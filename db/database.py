@@ -1,86 +1,205 @@
 import sqlite3
-import os
-from datetime import datetime
+import json
+import atexit
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from .migrations import migrate
 
-def init_db():
-    db_file = 'installation_state.db'
-    if not os.path.exists(db_file):
-        conn = sqlite3.connect(db_file)
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS installations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                host TEXT NOT NULL,
-                tool TEXT NOT NULL,
-                date TEXT NOT NULL
-            )
-        ''')
-
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS host_statuses (
-                host TEXT PRIMARY KEY,
-                accessible INTEGER NOT NULL,
-                needs_sudo_password INTEGER NOT NULL,
-                last_checked TEXT NOT NULL
-            )
-        ''')
-
-        conn.commit()
+DB_FILE = 'installation_state.db'
+BUSY_TIMEOUT_MS = 5000
+SUDO_STATUS_TTL = 3600
+
+_migrated = False
+_migrate_lock = threading.RLock()
+
+_installation_listeners = []
+
+# One long-lived connection per thread, released along with the thread's locals
+_local = threading.local()
+
+def get_connection():
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(DB_FILE, timeout=BUSY_TIMEOUT_MS / 1000)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        _local.conn = conn
+        _local.depth = 0
+        init_db()
+    return conn
+
+@contextmanager
+def transaction():
+    # Nested transactions join the outermost one, which commits once on exit
+    conn = get_connection()
+    depth = _local.depth
+    _local.depth = depth + 1
+    try:
+        yield conn
+        if depth == 0:
+            conn.commit()
+    except Exception:
+        if depth == 0:
+            conn.rollback()
+        raise
+    finally:
+        _local.depth = depth
+
+def close_connection():
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
         conn.close()
+        _local.conn = None
 
-def log_installation(host, tool):
-    conn = sqlite3.connect('installation_state.db')
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO installations (host, tool, date)
-        VALUES (?, ?, ?)
-    ''', (host, tool, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
-    conn.commit()
-    conn.close()
+atexit.register(close_connection)
+
+def init_db():
+    global _migrated
+    with _migrate_lock:
+        if not _migrated:
+            migrate(get_connection())
+            _migrated = True
+
+def add_installation_listener(listener):
+    _installation_listeners.append(listener)
+
+def notify_installation_changed(host):
+    with transaction() as conn:
+        conn.execute('DELETE FROM probe_cache WHERE host = ?', (host,))
+    for listener in list(_installation_listeners):
+        listener(host)
+
+def log_installation(host, tool, version=None):
+    with transaction() as conn:
+        conn.execute('''
+            INSERT INTO installations (host, tool, version, date)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(host, tool) DO UPDATE SET
+                version=excluded.version,
+                date=excluded.date
+        ''', (host, tool, version, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+        notify_installation_changed(host)
 
 def check_installation(host, tool):
-    conn = sqlite3.connect('installation_state.db')
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT * FROM installations WHERE host = ? AND tool = ?
+    cursor = get_connection().execute('''
+        SELECT 1 FROM installations WHERE host = ? AND tool = ?
     ''', (host, tool))
     result = cursor.fetchone()
-    conn.close()
     return result is not None
 
 def update_installation(host, tool, remove=False):
-    conn = sqlite3.connect('installation_state.db')
-    cursor = conn.cursor()
-    if remove:
-        cursor.execute('''
-            DELETE FROM installations WHERE host = ? AND tool = ?
-        ''', (host, tool))
-    conn.commit()
-    conn.close()
-
-def log_host_status(host, accessible, needs_sudo_password):
-    conn = sqlite3.connect('installation_state.db')
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO host_statuses (host, accessible, needs_sudo_password, last_checked)
-        VALUES (?, ?, ?, ?)
-        ON CONFLICT(host) DO UPDATE SET
-            accessible=excluded.accessible,
-            needs_sudo_password=excluded.needs_sudo_password,
-            last_checked=excluded.last_checked
-    ''', (host, accessible, needs_sudo_password, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        if remove:
+            conn.execute('''
+                DELETE FROM installations WHERE host = ? AND tool = ?
+            ''', (host, tool))
+            notify_installation_changed(host)
+
+def log_host_status(host, accessible, needs_sudo_password, latency_ms=None):
+    with transaction() as conn:
+        conn.execute('''
+            INSERT INTO host_statuses (host, accessible, needs_sudo_password, last_checked, latency_ms)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(host) DO UPDATE SET
+                accessible=excluded.accessible,
+                needs_sudo_password=excluded.needs_sudo_password,
+                last_checked=excluded.last_checked,
+                latency_ms=excluded.latency_ms
+        ''', (host, accessible, needs_sudo_password, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), latency_ms))
 
 def get_host_status(host):
-    conn = sqlite3.connect('installation_state.db')
-    cursor = conn.cursor()
-    cursor.execute('''
+    cursor = get_connection().execute('''
         SELECT accessible, needs_sudo_password, last_checked
         FROM host_statuses
         WHERE host = ?
     ''', (host,))
+    return cursor.fetchone()
+
+def log_sudo_requirement(host, needs_sudo_password):
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with transaction() as conn:
+        conn.execute('''
+            INSERT INTO host_statuses (host, accessible, needs_sudo_password, last_checked, sudo_checked)
+            VALUES (?, 1, ?, ?, ?)
+            ON CONFLICT(host) DO UPDATE SET
+                needs_sudo_password=excluded.needs_sudo_password,
+                sudo_checked=excluded.sudo_checked
+        ''', (host, needs_sudo_password, now, now))
+
+def get_fresh_sudo_requirement(host, ttl=SUDO_STATUS_TTL):
+    cursor = get_connection().execute('''
+        SELECT needs_sudo_password, sudo_checked
+        FROM host_statuses
+        WHERE host = ?
+    ''', (host,))
     result = cursor.fetchone()
-    conn.close()
-    return result
+    if result is None or result[1] is None or str(result[0]) not in ('0', '1'):
+        return None
+    if datetime.now() - datetime.strptime(result[1], "%Y-%m-%d %H:%M:%S") > timedelta(seconds=ttl):
+        return None
+    return str(result[0]) == '1'
+
+def get_host_statuses(hosts):
+    cursor = get_connection().execute('''
+        SELECT host, accessible, needs_sudo_password, last_checked
+        FROM host_statuses
+        WHERE host IN (SELECT value FROM json_each(?))
+    ''', (json.dumps(list(hosts)),))
+    return {row[0]: row[1:] for row in cursor.fetchall()}
+
+def get_installation_matrix(hosts, tools):
+    cursor = get_connection().execute('''
+        SELECT host, tool
+        FROM installations
+        WHERE host IN (SELECT value FROM json_each(?))
+          AND tool IN (SELECT value FROM json_each(?))
+    ''', (json.dumps(list(hosts)), json.dumps(list(tools))))
+    installed = set(cursor.fetchall())
+    return {host: {tool: (host, tool) in installed for tool in tools} for host in hosts}
+
+def get_cached_probes(host, tools):
+    cursor = get_connection().execute('''
+        SELECT tool, state, version, checked_at
+        FROM probe_cache
+        WHERE host = ? AND tool IN (SELECT value FROM json_each(?))
+    ''', (host, json.dumps(list(tools))))
+    return {row[0]: row[1:] for row in cursor.fetchall()}
+
+def store_probe_results(host, results, checked_at):
+    with transaction() as conn:
+        conn.executemany('''
+            INSERT INTO probe_cache (host, tool, state, version, checked_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(host, tool) DO UPDATE SET
+                state=excluded.state,
+                version=excluded.version,
+                checked_at=excluded.checked_at
+        ''', [(host, tool, state, version, checked_at) for tool, (state, version) in results.items()])
+
+def clear_probe_results(host, tools):
+    with transaction() as conn:
+        conn.execute('''
+            DELETE FROM probe_cache
+            WHERE host = ? AND tool IN (SELECT value FROM json_each(?))
+        ''', (host, json.dumps(list(tools))))
+
+def get_install_fingerprints(hosts, role):
+    cursor = get_connection().execute('''
+        SELECT host, fingerprint
+        FROM install_fingerprints
+        WHERE role = ? AND host IN (SELECT value FROM json_each(?))
+    ''', (role, json.dumps(list(hosts))))
+    return dict(cursor.fetchall())
+
+def store_install_fingerprints(role, fingerprints, applied_at):
+    with transaction() as conn:
+        conn.executemany('''
+            INSERT INTO install_fingerprints (host, role, fingerprint, version, applied_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(host, role) DO UPDATE SET
+                fingerprint=excluded.fingerprint,
+                version=excluded.version,
+                applied_at=excluded.applied_at
+        ''', [(host, role, fingerprint, version, applied_at) for host, (fingerprint, version) in fingerprints.items()])
@@ -0,0 +1,140 @@
+import json
+import time
+import threading
+from .database import get_connection, transaction
+
+RAW_RETENTION = 7 * 24 * 3600
+ROLLUP_RETENTION = 365 * 24 * 3600
+BUCKET_SECONDS = 3600
+COMPACT_INTERVAL = 3600
+
+REACHABILITY = 'reachability'
+SUDO = 'sudo'
+TOOL = 'tool'
+
+_last_compaction = 0
+_compaction_lock = threading.Lock()
+
+def record_observations(observations, observed_at=None):
+    # observations: iterable of (host, kind, subject, state, value, version)
+    observed_at = int(observed_at or time.time())
+    with transaction() as conn:
+        conn.executemany('''
+            INSERT INTO observations (host, kind, subject, state, value, version, observed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', [(host, kind, subject or '', str(state), value, version, observed_at)
+              for host, kind, subject, state, value, version in observations])
+    maybe_compact_history()
+
+def maybe_compact_history():
+    global _last_compaction
+    with _compaction_lock:
+        if time.time() - _last_compaction < COMPACT_INTERVAL:
+            return
+        _last_compaction = time.time()
+    compact_history()
+
+def record_host_observation(host, accessible, needs_sudo_password, latency_ms=None, observed_at=None):
+    observations = [(host, REACHABILITY, '', 'reachable' if accessible is True or accessible == 1 else 'unreachable', latency_ms, None)]
+    if needs_sudo_password in (True, False, 0, 1):
+        observations.append((host, SUDO, '', 'password' if needs_sudo_password else 'nopassword', None, None))
+    record_observations(observations, observed_at)
+
+def record_tool_observations(host, tool_states, observed_at=None):
+    record_observations([(host, TOOL, tool, state, None, version if version != "N/A" else None)
+                         for tool, (state, version) in tool_states.items()], observed_at)
+
+def hosts_with_state(kind, state, since_seconds=24 * 3600, now=None):
+    since = int((now or time.time()) - since_seconds)
+    cursor = get_connection().execute('''
+        SELECT host FROM observations
+        WHERE kind = ? AND state = ? AND observed_at >= ?
+        UNION
+        SELECT host FROM observation_rollups
+        WHERE kind = ? AND state = ? AND bucket_start + bucket_seconds > ?
+    ''', (kind, state, since, kind, state, since))
+    return sorted(row[0] for row in cursor.fetchall())
+
+def unreachable_hosts(since_seconds=24 * 3600, now=None):
+    # Unreachable at some point in the window, or still unreachable at the last
+    # check however long ago that was, even if only a rollup of it is left
+    hosts = set(hosts_with_state(REACHABILITY, 'unreachable', since_seconds, now))
+    hosts.update(row[0] for row in latest_observations(REACHABILITY) if row[2] == 'unreachable')
+    return sorted(hosts)
+
+def host_history(host, kind, subject='', since_seconds=None, now=None):
+    since = int((now or time.time()) - since_seconds) if since_seconds else 0
+    cursor = get_connection().execute('''
+        SELECT bucket_start, state, samples, avg_value, last_version
+        FROM observation_rollups
+        WHERE host = ? AND kind = ? AND subject = ? AND bucket_start + bucket_seconds > ?
+        UNION ALL
+        SELECT observed_at, state, 1, value, version
+        FROM observations
+        WHERE host = ? AND kind = ? AND subject = ? AND observed_at >= ?
+        ORDER BY 1
+    ''', (host, kind, subject, since, host, kind, subject, since))
+    return cursor.fetchall()
+
+def latest_observations(kind, hosts=None):
+    # Newest raw sample per (host, subject); once compaction has folded all of
+    # a host's samples away, its newest rollup bucket stands in for it
+    host_filter = json.dumps(list(hosts)) if hosts is not None else None
+    cursor = get_connection().execute('''
+        SELECT host, subject, state, value, version, observed_at
+        FROM (
+            SELECT *, ROW_NUMBER() OVER (
+                PARTITION BY host, subject ORDER BY observed_at DESC, is_raw DESC, tiebreak DESC
+            ) AS position
+            FROM (
+                SELECT host, subject, state, value, version, observed_at, 1 AS is_raw, id AS tiebreak
+                FROM observations
+                WHERE kind = ?1 AND (?2 IS NULL OR host IN (SELECT value FROM json_each(?2)))
+                UNION ALL
+                SELECT host, subject, state, avg_value, last_version, bucket_start, 0, samples
+                FROM observation_rollups
+                WHERE kind = ?1 AND (?2 IS NULL OR host IN (SELECT value FROM json_each(?2)))
+            )
+        )
+        WHERE position = 1
+        ORDER BY host, subject
+    ''', (kind, host_filter))
+    return cursor.fetchall()
+
+def compact_history(raw_retention=RAW_RETENTION, rollup_retention=ROLLUP_RETENTION, bucket_seconds=BUCKET_SECONDS, now=None):
+    # Raw samples older than raw_retention are folded into fixed-size buckets,
+    # and buckets older than rollup_retention are dropped
+    now = int(now or time.time())
+    raw_cutoff = now - raw_retention - (now - raw_retention) % bucket_seconds
+    with transaction() as conn:
+        conn.execute('''
+            INSERT INTO observation_rollups (host, kind, subject, state, bucket_start, bucket_seconds,
+                                             samples, min_value, max_value, avg_value, last_version)
+            SELECT host, kind, subject, state, bucket, ?1,
+                   COUNT(*), MIN(value), MAX(value), AVG(value), MAX(newest_version)
+            FROM (
+                -- Versions are text, so the bucket keeps the newest sample's version rather than the largest
+                SELECT host, kind, subject, state, value, observed_at - observed_at % ?1 AS bucket,
+                       FIRST_VALUE(version) OVER (
+                           PARTITION BY host, kind, subject, state, observed_at - observed_at % ?1
+                           ORDER BY observed_at DESC, id DESC
+                       ) AS newest_version
+                FROM observations
+                WHERE observed_at < ?2
+            )
+            -- An upsert's SELECT needs a WHERE, or SQLite parses ON CONFLICT as a join constraint
+            WHERE true
+            GROUP BY host, kind, subject, state, bucket
+            ON CONFLICT (host, kind, subject, state, bucket_start) DO UPDATE SET
+                avg_value = CASE
+                    WHEN excluded.avg_value IS NULL THEN avg_value
+                    WHEN avg_value IS NULL THEN excluded.avg_value
+                    ELSE (avg_value * samples + excluded.avg_value * excluded.samples) / (samples + excluded.samples)
+                END,
+                samples = samples + excluded.samples,
+                min_value = MIN(COALESCE(min_value, excluded.min_value), COALESCE(excluded.min_value, min_value)),
+                max_value = MAX(COALESCE(max_value, excluded.max_value), COALESCE(excluded.max_value, max_value)),
+                last_version = COALESCE(excluded.last_version, last_version)
+        ''', (bucket_seconds, raw_cutoff))
+        conn.execute('DELETE FROM observations WHERE observed_at < ?', (raw_cutoff,))
+        conn.execute('DELETE FROM observation_rollups WHERE bucket_start + bucket_seconds < ?', (now - rollup_retention,))
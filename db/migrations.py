@@ -0,0 +1,138 @@
+# Each migration upgrades the schema by one version; the current version is
+# kept in PRAGMA user_version. Append new migrations, never edit old ones.
+
+def create_base_tables(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS installations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            host TEXT NOT NULL,
+            tool TEXT NOT NULL,
+            date TEXT NOT NULL
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS host_statuses (
+            host TEXT PRIMARY KEY,
+            accessible INTEGER NOT NULL,
+            needs_sudo_password INTEGER NOT NULL,
+            last_checked TEXT NOT NULL
+        )
+    ''')
+
+def add_host_status_columns(cursor):
+    columns = [row[1] for row in cursor.execute('PRAGMA table_info(host_statuses)')]
+    if 'sudo_checked' not in columns:
+        cursor.execute('ALTER TABLE host_statuses ADD COLUMN sudo_checked TEXT')
+    if 'latency_ms' not in columns:
+        cursor.execute('ALTER TABLE host_statuses ADD COLUMN latency_ms REAL')
+
+def unique_versioned_installations(cursor):
+    cursor.execute('''
+        CREATE TABLE installations_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            host TEXT NOT NULL,
+            tool TEXT NOT NULL,
+            version TEXT,
+            date TEXT NOT NULL,
+            UNIQUE (host, tool)
+        )
+    ''')
+    # Keep only the latest row of each (host, tool) history; some older
+    # databases already carry a version column
+    columns = [row[1] for row in cursor.execute('PRAGMA table_info(installations)')]
+    version_column = 'version' if 'version' in columns else 'NULL'
+    cursor.execute(f'''
+        INSERT INTO installations_new (host, tool, version, date)
+        SELECT host, tool, {version_column}, date
+        FROM installations AS latest
+        WHERE id = (
+            SELECT id FROM installations
+            WHERE host = latest.host AND tool = latest.tool
+            ORDER BY date DESC, id DESC
+            LIMIT 1
+        )
+    ''')
+    cursor.execute('DROP TABLE installations')
+    cursor.execute('ALTER TABLE installations_new RENAME TO installations')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_installations_tool_host ON installations (tool, host, version)')
+
+def create_observations(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS observations (
+            id INTEGER PRIMARY KEY,
+            host TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            subject TEXT NOT NULL DEFAULT '',
+            state TEXT NOT NULL,
+            value REAL,
+            version TEXT,
+            observed_at INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_observations_host ON observations (host, kind, subject, observed_at)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_observations_state ON observations (kind, state, observed_at, host)')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS observation_rollups (
+            host TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            subject TEXT NOT NULL DEFAULT '',
+            state TEXT NOT NULL,
+            bucket_start INTEGER NOT NULL,
+            bucket_seconds INTEGER NOT NULL,
+            samples INTEGER NOT NULL,
+            min_value REAL,
+            max_value REAL,
+            avg_value REAL,
+            last_version TEXT,
+            PRIMARY KEY (host, kind, subject, state, bucket_start)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_observation_rollups_state ON observation_rollups (kind, state, bucket_start, host)')
+
+def create_probe_cache(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS probe_cache (
+            host TEXT NOT NULL,
+            tool TEXT NOT NULL,
+            state TEXT NOT NULL,
+            version TEXT,
+            checked_at REAL NOT NULL,
+            PRIMARY KEY (host, tool)
+        )
+    ''')
+
+def create_install_fingerprints(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS install_fingerprints (
+            host TEXT NOT NULL,
+            role TEXT NOT NULL,
+            fingerprint TEXT NOT NULL,
+            version TEXT,
+            applied_at REAL NOT NULL,
+            PRIMARY KEY (host, role)
+        )
+    ''')
+
+MIGRATIONS = [
+    create_base_tables,
+    add_host_status_columns,
+    unique_versioned_installations,
+    create_observations,
+    create_probe_cache,
+    create_install_fingerprints,
+]
+
+def migrate(conn):
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        cursor = conn.cursor()
+        for target, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            migration(cursor)
+            cursor.execute(f'PRAGMA user_version = {target}')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
@@ -0,0 +1,142 @@
+import time
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from rich.console import Console
+from ssh.pool import connection_pool
+from ssh.probe import probe_tools
+from fleet.probe_cache import probe_cache
+
+console = Console()
+
+DEFAULT_MAX_WORKERS = 16
+DEFAULT_HOST_TIMEOUT = 60
+
+HostResult = namedtuple('HostResult', ['host', 'value', 'elapsed', 'error'])
+
+
+class EngineStats:
+
+    def __init__(self):
+        self.hosts = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.started = time.monotonic()
+        self.finished = None
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def hosts_per_second(self):
+        elapsed = self.elapsed
+        return self.hosts / elapsed if elapsed > 0 else 0.0
+
+    def summary(self):
+        return (f"Checked {self.hosts} hosts in {self.elapsed:.1f}s "
+                f"({self.hosts_per_second:.2f} hosts/s, {self.failed} failed, {self.timed_out} timed out)")
+
+
+# Runs `probe(host)` for many hosts on a bounded worker pool and yields a
+# HostResult per host as soon as it finishes or runs past its deadline.
+# on_timeout(host) is called for overdue hosts to unblock the worker still
+# waiting on them, so slow hosts can't starve the pool.
+class CheckEngine:
+
+    def __init__(self, probe, max_workers=DEFAULT_MAX_WORKERS, host_timeout=DEFAULT_HOST_TIMEOUT, poll_interval=0.5,
+                 on_timeout=None):
+        self.probe = probe
+        self.max_workers = max_workers
+        self.host_timeout = host_timeout
+        self.poll_interval = poll_interval
+        self.on_timeout = on_timeout
+        self.stats = EngineStats()
+
+    def run(self, hosts):
+        self.stats = EngineStats()
+        started_at = {}
+        lock = threading.Lock()
+
+        def run_probe(host):
+            with lock:
+                started_at[host] = time.monotonic()
+            return self.probe(host)
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="check-engine")
+        try:
+            pending = {executor.submit(run_probe, host): host for host in hosts}
+            while pending:
+                done, _ = wait(pending, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                now = time.monotonic()
+
+                for future in done:
+                    host = pending.pop(future)
+                    with lock:
+                        elapsed = now - started_at.get(host, now)
+                    try:
+                        result = HostResult(host, future.result(), elapsed, None)
+                    except Exception as e:
+                        console.log(f"Check failed on {host}: {e}")
+                        self.stats.failed += 1
+                        result = HostResult(host, None, elapsed, str(e))
+                    self.stats.hosts += 1
+                    yield result
+
+                if self.host_timeout is None:
+                    continue
+                with lock:
+                    overdue = [future for future, host in pending.items()
+                               if host in started_at and now - started_at[host] > self.host_timeout]
+                for future in overdue:
+                    host = pending.pop(future)
+                    future.cancel()
+                    console.log(f"Check on {host} exceeded {self.host_timeout}s deadline")
+                    if self.on_timeout is not None:
+                        try:
+                            self.on_timeout(host)
+                        except Exception as e:
+                            console.log(f"Could not release {host} after its deadline: {e}")
+                    self.stats.hosts += 1
+                    self.stats.timed_out += 1
+                    yield HostResult(host, None, self.host_timeout, "Timeout")
+        finally:
+            self.stats.finished = time.monotonic()
+            executor.shutdown(wait=False, cancel_futures=True)
+            console.log(self.stats.summary())
+
+
+def abort_ssh(config_path):
+    # on_timeout for checks that talk to hosts through the SSH connection pool
+    return lambda host: connection_pool.abort(host, config_path)
+
+
+def tool_check_engine(tools, config_path, max_workers=DEFAULT_MAX_WORKERS, host_timeout=DEFAULT_HOST_TIMEOUT, max_age=None):
+    if max_age is None:
+        return CheckEngine(lambda host: probe_tools(host, tools, config_path),
+                           max_workers=max_workers, host_timeout=host_timeout, on_timeout=abort_ssh(config_path))
+
+    # Results written within max_age (e.g. by the watch daemon) are served from the state store
+    def cached_probe(host):
+        entries = probe_cache.probe(host, tools, config_path, max_age=max_age)
+        return {tool: (entry.state, entry.version) for tool, entry in entries.items()}
+    return CheckEngine(cached_probe, max_workers=max_workers, host_timeout=host_timeout,
+                       on_timeout=abort_ssh(config_path))
+
+
+# Ansible-transport alternative to tool_check_engine: one TaskQueueManager run
+# probes every host, so all results arrive together when it finishes
+def ansible_tool_check(hosts, tools, config_path, forks):
+    from ansible_utils.check_tool import check_tools_remote
+
+    started = time.monotonic()
+    matrix = check_tools_remote(list(hosts), tools, forks=forks, config_path=config_path)
+    elapsed = time.monotonic() - started
+    console.log(f"Checked {len(matrix)} hosts over Ansible in {elapsed:.1f}s with {forks} forks")
+    return [HostResult(host, matrix[host], elapsed, None) for host in hosts]
+
+
+def tool_states(result, tools):
+    if result.value is not None:
+        return result.value
+    return {tool: (result.error, "N/A") for tool in tools}
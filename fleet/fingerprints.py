@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+import time
+from rich.console import Console
+from ansible_utils.role_catalog import role_catalog, load_yaml
+from ansible_utils.workspace import tree_hash
+from db.database import get_install_fingerprints, store_install_fingerprints
+from fleet.engine import tool_check_engine, tool_states, DEFAULT_MAX_WORKERS, DEFAULT_HOST_TIMEOUT
+from fleet.probe_cache import probe_cache
+
+console = Console()
+
+SKIPPED = 'skipped'
+
+
+def role_dependencies(path):
+    meta = load_yaml(os.path.join(path, 'meta', 'main.yml'))
+    names = []
+    for dependency in meta.get('dependencies') or []:
+        name = (dependency.get('role') or dependency.get('name')) if isinstance(dependency, dict) else dependency
+        if name:
+            names.append(str(name))
+    return names
+
+
+def role_tree_hash(role_name, custom_roles_paths=None):
+    # The role's own tree plus every role it pulls in through meta dependencies
+    digest = hashlib.sha256()
+    pending, seen = [role_name], set()
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        role = role_catalog.get(name, custom_roles_paths)
+        if role is None:
+            digest.update(f"{name}:missing\0".encode())
+            continue
+        digest.update(f"{name}:{tree_hash(role.path)}\0".encode())
+        pending.extend(role_dependencies(role.path))
+    return digest.hexdigest()
+
+
+def compute_fingerprint(role_hash, play_source, role_vars, observed_version):
+    digest = hashlib.sha256()
+    for part in (role_hash, play_source, json.dumps(role_vars or {}, sort_keys=True), observed_version or ''):
+        digest.update(part.encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def observe_versions(hosts, binary, config_path, max_age):
+    engine = tool_check_engine([binary], config_path, max_workers=DEFAULT_MAX_WORKERS,
+                               host_timeout=DEFAULT_HOST_TIMEOUT, max_age=max_age)
+    return {result.host: tool_states(result, [binary])[binary] for result in engine.run(list(hosts))}
+
+
+# A successful application is recorded per host as a hash of the role tree,
+# the generated playbook, the role vars and the tool version observed on the
+# host afterwards. A later run is skipped for hosts whose fingerprint is
+# unchanged and whose host check still finds the tool; force skips the check.
+def install_with_fingerprints(hosts, role_name, config_path, sudo_passwords=None, custom_roles_path=None,
+                              forks=None, strategy=None, event_handler=None, role_vars=None, force=False,
+                              max_age=None):
+    # ansible_runner is only imported once there is something to apply
+    from ansible_utils.ansible_executor import install_tool_on_hosts, build_play_source, DEFAULT_FORKS, DEFAULT_STRATEGY
+
+    forks = forks or DEFAULT_FORKS
+    strategy = strategy or DEFAULT_STRATEGY
+    custom_roles_paths = [custom_roles_path] if isinstance(custom_roles_path, str) else custom_roles_path
+    binary = role_catalog.binary_for(role_name, custom_roles_paths)
+    play_source = build_play_source(role_name, strategy, role_vars)
+    role_hash = role_tree_hash(role_name, custom_roles_paths)
+
+    results = {}
+    pending = list(hosts)
+    if not force and pending:
+        stored = get_install_fingerprints(pending, role_name)
+        candidates = [host for host in pending if host in stored]
+        observed = observe_versions(candidates, binary, config_path,
+                                    probe_cache.ttl if max_age is None else max_age) if candidates else {}
+        for host in candidates:
+            state, version = observed.get(host, (None, None))
+            if state == "Available" and stored[host] == compute_fingerprint(role_hash, play_source, role_vars, version):
+                results[host] = (SKIPPED, "fingerprint unchanged")
+        if results:
+            console.log(f"{role_name} is unchanged on {len(results)} hosts, skipping: {', '.join(results)}")
+        pending = [host for host in pending if host not in results]
+
+    if not pending:
+        return results
+    applied = install_tool_on_hosts(pending, role_name, sudo_passwords, custom_roles_path, forks=forks,
+                                    strategy=strategy, event_handler=event_handler, role_vars=role_vars)
+    results.update(applied)
+
+    # Fingerprints carry the version seen after the run, so they are only
+    # stored for hosts where the tool is actually found
+    succeeded = [host for host, (status, _) in applied.items() if status != 'failed']
+    if succeeded:
+        fingerprints = {}
+        for host, (state, version) in observe_versions(succeeded, binary, config_path, 0).items():
+            if state == "Available":
+                fingerprints[host] = (compute_fingerprint(role_hash, play_source, role_vars, version), version)
+        if fingerprints:
+            store_install_fingerprints(role_name, fingerprints, time.time())
+    return results
@@ -0,0 +1,80 @@
+import socket
+import paramiko
+from rich.console import Console
+from db.database import log_host_status, get_fresh_sudo_requirement, log_sudo_requirement, transaction
+from db.history import record_host_observation
+from ssh.config import load_ssh_config
+from ssh.probe import check_sudo_requirement, SudoCheckError
+from ssh.reachability import check_reachability
+
+console = Console()
+
+LOCAL_HOSTNAMES = ('127.0.0.1', 'localhost')
+
+
+def check_sudo_password_requirement(host, config_path):
+    console.log(f"Checking sudo password requirement for {host}")
+    try:
+        cached = get_fresh_sudo_requirement(host)
+        if cached is not None:
+            console.log(f"Using cached sudo requirement for {host}: {cached}")
+            return cached
+
+        host_config = load_ssh_config(host, config_path)
+        if str(host_config['hostname']) in LOCAL_HOSTNAMES:
+            return False
+
+        needs_password = check_sudo_requirement(host, config_path)
+        log_sudo_requirement(host, needs_password)
+        if needs_password:
+            console.log(f"Sudo password required for {host}")
+        else:
+            console.log(f"No sudo password required for {host}")
+        return needs_password
+    except SudoCheckError as e:
+        console.log(f"Could not determine the sudo requirement: {e}")
+        return None
+    except socket.timeout:
+        console.log(f"Connection to {host} timed out")
+        return None
+    except paramiko.ssh_exception.SSHException as e:
+        console.log(f"SSHException occurred: {e}")
+        return None
+    except Exception:
+        console.print_exception()
+        return None
+
+
+def check_host_status(host, config_path, reachability=None):
+    accessible = False
+    needs_sudo_password = "Unknown"
+    latency_ms = None
+
+    try:
+        if reachability is None:
+            reachability = check_reachability([host], config_path)[host]
+        accessible, latency_ms = reachability
+        if accessible:
+            needs_sudo_password = check_sudo_password_requirement(host, config_path)
+    except socket.timeout:
+        console.log(f"Connection to {host} timed out")
+        accessible = "Unknown"
+        needs_sudo_password = "Unknown"
+    except Exception:
+        console.print_exception()
+
+    if needs_sudo_password is None:
+        needs_sudo_password = "Unknown"
+    return accessible, needs_sudo_password, latency_ms
+
+
+def host_status_from_result(result):
+    if result.value is not None:
+        return result.value
+    return False, "Unknown", None
+
+
+def save_host_status(host, accessible, needs_sudo_password, latency_ms=None):
+    with transaction():
+        log_host_status(host, accessible, needs_sudo_password, latency_ms)
+        record_host_observation(host, accessible, needs_sudo_password, latency_ms)
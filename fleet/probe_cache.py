@@ -0,0 +1,97 @@
+import time
+import threading
+from collections import OrderedDict, namedtuple
+from db.database import add_installation_listener, clear_probe_results, get_cached_probes, store_probe_results, transaction
+from db.history import record_tool_observations
+from ssh.probe import probe_tools
+
+DEFAULT_TTL = 300
+DEFAULT_MAX_ENTRIES = 10000
+
+# Only these are cached; timeouts and SSH errors are always re-probed
+DEFINITIVE_STATES = ("Available", "Not Available")
+
+CachedProbe = namedtuple('CachedProbe', ['state', 'version', 'checked_at'])
+
+
+# (host, tool) -> CachedProbe, held in an LRU in memory and written through to
+# the probe_cache table so results survive restarts
+class ProbeCache:
+
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        add_installation_listener(self.invalidate)
+
+    def age(self, entry, now=None):
+        return (now or time.time()) - entry.checked_at
+
+    def is_fresh(self, entry, now=None, max_age=None):
+        return (entry is not None and entry.state in DEFINITIVE_STATES
+                and self.age(entry, now) < (self.ttl if max_age is None else max_age))
+
+    def peek(self, host, tools):
+        found = {}
+        missing = []
+        with self._lock:
+            for tool in tools:
+                entry = self._entries.get((host, tool))
+                if entry is None:
+                    missing.append(tool)
+                else:
+                    self._entries.move_to_end((host, tool))
+                    found[tool] = entry
+
+        if missing:
+            loaded = {tool: CachedProbe(*row) for tool, row in get_cached_probes(host, missing).items()}
+            self._store(host, loaded)
+            found.update(loaded)
+        return found
+
+    def probe(self, host, tools, config_path, force=False, max_age=None):
+        cached = self.peek(host, tools)
+        now = time.time()
+        stale = [tool for tool in tools if force or not self.is_fresh(cached.get(tool), now, max_age)]
+        if not stale:
+            return cached
+
+        results = probe_tools(host, stale, config_path)
+        checked_at = time.time()
+        definitive = {tool: result for tool, result in results.items() if result[0] in DEFINITIVE_STATES}
+        failed = [tool for tool in results if tool not in definitive]
+        with transaction():
+            store_probe_results(host, definitive, checked_at)
+            # An older answer is not trusted past a failed re-probe either
+            if failed:
+                clear_probe_results(host, failed)
+            # Failures still go to the history, which is what flags unreachable hosts
+            record_tool_observations(host, results, checked_at)
+
+        fresh = {tool: CachedProbe(state, version, checked_at) for tool, (state, version) in results.items()}
+        self._store(host, {tool: entry for tool, entry in fresh.items() if tool in definitive})
+        self._evict(host, failed)
+        cached.update(fresh)
+        return cached
+
+    def invalidate(self, host):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == host]:
+                del self._entries[key]
+
+    def _evict(self, host, tools):
+        with self._lock:
+            for tool in tools:
+                self._entries.pop((host, tool), None)
+
+    def _store(self, host, entries):
+        with self._lock:
+            for tool, entry in entries.items():
+                self._entries[(host, tool)] = entry
+                self._entries.move_to_end((host, tool))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+probe_cache = ProbeCache()
@@ -0,0 +1,133 @@
+import time
+from collections import namedtuple
+import yaml
+from ansible_utils.role_catalog import role_catalog
+from fleet.engine import tool_check_engine, tool_states, DEFAULT_MAX_WORKERS, DEFAULT_HOST_TIMEOUT
+from fleet.probe_cache import probe_cache
+from fleet.selection import select_hosts
+
+INSTALL = 'install'
+UPGRADE = 'upgrade'
+NOOP = 'none'
+UNKNOWN = 'unknown'
+
+PlanAction = namedtuple('PlanAction', ['host', 'role', 'desired_version', 'observed_state', 'observed_version', 'action', 'reason'])
+
+
+def load_desired_state(path):
+    # groups: {web: [web-*, lb-1]}
+    # desired: {"@web": {nginx: "1.24"}, "db-*": [nginx]}
+    with open(path) as f:
+        data = yaml.safe_load(f) or {}
+    groups = {name: [members] if isinstance(members, str) else list(members or [])
+              for name, members in (data.get('groups') or {}).items()}
+    desired = []
+    for selector, roles in (data.get('desired') or {}).items():
+        if isinstance(roles, (list, tuple)):
+            roles = {role: 'latest' for role in roles}
+        elif isinstance(roles, str):
+            roles = {roles: 'latest'}
+        desired.append((str(selector), {role: str(version or 'latest') for role, version in roles.items()}))
+    return groups, desired
+
+
+def resolve_desired(desired, hosts, groups):
+    # Later entries override the version an earlier one asked for
+    resolved = {}
+    for selector, roles in desired:
+        matched, _ = select_hosts(hosts, [selector], groups)
+        for host in matched:
+            resolved.setdefault(host, {}).update(roles)
+    return resolved
+
+
+def version_matches(desired_version, observed_version):
+    if desired_version in (None, '', 'latest', 'any'):
+        return True
+    if not observed_version or observed_version == "N/A":
+        return False
+    return observed_version == desired_version or observed_version.startswith(desired_version + ".")
+
+
+def plan_action(host, role, desired_version, state, observed_version):
+    if state == "Not Available":
+        return PlanAction(host, role, desired_version, state, observed_version, INSTALL, "not installed")
+    if state != "Available":
+        return PlanAction(host, role, desired_version, state, observed_version, UNKNOWN, state)
+    if not version_matches(desired_version, observed_version):
+        return PlanAction(host, role, desired_version, state, observed_version, UPGRADE,
+                          f"version {observed_version} != {desired_version}")
+    return PlanAction(host, role, desired_version, state, observed_version, NOOP, "in desired state")
+
+
+class Plan:
+
+    def __init__(self, actions, elapsed=0.0):
+        self.actions = actions
+        self.elapsed = elapsed
+
+    def drifted(self):
+        return [action for action in self.actions if action.action in (INSTALL, UPGRADE)]
+
+    def unknown(self):
+        return [action for action in self.actions if action.action == UNKNOWN]
+
+    def batches(self):
+        # (role, version) -> hosts, so every Ansible run applies one uniform set of vars
+        batches = {}
+        for action in self.drifted():
+            batches.setdefault((action.role, action.desired_version), []).append(action.host)
+        return batches
+
+    def is_converged(self):
+        return not self.drifted() and not self.unknown()
+
+    def summary(self):
+        return (f"{len(self.actions)} host/role pairs: {len(self.drifted())} drifted in {len(self.batches())} batches, "
+                f"{len(self.unknown())} unknown, planned in {self.elapsed:.1f}s")
+
+
+# Observed state comes from the probe cache / state store; only hosts without
+# an observation younger than max_age are probed live, so a fleet kept fresh by
+# the watch daemon is planned without touching SSH.
+def build_plan(desired_by_host, config_path, custom_roles_paths=None, max_age=None,
+               max_workers=DEFAULT_MAX_WORKERS, host_timeout=DEFAULT_HOST_TIMEOUT):
+    started = time.monotonic()
+    binaries = {}
+    for roles in desired_by_host.values():
+        for role in roles:
+            binaries[role] = role_catalog.binary_for(role, custom_roles_paths)
+
+    actions = []
+    engine = tool_check_engine(sorted(set(binaries.values())), config_path, max_workers=max_workers,
+                               host_timeout=host_timeout, max_age=probe_cache.ttl if max_age is None else max_age)
+    for result in engine.run(list(desired_by_host)):
+        states = tool_states(result, list(binaries.values()))
+        for role, desired_version in sorted(desired_by_host[result.host].items()):
+            state, version = states[binaries[role]]
+            actions.append(plan_action(result.host, role, desired_version, state, version))
+    return Plan(actions, time.monotonic() - started)
+
+
+def apply_plan(plan, config_path, sudo_passwords=None, custom_roles_path=None, forks=None, event_handler=None,
+               on_batch=None, force=False):
+    # ansible_runner is only imported once there is something to apply
+    from ansible_utils.ansible_executor import DEFAULT_FORKS
+    from fleet.fingerprints import install_with_fingerprints, SKIPPED
+    from db.database import log_installation, transaction
+
+    results = {}
+    for (role_name, version), hosts in plan.batches().items():
+        role = role_catalog.get(role_name, [custom_roles_path] if isinstance(custom_roles_path, str) else custom_roles_path)
+        role_vars = {role.version_var: version} if role and role.version_var and version != 'latest' else None
+        batch_results = install_with_fingerprints(hosts, role_name, config_path, sudo_passwords, custom_roles_path,
+                                                  forks=forks or DEFAULT_FORKS, event_handler=event_handler,
+                                                  role_vars=role_vars, force=force)
+        with transaction():
+            for host, (status, _) in batch_results.items():
+                if status not in ('failed', SKIPPED):
+                    log_installation(host, role_name, version)
+        results.update({(host, role_name): result for host, result in batch_results.items()})
+        if on_batch:
+            on_batch(role_name, version, batch_results)
+    return results
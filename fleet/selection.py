@@ -0,0 +1,54 @@
+import os
+import fnmatch
+import yaml
+
+GROUPS_ENV = 'LINUXWT_GROUPS'
+DEFAULT_GROUPS_FILE = os.path.expanduser('~/.config/linuxwt/groups.yml')
+
+
+def load_groups(path=None):
+    path = path or os.environ.get(GROUPS_ENV) or DEFAULT_GROUPS_FILE
+    if not os.path.isfile(path):
+        return {}
+    with open(path) as f:
+        data = yaml.safe_load(f) or {}
+    # Either a bare `group: [patterns]` mapping or one nested under `groups:`
+    groups = data.get('groups', data) if isinstance(data, dict) else {}
+    return {name: [members] if isinstance(members, str) else list(members or []) for name, members in groups.items()}
+
+
+def expand_selector(selector, hosts, groups, seen=None):
+    if selector.startswith('@'):
+        name = selector[1:]
+        if name not in groups:
+            raise ValueError(f"Unknown host group: {name}")
+        seen = set(seen or ())
+        if name in seen:
+            raise ValueError(f"Host group {name} includes itself")
+        seen.add(name)
+        matched = []
+        for member in groups[name]:
+            matched.extend(host for host in expand_selector(member, hosts, groups, seen) if host not in matched)
+        return matched
+    return fnmatch.filter(hosts, selector)
+
+
+# Selectors are fnmatch patterns ("web-*"), group references ("@web") or
+# exclusions of either ("!web-3", "!@canary"), applied left to right.
+# No selectors, or only exclusions, start from every host.
+def select_hosts(hosts, selectors=None, groups=None):
+    groups = groups or {}
+    selectors = [selector for selector in selectors or [] if selector]
+    includes = [selector for selector in selectors if not selector.startswith('!')]
+    selected = [] if includes else list(hosts)
+    unmatched = []
+    for selector in selectors:
+        exclude = selector.startswith('!')
+        matched = expand_selector(selector[1:] if exclude else selector, hosts, groups)
+        if not matched:
+            unmatched.append(selector)
+        if exclude:
+            selected = [host for host in selected if host not in matched]
+        else:
+            selected.extend(host for host in matched if host not in selected)
+    return selected, unmatched
@@ -0,0 +1,158 @@
+import heapq
+import random
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from rich.console import Console
+from ansible_utils.inventory import get_host_nicknames
+from fleet.engine import CheckEngine, abort_ssh, DEFAULT_HOST_TIMEOUT
+from fleet.host_status import check_host_status, save_host_status
+from fleet.probe_cache import probe_cache
+from fleet.selection import select_hosts
+from ssh.reachability import check_reachability
+
+console = Console()
+
+DEFAULT_INTERVAL = 900
+DEFAULT_JITTER = 0.1
+DEFAULT_MAX_CONCURRENCY = 32
+DEFAULT_PER_HOST_CONCURRENCY = 1
+# Stored results stay current until the daemon's next scan of the host is overdue
+STATE_MAX_AGE = DEFAULT_INTERVAL * (1 + DEFAULT_JITTER)
+# How often the SSH config is re-read for added or removed hosts
+HOST_SYNC_INTERVAL = 60
+
+
+def host_offset(host, interval):
+    # Stable per-host slot so restarts keep spreading the fleet the same way
+    return (zlib.crc32(host.encode()) % 10000) / 10000 * interval
+
+
+# Re-scans every selected host once per interval: reachability, then the sudo
+# requirement and tool states for reachable hosts, all written to the state
+# store. Hosts are spread over the interval by a stable offset plus jitter; a
+# thread pool caps global concurrency and a per-host semaphore keeps a slow
+# host from piling up overlapping scans. A scan past host_timeout has its SSH
+# connections aborted and frees the host's slot.
+class WatchDaemon:
+
+    def __init__(self, config_path, tools, selectors=None, groups=None, interval=DEFAULT_INTERVAL,
+                 jitter=DEFAULT_JITTER, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 per_host_concurrency=DEFAULT_PER_HOST_CONCURRENCY, host_timeout=DEFAULT_HOST_TIMEOUT, on_result=None):
+        self.config_path = config_path
+        self.tools = tools
+        self.selectors = selectors
+        self.groups = groups
+        self.interval = interval
+        self.jitter = jitter
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.host_timeout = host_timeout
+        self.on_result = on_result
+        self.stop_event = threading.Event()
+        self._queue = []
+        self._next_due = {}
+        self._host_slots = {}
+        self._last_sync = 0
+        self._finished = set()
+        self._stats_lock = threading.Lock()
+        self.scans = 0
+        self.skipped = 0
+
+    def next_delay(self):
+        return self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def sync_hosts(self, now):
+        hosts, _ = select_hosts(get_host_nicknames(self.config_path), self.selectors, self.groups)
+        current = set(hosts)
+        for host in list(self._next_due):
+            if host not in current:
+                del self._next_due[host]
+        for host in hosts:
+            if host not in self._next_due and host not in self._finished:
+                due = now + host_offset(host, self.interval)
+                self._next_due[host] = due
+                heapq.heappush(self._queue, (due, host))
+                self._host_slots.setdefault(host, threading.BoundedSemaphore(self.per_host_concurrency))
+        self._last_sync = now
+
+    def scan(self, host):
+        reachability = check_reachability([host], self.config_path)[host]
+        accessible, needs_sudo_password, latency_ms = check_host_status(host, self.config_path, reachability)
+        save_host_status(host, accessible, needs_sudo_password, latency_ms)
+        fields = {'accessible': accessible, 'needs_sudo_password': needs_sudo_password, 'latency_ms': latency_ms}
+        if accessible is True and self.tools:
+            entries = probe_cache.probe(host, self.tools, self.config_path, force=True)
+            fields['tools'] = {tool: [entry.state, entry.version] for tool, entry in entries.items()}
+        return fields
+
+    def scan_host(self, host):
+        started = time.monotonic()
+        record = {'host': host, 'accessible': False, 'needs_sudo_password': "Unknown", 'latency_ms': None,
+                  'tools': {}, 'error': None}
+        engine = CheckEngine(self.scan, max_workers=1, host_timeout=self.host_timeout,
+                             on_timeout=abort_ssh(self.config_path))
+        try:
+            for result in engine.run([host]):
+                # The engine has already logged failures and missed deadlines
+                if result.error is not None:
+                    record['error'] = result.error
+                else:
+                    record.update(result.value)
+        finally:
+            self._host_slots[host].release()
+        record['elapsed'] = round(time.monotonic() - started, 3)
+        with self._stats_lock:
+            self.scans += 1
+        if self.on_result:
+            self.on_result(record)
+        return record
+
+    def dispatch(self, executor, host):
+        if not self._host_slots[host].acquire(blocking=False):
+            console.log(f"Previous scan of {host} is still running, skipping this round")
+            self.skipped += 1
+            return
+        executor.submit(self.scan_host, host)
+
+    def run(self, cycles=None):
+        # cycles bounds the number of scans per host, None runs until stop()
+        console.log(f"Watching hosts every {self.interval}s (jitter {self.jitter:.0%}, "
+                    f"{self.max_concurrency} concurrent scans, {self.per_host_concurrency} per host)")
+        rounds = {}
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="watch")
+        try:
+            while not self.stop_event.is_set():
+                now = time.time()
+                if now - self._last_sync >= HOST_SYNC_INTERVAL:
+                    self.sync_hosts(now)
+
+                while self._queue and self._queue[0][0] <= now:
+                    due, host = heapq.heappop(self._queue)
+                    if self._next_due.get(host) != due:
+                        continue
+                    rounds[host] = rounds.get(host, 0) + 1
+                    self.dispatch(executor, host)
+                    if cycles is None or rounds[host] < cycles:
+                        # Scheduled from the due time, not completion, so slow scans don't drift the slots
+                        next_due = due + self.next_delay()
+                        self._next_due[host] = next_due
+                        heapq.heappush(self._queue, (next_due, host))
+                    else:
+                        del self._next_due[host]
+                        self._finished.add(host)
+
+                if cycles is not None and not self._next_due:
+                    break
+                wait = HOST_SYNC_INTERVAL
+                if self._queue:
+                    wait = min(wait, max(self._queue[0][0] - time.time(), 0))
+                self.stop_event.wait(wait)
+        finally:
+            # Running scans finish and are recorded, queued ones are dropped on stop
+            executor.shutdown(wait=True, cancel_futures=self.stop_event.is_set())
+        console.log(f"Watch stopped after {self.scans} scans ({self.skipped} skipped)")
+
+    def stop(self):
+        self.stop_event.set()
@@ -1,10 +1,17 @@
-import customtkinter as ctk
+from ui.startup import timed_import, mark
+
+with timed_import('customtkinter'):
+    import customtkinter as ctk
 from tkinter import Menu
-from ui.buttons import show_main_buttons
+with timed_import('ui.buttons'):
+    from ui.buttons import show_main_buttons
 from ui.utils import display_readme
-from ui.set_target import show_set_target
-from ui.check_state import show_check_state
-from ui.interactive_install_wizard import show_interactive_install
+from ui.views import open_set_target, open_check_state, open_interactive_install, start_background_preload
+
+def on_first_window():
+    mark('first window')
+    # Warm up the heavier views once the window is on screen
+    start_background_preload()
 
 def main():
     app = ctk.CTk()
@@ -17,9 +24,9 @@ def main():
 
     # Add menu items
     file_menu = Menu(menu_bar, tearoff=0)
-    file_menu.add_command(label="Set Target", command=lambda: show_set_target(main_frame))
-    file_menu.add_command(label="Interactive Install", command=lambda: show_interactive_install(main_frame))
-    file_menu.add_command(label="Check State", command=lambda: show_check_state(main_frame))
+    file_menu.add_command(label="Set Target", command=lambda: open_set_target(main_frame))
+    file_menu.add_command(label="Interactive Install", command=lambda: open_interactive_install(main_frame))
+    file_menu.add_command(label="Check State", command=lambda: open_check_state(main_frame))
     file_menu.add_separator()
     file_menu.add_command(label="Exit", command=app.quit)
     menu_bar.add_cascade(label="File", menu=file_menu)
@@ -35,6 +42,8 @@ def main():
     # Show main buttons
     show_main_buttons(main_frame)
 
+    app.after_idle(on_first_window)
+
     # Run the application
     app.mainloop()
 
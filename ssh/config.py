@@ -1,4 +1,5 @@
 import os
+from .config_cache import ssh_config_service
 
 def get_input(prompt, default=None):
     while True:
@@ -8,6 +9,9 @@ def get_input(prompt, default=None):
         else:
             print("This field is required. Please enter a value.")
 
+def load_ssh_config(host, config_path):
+    return ssh_config_service.lookup(host, config_path)
+
 def set_target():
     nickname = get_input("Enter your nickname (Host)")
     server = get_input("Enter your server address (HostName)")
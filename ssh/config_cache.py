@@ -0,0 +1,106 @@
+import os
+import glob
+import threading
+import paramiko
+
+WILDCARD_CHARS = set('*?!')
+
+
+def expand_include(pattern, base_dir):
+    pattern = os.path.expanduser(pattern)
+    if not os.path.isabs(pattern):
+        pattern = os.path.join(base_dir, pattern)
+    return sorted(glob.glob(pattern))
+
+
+def read_config(path, include_base, seen, files):
+    # Inlines Include directives recursively and records every file read so
+    # the cache can tell when any of them changed
+    real_path = os.path.realpath(path)
+    if real_path in seen:
+        return []
+    seen.add(real_path)
+
+    stat = os.stat(path)
+    files.append((path, stat.st_mtime_ns, stat.st_size))
+
+    lines = []
+    with open(path) as f:
+        for line in f:
+            words = line.split()
+            if words and words[0].lower() == 'include':
+                for pattern in words[1:]:
+                    for included in expand_include(pattern, include_base):
+                        if os.path.isfile(included):
+                            lines.extend(read_config(included, include_base, seen, files))
+                continue
+            lines.append(line.rstrip('\n'))
+    return lines
+
+
+def list_hosts(lines):
+    hosts = {}
+    for line in lines:
+        words = line.split()
+        if len(words) < 2 or words[0].lower() != 'host':
+            continue
+        for pattern in words[1:]:
+            if not WILDCARD_CHARS & set(pattern):
+                hosts.setdefault(pattern, None)
+    return list(hosts)
+
+
+class ParsedSSHConfig:
+
+    def __init__(self, path):
+        self.path = path
+        self.files = []
+        # Relative Includes resolve against ~/.ssh, as OpenSSH does for user configs
+        lines = read_config(path, os.path.expanduser('~/.ssh'), set(), self.files)
+        self.config = paramiko.SSHConfig.from_text("\n".join(lines))
+        self.hosts = list_hosts(lines)
+        self._lookups = {}
+        self._lock = threading.Lock()
+
+    def is_current(self):
+        for path, mtime_ns, size in self.files:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return False
+            if stat.st_mtime_ns != mtime_ns or stat.st_size != size:
+                return False
+        return True
+
+    def lookup(self, host):
+        with self._lock:
+            result = self._lookups.get(host)
+            if result is None:
+                result = self._lookups[host] = self.config.lookup(host)
+            return result
+
+
+# Parses each config file once and re-parses it only when it, or a file it
+# includes, changes size or mtime
+class SSHConfigService:
+
+    def __init__(self):
+        self._configs = {}
+        self._lock = threading.Lock()
+
+    def get(self, config_path):
+        config_path = os.path.abspath(os.path.expanduser(config_path))
+        with self._lock:
+            parsed = self._configs.get(config_path)
+            if parsed is None or not parsed.is_current():
+                parsed = self._configs[config_path] = ParsedSSHConfig(config_path)
+            return parsed
+
+    def hosts(self, config_path):
+        return list(self.get(config_path).hosts)
+
+    def lookup(self, host, config_path):
+        return self.get(config_path).lookup(host)
+
+
+ssh_config_service = SSHConfigService()
@@ -0,0 +1,241 @@
+import atexit
+import socket
+import threading
+import time
+from contextlib import contextmanager
+import paramiko
+from rich.console import Console
+from .config import load_ssh_config
+
+console = Console()
+
+DEFAULT_MAX_CONNECTIONS = 64
+DEFAULT_IDLE_TIMEOUT = 300
+DEFAULT_KEEPALIVE_INTERVAL = 30
+DEFAULT_CONNECT_TIMEOUT = 10
+
+# Errors after which a pooled transport can no longer be trusted
+CONNECTION_ERRORS = (paramiko.ssh_exception.SSHException, socket.error, EOFError)
+
+
+def load_private_key(path):
+    try:
+        return paramiko.RSAKey.from_private_key_file(path)
+    except paramiko.SSHException:
+        return paramiko.Ed25519Key.from_private_key_file(path)
+
+
+class PooledConnection:
+
+    def __init__(self, client):
+        self.client = client
+        self.in_use = 0
+        self.last_used = time.monotonic()
+        self.retired = False
+
+    def is_active(self):
+        transport = self.client.get_transport()
+        return transport is not None and transport.is_active()
+
+
+# One authenticated transport per host; concurrent checkouts of the same host
+# share the client and open their own channels on it. A discarded client is
+# retired: new checkouts get a fresh one, and it is closed once the checkouts
+# still using it are returned.
+class SSHConnectionPool:
+
+    def __init__(self, max_connections=DEFAULT_MAX_CONNECTIONS, idle_timeout=DEFAULT_IDLE_TIMEOUT,
+                 keepalive_interval=DEFAULT_KEEPALIVE_INTERVAL, connect_timeout=DEFAULT_CONNECT_TIMEOUT):
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.keepalive_interval = keepalive_interval
+        self.connect_timeout = connect_timeout
+        self._condition = threading.Condition()
+        self._connections = {}
+        self._connecting = set()
+        self._retired = []
+        self._reaper = None
+
+    @contextmanager
+    def connection(self, host, config_path):
+        client = self.checkout(host, config_path)
+        try:
+            yield client
+        except CONNECTION_ERRORS:
+            self.discard(host, config_path, client)
+            raise
+        finally:
+            self.checkin(host, config_path, client)
+
+    def checkout(self, host, config_path):
+        key = (config_path, host)
+        with self._condition:
+            while True:
+                entry = self._connections.get(key)
+                if entry is not None:
+                    if entry.is_active():
+                        entry.in_use += 1
+                        entry.last_used = time.monotonic()
+                        return entry.client
+                    self._close_locked(key)
+                    continue
+                if key in self._connecting:
+                    self._condition.wait()
+                    continue
+                if len(self._connections) + len(self._connecting) + len(self._retired) >= self.max_connections:
+                    if not self._evict_oldest_idle_locked():
+                        self._condition.wait()
+                        continue
+                self._connecting.add(key)
+                break
+
+        try:
+            client = self._connect(host, config_path)
+        except Exception:
+            with self._condition:
+                self._connecting.discard(key)
+                self._condition.notify_all()
+            raise
+
+        entry = PooledConnection(client)
+        entry.in_use = 1
+        with self._condition:
+            self._connecting.discard(key)
+            self._connections[key] = entry
+            self._condition.notify_all()
+        self._start_reaper()
+        return client
+
+    def checkin(self, host, config_path, client=None):
+        with self._condition:
+            entry = self._entry_locked((config_path, host), client)
+            if entry is not None:
+                entry.in_use = max(entry.in_use - 1, 0)
+                entry.last_used = time.monotonic()
+                if entry.retired and entry.in_use == 0:
+                    self._retired.remove(entry)
+                    self._close_client(entry.client)
+            self._condition.notify_all()
+
+    def discard(self, host, config_path, client=None):
+        # Other checkouts may still be using the client, so it is only retired
+        with self._condition:
+            entry = self._entry_locked((config_path, host), client)
+            if entry is not None:
+                self._retire_locked((config_path, host), entry)
+            self._condition.notify_all()
+
+    def abort(self, host, config_path):
+        # Closes the host's transport under every checkout using it, which
+        # unblocks reads stuck on an unresponsive host
+        with self._condition:
+            entry = self._connections.get((config_path, host))
+            if entry is not None:
+                self._retire_locked((config_path, host), entry)
+                self._close_client(entry.client)
+            self._condition.notify_all()
+
+    def close_all(self):
+        with self._condition:
+            for key in list(self._connections):
+                self._close_locked(key)
+            for entry in self._retired:
+                self._close_client(entry.client)
+            self._retired.clear()
+            self._condition.notify_all()
+
+    def evict_idle(self):
+        now = time.monotonic()
+        with self._condition:
+            for key, entry in list(self._connections.items()):
+                if entry.in_use == 0 and (now - entry.last_used >= self.idle_timeout or not entry.is_active()):
+                    self._close_locked(key)
+            self._condition.notify_all()
+            return bool(self._connections)
+
+    def _connect(self, host, config_path):
+        host_config = load_ssh_config(host, config_path)
+        console.log(f"Opening pooled SSH connection to {host_config['hostname']} on port {host_config.get('port', 22)} as user {host_config.get('user')}")
+
+        pkey = None
+        if 'identityfile' in host_config:
+            pkey = load_private_key(host_config['identityfile'][0])
+
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        try:
+            client.connect(
+                hostname=host_config['hostname'],
+                port=int(host_config.get('port', 22)),
+                username=host_config.get('user'),
+                pkey=pkey,
+                look_for_keys=True,
+                timeout=self.connect_timeout
+            )
+        except Exception:
+            client.close()
+            raise
+
+        transport = client.get_transport()
+        if transport is None or not transport.is_active():
+            client.close()
+            raise paramiko.ssh_exception.SSHException(f"Failed to establish SSH connection to {host}")
+        transport.set_keepalive(self.keepalive_interval)
+        return client
+
+    def _entry_locked(self, key, client=None):
+        entry = self._connections.get(key)
+        if entry is not None and (client is None or entry.client is client):
+            return entry
+        for retired in self._retired:
+            if retired.client is client:
+                return retired
+        return None
+
+    def _retire_locked(self, key, entry):
+        if self._connections.get(key) is entry:
+            del self._connections[key]
+        if entry.in_use == 0:
+            self._close_client(entry.client)
+        elif not entry.retired:
+            entry.retired = True
+            self._retired.append(entry)
+
+    def _close_client(self, client):
+        try:
+            client.close()
+        except Exception:
+            pass
+
+    def _close_locked(self, key):
+        entry = self._connections.pop(key, None)
+        if entry is not None:
+            self._close_client(entry.client)
+
+    def _evict_oldest_idle_locked(self):
+        idle = [(entry.last_used, key) for key, entry in self._connections.items() if entry.in_use == 0]
+        if not idle:
+            return False
+        self._close_locked(min(idle)[1])
+        return True
+
+    def _start_reaper(self):
+        with self._condition:
+            if self._reaper is not None and self._reaper.is_alive():
+                return
+            self._reaper = threading.Thread(target=self._reap, name="ssh-pool-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap(self):
+        interval = max(min(self.idle_timeout / 2, 30), 1)
+        while True:
+            time.sleep(interval)
+            if not self.evict_idle():
+                with self._condition:
+                    if not self._connections and not self._connecting:
+                        self._reaper = None
+                        return
+
+
+connection_pool = SSHConnectionPool()
+atexit.register(connection_pool.close_all)
@@ -0,0 +1,145 @@
+import re
+import secrets
+import shlex
+import socket
+import paramiko
+from rich.console import Console
+from .pool import connection_pool
+
+console = Console()
+
+# What `sudo -n` prints when only the password stands in the way
+SUDO_PASSWORD_PROMPT = "a password is required"
+# Seconds a probe script may stay silent, and may take to exit once its output is read
+DEFAULT_PROBE_TIMEOUT = 30
+
+
+class SudoCheckError(Exception):
+    pass
+
+def extract_version(output):
+    # Regex pattern to match version numbers, e.g., "1.2.3", "v1.2.3", "nginx/1.24.0"
+    pattern = r"(\d+\.\d+\.\d+)"
+    match = re.search(pattern, output)
+    if match:
+        return match.group(0)
+    return None
+
+def build_probe_script(tools, marker):
+    lines = [
+        'probe() {',
+        '    p=$(command -v "$1" 2>/dev/null); rc=$?',
+        f'    printf \'%s TOOL %s\\n\' "{marker}" "$1"',
+        f'    printf \'%s PATH %s %s\\n\' "{marker}" "$rc" "$p"',
+        '    if [ "$rc" -eq 0 ]; then',
+        '        for flag in --version -v; do',
+        '            out=$("$1" "$flag" 2>&1 </dev/null); vrc=$?',
+        f'            printf \'%s VERSION %s %s\\n\' "{marker}" "$flag" "$vrc"',
+        # Output lines are indented so a tool can never print a marker line
+        '            printf \'%s\\n\' "$out" | while IFS= read -r line; do printf \' %s\\n\' "$line"; done',
+        '            if printf \'%s\' "$out" | grep -Eq \'[0-9]+\\.[0-9]+\\.[0-9]+\'; then break; fi',
+        '        done',
+        '    fi',
+        f'    printf \'%s END\\n\' "{marker}"',
+        '}',
+    ]
+    lines.extend(f"probe {shlex.quote(tool)}" for tool in tools)
+    return "\n".join(lines) + "\n"
+
+def parse_probe_output(output, marker):
+    records = {}
+    record = None
+    attempt = None
+    for line in output.splitlines():
+        if not line.startswith(marker + " "):
+            if attempt is not None:
+                attempt['output'].append(line[1:] if line.startswith(" ") else line)
+            continue
+
+        kind, _, rest = line[len(marker) + 1:].partition(" ")
+        if kind == "TOOL":
+            record = {'path': '', 'path_rc': None, 'versions': []}
+            records[rest] = record
+            attempt = None
+        elif record is None:
+            continue
+        elif kind == "PATH":
+            rc, _, path = rest.partition(" ")
+            record['path_rc'] = int(rc)
+            record['path'] = path.strip()
+        elif kind == "VERSION":
+            flag, _, rc = rest.partition(" ")
+            attempt = {'flag': flag, 'rc': int(rc), 'output': []}
+            record['versions'].append(attempt)
+        elif kind == "END":
+            record = None
+            attempt = None
+
+    for record in records.values():
+        for attempt in record['versions']:
+            attempt['output'] = "\n".join(attempt['output']).strip()
+    return records
+
+def tool_state_from_record(record):
+    if not record or record['path_rc'] != 0 or not record['path']:
+        return "Not Available", "N/A"
+
+    version = None
+    for attempt in record['versions']:
+        version = extract_version(attempt['output'])
+        if version:
+            break
+    return "Available", version or "N/A"
+
+def probe_tools(host, tools, config_path, pool=connection_pool, timeout=DEFAULT_PROBE_TIMEOUT):
+    console.log(f"Probing {len(tools)} tools on {host}")
+    marker = f"@@LWT-{secrets.token_hex(8)}"
+    script = build_probe_script(tools, marker)
+    try:
+        with pool.connection(host, config_path) as ssh:
+            stdin, stdout, stderr = ssh.exec_command("sh -s", timeout=timeout)
+            stdin.write(script)
+            stdin.flush()
+            stdin.channel.shutdown_write()
+            output = stdout.read().decode(errors='replace')
+            if not stdout.channel.status_event.wait(timeout):
+                stdout.channel.close()
+                raise socket.timeout(f"probe script on {host} did not exit within {timeout}s")
+            exit_status = stdout.channel.recv_exit_status()
+            if exit_status != 0:
+                console.log(f"Probe script exited with status {exit_status} on {host}: {stderr.read().decode(errors='replace').strip()}")
+
+        records = parse_probe_output(output, marker)
+        return {tool: tool_state_from_record(records.get(tool)) for tool in tools}
+    except socket.timeout:
+        console.log(f"Connection to {host} timed out")
+        return {tool: ("Timeout", "N/A") for tool in tools}
+    except paramiko.ssh_exception.SSHException as e:
+        console.log(f"SSHException occurred: {e}")
+        return {tool: (f"SSH Error: {e}", "N/A") for tool in tools}
+    except Exception as e:
+        console.print_exception()
+        return {tool: (f"Error: {e}", "N/A") for tool in tools}
+
+def check_tool_remote(host, tool, config_path, pool=connection_pool):
+    return probe_tools(host, [tool], config_path, pool=pool)[tool]
+
+def check_sudo_requirement(host, config_path, pool=connection_pool, timeout=10):
+    with pool.connection(host, config_path) as ssh:
+        stdin, stdout, stderr = ssh.exec_command("sudo -n true", timeout=timeout)
+        channel = stdout.channel
+        channel.shutdown_write()
+        # Reads honour the channel timeout, waiting for the exit status does not
+        error_output = stderr.read().decode(errors='replace').strip()
+        if not channel.status_event.wait(timeout):
+            channel.close()
+            raise socket.timeout(f"sudo -n true on {host} did not exit within {timeout}s")
+        exit_status = channel.recv_exit_status()
+
+    console.log(f"sudo -n true on {host} exited with {exit_status}: {error_output}")
+    if exit_status == 0:
+        return False
+    if SUDO_PASSWORD_PROMPT in error_output.lower():
+        return True
+    # Missing sudo (127), no sudoers entry and the like are not fixed by a password
+    raise SudoCheckError(f"sudo -n true on {host} exited with {exit_status}: {error_output or 'no output'}")
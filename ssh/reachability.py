@@ -0,0 +1,45 @@
+import asyncio
+import time
+from rich.console import Console
+from .config import load_ssh_config
+
+console = Console()
+
+DEFAULT_CONNECT_TIMEOUT = 3
+DEFAULT_CONCURRENCY = 256
+
+
+async def probe_port(hostname, port, timeout, semaphore):
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(hostname, port), timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            console.log(f"TCP connect to {hostname}:{port} failed: {e!r}")
+            return False, None
+        latency_ms = (time.perf_counter() - start) * 1000
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+        return True, latency_ms
+
+
+async def probe_ports(targets, timeout, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    hosts = list(targets)
+    results = await asyncio.gather(*(probe_port(*targets[host], timeout, semaphore) for host in hosts))
+    return dict(zip(hosts, results))
+
+
+def resolve_ssh_target(host, config_path):
+    host_config = load_ssh_config(host, config_path)
+    return host_config.get('hostname', host), int(host_config.get('port', 22))
+
+
+# Returns {host: (reachable, latency_ms)} using non-blocking TCP connects to
+# each host's configured SSH port.
+def check_reachability(hosts, config_path, timeout=DEFAULT_CONNECT_TIMEOUT, concurrency=DEFAULT_CONCURRENCY):
+    targets = {host: resolve_ssh_target(host, config_path) for host in hosts}
+    return asyncio.run(probe_ports(targets, timeout, concurrency))
@@ -0,0 +1,17 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import database  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    # Every test gets its own migrated database file
+    database.close_connection()
+    monkeypatch.setattr(database, 'DB_FILE', str(tmp_path / 'installation_state.db'))
+    monkeypatch.setattr(database, '_migrated', False)
+    yield database
+    database.close_connection()
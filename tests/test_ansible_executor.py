@@ -0,0 +1,16 @@
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip('ansible_runner')
+
+from ansible_utils.ansible_executor import collect_host_results  # noqa: E402
+
+
+def test_counters_use_cli_names():
+    runner = SimpleNamespace(stats={'ok': {'web-1': 3}, 'changed': {'web-1': 1}, 'skipped': {'web-1': 2},
+                                    'failures': {}, 'dark': {'web-2': 1}, 'processed': {'web-1': 1, 'web-2': 1}})
+    assert collect_host_results(runner, ['web-1', 'web-2', 'db-1'], include_logs=False) == {
+        'web-1': ('successful', {'ok': 3, 'changed': 1, 'failed': 0, 'unreachable': 0, 'skipped': 2}),
+        'web-2': ('failed', {'ok': 0, 'changed': 0, 'failed': 0, 'unreachable': 1, 'skipped': 0}),
+        'db-1': ('failed', {'ok': 0, 'changed': 0, 'failed': 0, 'unreachable': 0, 'skipped': 0}),
+    }
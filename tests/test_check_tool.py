@@ -0,0 +1,31 @@
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip('ansible')
+
+from ansible_utils.check_tool import CHECK_TASK, VERSION_TASK, ResultCallback, build_probe_play  # noqa: E402
+
+
+def runner_result(host, task, result):
+    return SimpleNamespace(_host=SimpleNamespace(get_name=lambda: host),
+                           _task=SimpleNamespace(get_name=lambda: task), _result=result)
+
+
+def test_tool_matrix():
+    callback = ResultCallback()
+    callback.v2_runner_on_ok(runner_result('web-1', CHECK_TASK, {'results': [
+        {'item': 'nginx', 'rc': 0}, {'item': 'apache2', 'rc': 1}]}))
+    callback.v2_runner_on_ok(runner_result('web-1', VERSION_TASK, {'results': [
+        {'item': {'item': 'nginx'}, 'stdout': 'nginx version: nginx/1.24.0'}]}))
+    callback.v2_runner_on_unreachable(runner_result('web-2', CHECK_TASK, {'msg': 'timed out'}))
+    assert callback.tool_matrix(['web-1', 'web-2', 'web-3'], ['nginx', 'apache2']) == {
+        'web-1': {'nginx': ("Available", "1.24.0"), 'apache2': ("Not Available", "N/A")},
+        'web-2': {'nginx': ("SSH Error: timed out", "N/A"), 'apache2': ("SSH Error: timed out", "N/A")},
+        'web-3': {'nginx': ("Error: no result", "N/A"), 'apache2': ("Error: no result", "N/A")},
+    }
+
+
+def test_probe_play_quotes_tools_and_uses_the_ssh_config():
+    play = build_probe_play(['nginx'], '/home/me/my ssh/config')
+    assert play['tasks'][0]['action']['args']['cmd'] == 'command -v {{ item | quote }}'
+    assert play['vars'] == {'ansible_ssh_common_args': "-F '/home/me/my ssh/config'"}
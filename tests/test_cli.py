@@ -0,0 +1,155 @@
+import csv
+import io
+import json
+import pytest
+import cli
+from fleet import engine
+
+SSH_CONFIG = """
+Host web-1
+    HostName 10.0.0.1
+Host web-2
+    HostName 10.0.0.2
+Host db-1
+    HostName 10.0.0.3
+"""
+
+
+@pytest.fixture
+def config(tmp_path):
+    path = tmp_path / 'ssh_config'
+    path.write_text(SSH_CONFIG)
+    return str(path)
+
+
+@pytest.fixture
+def probes(monkeypatch, db):
+    states = {
+        'web-1': ("Available", "1.24.0"),
+        'web-2': ("Not Available", "N/A"),
+        'db-1': ("Timeout", "N/A"),
+    }
+
+    def probe_tools(host, tools, config_path):
+        return {tool: states[host] for tool in tools}
+    monkeypatch.setattr(engine, 'probe_tools', probe_tools)
+    return states
+
+
+def test_record_writer_jsonl():
+    out = io.StringIO()
+    writer = cli.RecordWriter(out, 'jsonl', ['host', 'state'])
+    writer.write({'host': 'web-1', 'state': "Available", 'extra': 1})
+    writer.write({'host': 'web-2', 'state': None})
+    assert [json.loads(line) for line in out.getvalue().splitlines()] == [
+        {'host': 'web-1', 'state': "Available", 'extra': 1},
+        {'host': 'web-2', 'state': None},
+    ]
+
+
+def test_record_writer_csv():
+    out = io.StringIO()
+    writer = cli.RecordWriter(out, 'csv', ['host', 'state'])
+    writer.write({'host': 'web-1', 'state': "SSH Error: a, b", 'extra': 1})
+    assert list(csv.reader(io.StringIO(out.getvalue()))) == [['host', 'state'], ['web-1', "SSH Error: a, b"]]
+
+
+def test_check_state_jsonl(config, probes, capsys):
+    assert cli.main(['check-state', '--config', config, '--hosts', 'web-*', '--tools', 'nginx']) == cli.EXIT_NOT_INSTALLED
+    captured = capsys.readouterr()
+    records = [json.loads(line) for line in captured.out.splitlines()]
+    assert [(record['host'], record['tool'], record['state'], record['version']) for record in records] == [
+        ('web-1', 'nginx', "Available", "1.24.0"),
+        ('web-2', 'nginx', "Not Available", "N/A"),
+    ]
+    assert "Checked 2 hosts" in captured.err
+
+
+def test_check_state_csv(config, probes, capsys):
+    assert cli.main(['check-state', '--config', config, '--hosts', 'web-1', '--tools', 'nginx', '--format', 'csv']) == cli.EXIT_OK
+    rows = list(csv.DictReader(io.StringIO(capsys.readouterr().out)))
+    assert [(row['host'], row['tool'], row['state'], row['version'], row['error']) for row in rows] == [
+        ('web-1', 'nginx', "Available", "1.24.0", ''),
+    ]
+
+
+def test_probe_errors_fail_the_run(config, probes, capsys):
+    assert cli.main(['check-state', '--config', config, '--tools', 'nginx']) == cli.EXIT_FAILED
+    states = {record['host']: record['state'] for record in map(json.loads, capsys.readouterr().out.splitlines())}
+    assert states == {'web-1': "Available", 'web-2': "Not Available", 'db-1': "Timeout"}
+
+
+def test_groups_file_and_unknown_hosts(config, probes, tmp_path, capsys):
+    groups = tmp_path / 'groups.yml'
+    groups.write_text("web: [web-*]\n")
+    assert cli.main(['check-state', '--config', config, '--groups', str(groups),
+                     '--hosts', '@web', '!web-2', 'nosuch', '--tools', 'nginx']) == cli.EXIT_OK
+    captured = capsys.readouterr()
+    assert [json.loads(line)['host'] for line in captured.out.splitlines()] == ['web-1']
+    assert "No hosts matched nosuch" in captured.err
+
+
+def test_usage_errors(config, probes, capsys):
+    assert cli.main(['check-state', '--config', config, '--hosts', '@missing']) == cli.EXIT_USAGE
+    assert cli.main(['check-state', '--config', config, '--tools', 'no-such-tool']) == cli.EXIT_USAGE
+    captured = capsys.readouterr()
+    assert captured.out == ''
+    assert "Unknown host group: missing" in captured.err
+    assert "Unknown tool: no-such-tool" in captured.err
+
+
+def test_check_state_over_ansible(config, db, monkeypatch, capsys):
+    from fleet.engine import HostResult
+    calls = []
+
+    def ansible_tool_check(hosts, tools, config_path, forks):
+        calls.append((list(hosts), tools, config_path, forks))
+        return [HostResult(host, {'nginx': ("Available", "1.24.0")}, 0.5, None) for host in hosts]
+    monkeypatch.setattr(engine, 'ansible_tool_check', ansible_tool_check)
+
+    assert cli.main(['check-state', '--config', config, '--hosts', 'web-*', '--tools', 'nginx',
+                     '--probe-backend', 'ansible', '--workers', '5']) == cli.EXIT_OK
+    assert calls == [(['web-1', 'web-2'], ['nginx'], config, 5)]
+    assert [json.loads(line)['state'] for line in capsys.readouterr().out.splitlines()] == ["Available", "Available"]
+    assert cli.main(['check-state', '--config', config, '--probe-backend', 'ansible', '--max-age', '60']) == cli.EXIT_USAGE
+
+
+def test_install_reports_host_counters(config, db, monkeypatch, capsys):
+    from fleet import fingerprints
+    calls = []
+
+    def install_with_fingerprints(hosts, role_name, config_path, sudo_passwords, custom_roles_path, **kwargs):
+        calls.append((list(hosts), role_name, kwargs['forks']))
+        results = {
+            'web-1': ('successful', {'ok': 3, 'changed': 1, 'failed': 0, 'unreachable': 0, 'skipped': 2}),
+            'web-2': ('failed', {'ok': 0, 'changed': 0, 'failed': 0, 'unreachable': 1, 'skipped': 0}),
+            'db-1': (fingerprints.SKIPPED, "fingerprint unchanged"),
+        }
+        return {host: results[host] for host in hosts}
+    monkeypatch.setattr(fingerprints, 'install_with_fingerprints', install_with_fingerprints)
+
+    assert cli.main(['install', '--config', config, '--tools', 'nginx', '--format', 'csv']) == cli.EXIT_FAILED
+    assert calls == [(['web-1', 'web-2', 'db-1'], 'nginx', None)]
+    rows = list(csv.DictReader(io.StringIO(capsys.readouterr().out)))
+    assert [(row['host'], row['status'], row['ok'], row['changed'], row['failed'], row['unreachable'], row['skipped'])
+            for row in rows] == [
+        ('web-1', 'successful', '3', '1', '0', '0', '2'),
+        ('web-2', 'failed', '0', '0', '0', '1', '0'),
+        ('db-1', 'skipped', '', '', '', '', ''),
+    ]
+
+    assert cli.main(['install', '--config', config, '--hosts', 'web-1', '--tools', 'nginx']) == cli.EXIT_OK
+    record = json.loads(capsys.readouterr().out)
+    assert {key: record[key] for key in ('ok', 'changed', 'failed', 'unreachable', 'skipped')} == {
+        'ok': 3, 'changed': 1, 'failed': 0, 'unreachable': 0, 'skipped': 2}
+    assert db.check_installation('web-1', 'nginx')
+    assert not db.check_installation('db-1', 'nginx')
+
+
+def test_options_only_where_read():
+    parser = cli.build_parser()
+    with pytest.raises(SystemExit):
+        parser.parse_args(['install', '--tools', 'nginx', '--timeout', '5'])
+    with pytest.raises(SystemExit):
+        parser.parse_args(['watch', '--max-age', '60'])
+    assert parser.parse_args(['install', '--tools', 'nginx', '--max-age', '60']).max_age == 60
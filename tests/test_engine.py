@@ -0,0 +1,50 @@
+import threading
+import time
+from fleet.engine import CheckEngine
+
+
+def test_results_and_errors():
+    def probe(host):
+        if host == 'bad':
+            raise OSError("connection refused")
+        return host.upper()
+
+    engine = CheckEngine(probe, max_workers=2, host_timeout=None)
+    results = {result.host: result for result in engine.run(['a', 'bad', 'b'])}
+    assert results['a'].value == 'A'
+    assert (results['bad'].value, results['bad'].error) == (None, "connection refused")
+    assert (engine.stats.hosts, engine.stats.failed) == (3, 1)
+
+
+def test_deadline_releases_the_blocked_worker():
+    # The hung host blocks its worker until on_timeout unblocks it, the way
+    # closing its SSH transport unblocks a read
+    released = threading.Event()
+    finished = []
+
+    def probe(host):
+        if host == 'hung':
+            released.wait(10)
+        finished.append(host)
+        return host
+
+    engine = CheckEngine(probe, max_workers=1, host_timeout=0.2, poll_interval=0.05,
+                         on_timeout=lambda host: released.set())
+    started = time.monotonic()
+    results = {result.host: result.error for result in engine.run(['hung', 'a', 'b'])}
+    assert results == {'hung': "Timeout", 'a': None, 'b': None}
+    assert time.monotonic() - started < 5
+    assert finished[0] == 'hung'
+    assert engine.stats.timed_out == 1
+
+
+def test_on_timeout_errors_do_not_stop_the_run():
+    released = threading.Event()
+
+    def on_timeout(host):
+        released.set()
+        raise RuntimeError("already closed")
+
+    engine = CheckEngine(lambda host: released.wait(10) and host, max_workers=1, host_timeout=0.1,
+                         poll_interval=0.05, on_timeout=on_timeout)
+    assert [result.error for result in engine.run(['hung'])] == ["Timeout"]
@@ -0,0 +1,88 @@
+from ui.event_bus import UIEventBus
+
+
+class FakeWidget:
+
+    def __init__(self):
+        self.jobs = {}
+        self.exists = True
+        self._next_id = 0
+
+    def after(self, ms, callback):
+        self._next_id += 1
+        self.jobs[self._next_id] = callback
+        return self._next_id
+
+    def after_cancel(self, job):
+        self.jobs.pop(job, None)
+
+    def winfo_exists(self):
+        return self.exists
+
+    def run_pending(self):
+        jobs, self.jobs = self.jobs, {}
+        for callback in jobs.values():
+            callback()
+
+
+def test_pump_dispatches_and_rearms():
+    widget = FakeWidget()
+    bus = UIEventBus(widget).start()
+    seen = []
+    bus.subscribe('line', seen.append)
+    bus.post('line', 'a')
+    bus.post('line', 'b')
+    widget.run_pending()
+    assert seen == ['a', 'b']
+    assert len(widget.jobs) == 1
+
+
+def test_coalesce_and_batch():
+    widget = FakeWidget()
+    bus = UIEventBus(widget).start()
+    rows, batches = [], []
+    bus.subscribe('row', rows.append, coalesce=True)
+    bus.subscribe('event', batches.append, batch=True)
+    for version in range(3):
+        bus.post('row', ('web-1', version), key='web-1')
+    bus.post('row', ('web-2', 0), key='web-2')
+    bus.post('event', 1)
+    bus.post('event', 2)
+    widget.run_pending()
+    assert rows == [('web-1', 2), ('web-2', 0)]
+    assert batches == [[1, 2]]
+
+
+def test_stop_from_handler_does_not_rearm():
+    widget = FakeWidget()
+    bus = UIEventBus(widget).start()
+    seen = []
+
+    def finish(payload):
+        seen.append(payload)
+        bus.stop()
+
+    bus.subscribe('done', finish)
+    bus.post('done', 'ok')
+    widget.run_pending()
+    assert seen == ['ok']
+    assert widget.jobs == {}
+    assert bus._job is None
+
+
+def test_stop_cancels_pending_job():
+    widget = FakeWidget()
+    bus = UIEventBus(widget).start()
+    bus.stop()
+    assert widget.jobs == {}
+    # A pump that already fired before the cancel does not re-arm either
+    bus._pump()
+    assert widget.jobs == {}
+
+
+def test_pump_ends_with_widget():
+    widget = FakeWidget()
+    UIEventBus(widget).start()
+    widget.exists = False
+    widget.run_pending()
+    assert widget.jobs == {}
@@ -0,0 +1,84 @@
+import os
+import pytest
+from fleet.fingerprints import compute_fingerprint, role_dependencies, role_tree_hash
+
+PLAY = "- role: lwt_demo\n"
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+@pytest.fixture
+def roles_dir(tmp_path):
+    path = str(tmp_path / 'roles')
+    write(os.path.join(path, 'lwt_demo', 'tasks', 'main.yml'), "- debug: msg=demo\n")
+    write(os.path.join(path, 'lwt_demo', 'meta', 'main.yml'), "dependencies:\n  - role: lwt_dep\n")
+    write(os.path.join(path, 'lwt_dep', 'tasks', 'main.yml'), "- debug: msg=dep\n")
+    return path
+
+
+def test_dependencies_from_meta(roles_dir, tmp_path):
+    write(os.path.join(str(tmp_path), 'meta', 'main.yml'), "dependencies:\n  - common\n  - {name: extra}\n")
+    assert role_dependencies(str(tmp_path)) == ['common', 'extra']
+    assert role_dependencies(os.path.join(roles_dir, 'lwt_demo')) == ['lwt_dep']
+
+
+def test_tree_hash_is_stable(roles_dir):
+    assert role_tree_hash('lwt_demo', [roles_dir]) == role_tree_hash('lwt_demo', [roles_dir])
+
+
+def test_tree_hash_follows_role_content(roles_dir):
+    before = role_tree_hash('lwt_demo', [roles_dir])
+    write(os.path.join(roles_dir, 'lwt_demo', 'tasks', 'main.yml'), "- debug: msg=changed demo\n")
+    assert role_tree_hash('lwt_demo', [roles_dir]) != before
+
+
+def test_tree_hash_follows_dependencies(roles_dir):
+    before = role_tree_hash('lwt_demo', [roles_dir])
+    write(os.path.join(roles_dir, 'lwt_dep', 'defaults', 'main.yml'), "lwt_dep_port: 8080\n")
+    assert role_tree_hash('lwt_demo', [roles_dir]) != before
+
+
+def test_tree_hash_of_missing_role(roles_dir):
+    assert role_tree_hash('lwt_missing', [roles_dir]) != role_tree_hash('lwt_demo', [roles_dir])
+
+
+def test_fingerprint_inputs():
+    base = compute_fingerprint('roles', PLAY, {'a': 1, 'b': 2}, '1.24.0')
+    assert compute_fingerprint('roles', PLAY, {'b': 2, 'a': 1}, '1.24.0') == base
+    assert compute_fingerprint('roles-changed', PLAY, {'a': 1, 'b': 2}, '1.24.0') != base
+    assert compute_fingerprint('roles', PLAY + "  strategy: linear\n", {'a': 1, 'b': 2}, '1.24.0') != base
+    assert compute_fingerprint('roles', PLAY, {'a': 1, 'b': 3}, '1.24.0') != base
+    assert compute_fingerprint('roles', PLAY, {'a': 1, 'b': 2}, '1.24.1') != base
+    assert compute_fingerprint('roles', PLAY, None, None) == compute_fingerprint('roles', PLAY, {}, '')
+
+
+def test_unchanged_hosts_are_skipped(db, roles_dir, monkeypatch):
+    pytest.importorskip('ansible_runner')
+    from ansible_utils import ansible_executor
+    from fleet import fingerprints
+
+    applied = []
+    versions = {'web-1': ("Available", "1.24.0"), 'web-2': ("Available", "1.24.0")}
+
+    def install_tool_on_hosts(hosts, role_name, *args, **kwargs):
+        applied.append(list(hosts))
+        return {host: ('successful', {}) for host in hosts}
+    monkeypatch.setattr(ansible_executor, 'install_tool_on_hosts', install_tool_on_hosts)
+    monkeypatch.setattr(fingerprints, 'observe_versions', lambda hosts, binary, config_path, max_age: {
+        host: versions[host] for host in hosts})
+
+    def install(**kwargs):
+        return fingerprints.install_with_fingerprints(['web-1', 'web-2'], 'lwt_demo', None, custom_roles_path=roles_dir, **kwargs)
+
+    install()
+    assert install() == {host: (fingerprints.SKIPPED, "fingerprint unchanged") for host in ('web-1', 'web-2')}
+    install(force=True)
+    versions['web-2'] = ("Not Available", "N/A")
+    install()
+    write(os.path.join(roles_dir, 'lwt_demo', 'tasks', 'main.yml'), "- debug: msg=changed demo\n")
+    install()
+    assert applied == [['web-1', 'web-2'], ['web-1', 'web-2'], ['web-2'], ['web-1', 'web-2']]
@@ -0,0 +1,64 @@
+import time
+from db.history import (REACHABILITY, TOOL, compact_history, latest_observations, record_observations,
+                        unreachable_hosts)
+
+DAY = 24 * 3600
+
+
+def test_latest_per_host_and_subject(db):
+    now = time.time()
+    record_observations([('web-1', TOOL, 'nginx', 'Not Available', None, None)], now - 60)
+    record_observations([('web-1', TOOL, 'nginx', 'Available', None, '1.24.0'),
+                         ('web-2', TOOL, 'nginx', 'Available', None, '1.22.1')], now)
+    rows = latest_observations(TOOL)
+    assert [(host, subject, state, version) for host, subject, state, _, version, _ in rows] == [
+        ('web-1', 'nginx', 'Available', '1.24.0'),
+        ('web-2', 'nginx', 'Available', '1.22.1'),
+    ]
+
+
+def test_hosts_are_filtered_in_sql(db):
+    now = time.time()
+    record_observations([(host, TOOL, 'nginx', 'Available', None, None) for host in ('web-1', 'web-2', 'db-1')], now)
+    assert [row[0] for row in latest_observations(TOOL, ['web-2', 'db-1', 'missing'])] == ['db-1', 'web-2']
+    assert latest_observations(TOOL, []) == []
+
+
+def test_rollup_stands_in_after_compaction(db):
+    now = int(time.time())
+    record_observations([('old-1', REACHABILITY, '', 'unreachable', None, None)], now - 10 * DAY)
+    record_observations([('web-1', REACHABILITY, '', 'reachable', 12.0, None)], now - 10 * DAY)
+    record_observations([('web-1', REACHABILITY, '', 'unreachable', None, None)], now - 60)
+    compact_history(now=now)
+
+    latest = {row[0]: row[2] for row in latest_observations(REACHABILITY)}
+    assert latest == {'old-1': 'unreachable', 'web-1': 'unreachable'}
+    assert unreachable_hosts(now=now) == ['old-1', 'web-1']
+
+
+def test_rollup_keeps_the_newest_version(db):
+    now = int(time.time())
+    bucket = now - 10 * DAY - (now - 10 * DAY) % 3600
+    record_observations([('web-1', TOOL, 'nginx', 'Available', None, '1.9.0')], bucket + 10)
+    record_observations([('web-1', TOOL, 'nginx', 'Available', None, '1.10.0')], bucket + 20)
+    record_observations([('web-2', TOOL, 'nginx', 'Available', None, '1.10.0')], bucket + 10)
+    record_observations([('web-2', TOOL, 'nginx', 'Available', None, '1.9.0')], bucket + 20)
+    compact_history(now=now, bucket_seconds=3600)
+    assert {row[0]: row[4] for row in latest_observations(TOOL)} == {'web-1': '1.10.0', 'web-2': '1.9.0'}
+
+
+def test_recent_raw_sample_beats_rollup(db):
+    now = int(time.time())
+    record_observations([('web-1', REACHABILITY, '', 'unreachable', None, None)], now - 10 * DAY)
+    compact_history(now=now)
+    record_observations([('web-1', REACHABILITY, '', 'reachable', 8.0, None)], now - 60)
+    assert [row[2] for row in latest_observations(REACHABILITY)] == ['reachable']
+    assert unreachable_hosts(now=now) == []
+
+
+def test_unreachable_in_window(db):
+    now = int(time.time())
+    record_observations([('web-1', REACHABILITY, '', 'unreachable', None, None)], now - 3600)
+    record_observations([('web-1', REACHABILITY, '', 'reachable', 8.0, None)], now - 60)
+    assert unreachable_hosts(now=now) == ['web-1']
+    assert unreachable_hosts(since_seconds=600, now=now) == []
@@ -0,0 +1,109 @@
+import os
+import shutil
+import sqlite3
+import pytest
+from db.migrations import MIGRATIONS, migrate
+
+REPO_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'installation_state.db')
+
+
+def columns(conn, table):
+    return [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+
+
+def tables(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def user_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    # Shape of the installation_state.db shipped before migrations existed
+    conn = sqlite3.connect(str(tmp_path / 'legacy.db'))
+    conn.execute('''
+        CREATE TABLE installations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            host TEXT NOT NULL,
+            tool TEXT NOT NULL,
+            version TEXT NOT NULL,
+            date TEXT NOT NULL
+        )
+    ''')
+    conn.executemany('INSERT INTO installations (host, tool, version, date) VALUES (?, ?, ?, ?)', [
+        ('web-1', 'NGINX', '1.22', '2024-01-01 10:00:00'),
+        ('web-1', 'NGINX', '1.24', '2024-03-01 10:00:00'),
+        ('web-1', 'NGINX', '1.23', '2024-02-01 10:00:00'),
+        ('web-1', 'APACHE', 'latest', '2024-01-05 10:00:00'),
+        ('web-2', 'NGINX', '1.24', '2024-03-01 10:00:00'),
+        ('web-2', 'NGINX', '1.24', '2024-03-01 10:00:00'),
+    ])
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def test_committed_database_upgrades(tmp_path):
+    path = str(tmp_path / 'installation_state.db')
+    shutil.copy(REPO_DB, path)
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    assert user_version(conn) == len(MIGRATIONS)
+    assert {'installations', 'host_statuses', 'observations', 'observation_rollups', 'probe_cache',
+            'install_fingerprints'} <= tables(conn)
+    assert columns(conn, 'installations') == ['id', 'host', 'tool', 'version', 'date']
+    conn.close()
+
+
+def test_legacy_rows_are_deduplicated(legacy_db):
+    migrate(legacy_db)
+    assert user_version(legacy_db) == len(MIGRATIONS)
+    rows = legacy_db.execute('SELECT host, tool, version, date FROM installations ORDER BY host, tool').fetchall()
+    assert rows == [
+        ('web-1', 'APACHE', 'latest', '2024-01-05 10:00:00'),
+        ('web-1', 'NGINX', '1.24', '2024-03-01 10:00:00'),
+        ('web-2', 'NGINX', '1.24', '2024-03-01 10:00:00'),
+    ]
+    with pytest.raises(sqlite3.IntegrityError):
+        legacy_db.execute("INSERT INTO installations (host, tool, version, date) VALUES ('web-1', 'NGINX', '1.25', 'now')")
+    assert 'latency_ms' in columns(legacy_db, 'host_statuses')
+
+
+def test_database_without_version_column(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'old.db'))
+    conn.execute('CREATE TABLE installations (id INTEGER PRIMARY KEY AUTOINCREMENT, host TEXT NOT NULL, tool TEXT NOT NULL, date TEXT NOT NULL)')
+    conn.execute("INSERT INTO installations (host, tool, date) VALUES ('web-1', 'NGINX', '2024-01-01 10:00:00')")
+    conn.commit()
+    migrate(conn)
+    assert conn.execute('SELECT host, tool, version FROM installations').fetchall() == [('web-1', 'NGINX', None)]
+    conn.close()
+
+
+def test_migrate_is_idempotent(legacy_db):
+    migrate(legacy_db)
+    schema = sorted(legacy_db.execute('SELECT type, name, sql FROM sqlite_master').fetchall(), key=str)
+    rows = legacy_db.execute('SELECT * FROM installations ORDER BY id').fetchall()
+    migrate(legacy_db)
+    assert user_version(legacy_db) == len(MIGRATIONS)
+    assert sorted(legacy_db.execute('SELECT type, name, sql FROM sqlite_master').fetchall(), key=str) == schema
+    assert legacy_db.execute('SELECT * FROM installations ORDER BY id').fetchall() == rows
+
+
+def test_fresh_database(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'fresh.db'))
+    migrate(conn)
+    assert user_version(conn) == len(MIGRATIONS)
+    assert columns(conn, 'install_fingerprints') == ['host', 'role', 'fingerprint', 'version', 'applied_at']
+    conn.close()
+
+
+def test_failed_migration_rolls_back(legacy_db, monkeypatch):
+    def broken(cursor):
+        raise sqlite3.OperationalError("boom")
+    monkeypatch.setattr('db.migrations.MIGRATIONS', MIGRATIONS[:2] + [broken])
+    with pytest.raises(sqlite3.OperationalError):
+        migrate(legacy_db)
+    assert user_version(legacy_db) == 0
+    assert 'host_statuses' not in tables(legacy_db)
@@ -0,0 +1,79 @@
+import socket
+import pytest
+from ssh.pool import SSHConnectionPool
+
+
+class FakeClient:
+
+    def __init__(self, host):
+        self.host = host
+        self.closed = False
+
+    def get_transport(self):
+        return self
+
+    def is_active(self):
+        return not self.closed
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = SSHConnectionPool(max_connections=4)
+    monkeypatch.setattr(pool, '_connect', lambda host, config_path: FakeClient(host))
+    monkeypatch.setattr(pool, '_start_reaper', lambda: None)
+    yield pool
+    pool.close_all()
+
+
+def test_checkouts_share_one_client(pool):
+    first = pool.checkout('web-1', 'cfg')
+    second = pool.checkout('web-1', 'cfg')
+    assert first is second
+    pool.checkin('web-1', 'cfg', first)
+    pool.checkin('web-1', 'cfg', second)
+    assert not first.closed
+
+
+def test_discard_keeps_shared_client_open_until_returned(pool):
+    client = pool.checkout('web-1', 'cfg')
+    with pytest.raises(socket.error):
+        with pool.connection('web-1', 'cfg') as same:
+            assert same is client
+            raise socket.error("channel failed")
+    # The other checkout is still using it
+    assert not client.closed
+
+    fresh = pool.checkout('web-1', 'cfg')
+    assert fresh is not client
+    pool.checkin('web-1', 'cfg', client)
+    assert client.closed
+    pool.checkin('web-1', 'cfg', fresh)
+    assert not fresh.closed
+
+
+def test_discard_of_idle_client_closes_it(pool):
+    with pool.connection('web-1', 'cfg') as client:
+        pass
+    pool.discard('web-1', 'cfg')
+    assert client.closed
+
+
+def test_abort_closes_client_under_its_checkouts(pool):
+    client = pool.checkout('web-1', 'cfg')
+    other = pool.checkout('db-1', 'cfg')
+    pool.abort('web-1', 'cfg')
+    assert client.closed
+    assert not other.closed
+    assert pool.checkout('web-1', 'cfg') is not client
+    pool.checkin('web-1', 'cfg', client)
+    assert pool._retired == []
+
+
+def test_retired_clients_count_against_the_limit(pool):
+    clients = [pool.checkout(f'web-{index}', 'cfg') for index in range(3)]
+    pool.discard('web-0', 'cfg', clients[0])
+    pool.checkout('web-3', 'cfg')
+    assert len(pool._connections) + len(pool._retired) == 4
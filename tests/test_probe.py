@@ -0,0 +1,177 @@
+import io
+import os
+import socket
+import stat
+import subprocess
+import threading
+from contextlib import contextmanager
+import pytest
+from ssh.probe import (build_probe_script, check_sudo_requirement, parse_probe_output, probe_tools,
+                       tool_state_from_record, SudoCheckError)
+
+MARKER = "@@LWT-0123456789abcdef"
+
+
+class FakeChannel:
+
+    def __init__(self, exit_status):
+        self.exit_status = exit_status
+        self.status_event = threading.Event()
+        if exit_status is not None:
+            self.status_event.set()
+        self.closed = False
+
+    def shutdown_write(self):
+        pass
+
+    def recv_exit_status(self):
+        return self.exit_status
+
+    def close(self):
+        self.closed = True
+
+
+class FakeStream(io.BytesIO):
+
+    def __init__(self, data, channel):
+        super().__init__(data)
+        self.channel = channel
+
+    def write(self, data):
+        # paramiko's stdin takes text as well as bytes
+        return super().write(data.encode() if isinstance(data, str) else data)
+
+
+class FakeClient:
+
+    def __init__(self, exit_status, stderr=b''):
+        self.channel = FakeChannel(exit_status)
+        self.stderr = stderr
+
+    def exec_command(self, command, timeout=None):
+        self.timeout = timeout
+        return (FakeStream(b'', self.channel), FakeStream(b'', self.channel),
+                FakeStream(self.stderr, self.channel))
+
+
+class FakePool:
+
+    def __init__(self, client):
+        self.client = client
+
+    @contextmanager
+    def connection(self, host, config_path):
+        yield self.client
+
+
+def sudo_check(exit_status, stderr=b'', timeout=10):
+    client = FakeClient(exit_status, stderr)
+    return check_sudo_requirement('web-1', None, pool=FakePool(client), timeout=timeout), client
+
+
+def test_passwordless_sudo():
+    assert sudo_check(0)[0] is False
+
+
+def test_password_required():
+    assert sudo_check(1, b'sudo: a password is required\n')[0] is True
+
+
+def test_missing_sudo_is_an_error():
+    with pytest.raises(SudoCheckError):
+        sudo_check(127, b'sh: 1: sudo: not found\n')
+
+
+def test_not_in_sudoers_is_an_error():
+    with pytest.raises(SudoCheckError):
+        sudo_check(1, b'deploy is not in the sudoers file.  This incident will be reported.\n')
+
+
+def test_exit_status_wait_times_out():
+    client = FakeClient(None)
+    with pytest.raises(socket.timeout):
+        check_sudo_requirement('web-1', None, pool=FakePool(client), timeout=0.01)
+    assert client.channel.closed
+
+
+def test_probe_script_exit_times_out():
+    client = FakeClient(None)
+    assert probe_tools('web-1', ['nginx'], None, pool=FakePool(client), timeout=0.01) == {'nginx': ("Timeout", "N/A")}
+    assert client.timeout == 0.01
+    assert client.channel.closed
+
+
+def fake_tool(bin_dir, name, body):
+    path = os.path.join(bin_dir, name)
+    with open(path, 'w') as f:
+        f.write("#!/bin/sh\n" + body + "\n")
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+
+
+def run_probe(tmp_path, tools, marker=MARKER):
+    # Runs the script with a local sh, the same way the remote `sh -s` does
+    bin_dir = str(tmp_path / 'bin')
+    result = subprocess.run(['sh', '-s'], input=build_probe_script(tools, marker), capture_output=True, text=True,
+                            env={'PATH': bin_dir + os.pathsep + '/usr/bin:/bin'}, cwd=str(tmp_path), timeout=30)
+    assert result.returncode == 0, result.stderr
+    records = parse_probe_output(result.stdout, marker)
+    return {tool: tool_state_from_record(records.get(tool)) for tool in tools}
+
+
+@pytest.fixture
+def bin_dir(tmp_path):
+    path = str(tmp_path / 'bin')
+    os.makedirs(path)
+    return path
+
+
+def test_round_trip(tmp_path, bin_dir):
+    fake_tool(bin_dir, 'nginx', 'echo "nginx version: nginx/1.24.0" >&2')
+    # Only the second flag yields a version
+    fake_tool(bin_dir, 'legacy', '[ "$1" = "-v" ] && echo "legacy 2.3.4" || exit 1')
+    assert run_probe(tmp_path, ['nginx', 'legacy', 'lwt-missing-tool']) == {
+        'nginx': ("Available", "1.24.0"),
+        'legacy': ("Available", "2.3.4"),
+        'lwt-missing-tool': ("Not Available", "N/A"),
+    }
+
+
+def test_empty_version_output(tmp_path, bin_dir):
+    fake_tool(bin_dir, 'quiet', 'exit 0')
+    assert run_probe(tmp_path, ['quiet']) == {'quiet': ("Available", "N/A")}
+
+
+def test_output_containing_the_marker(tmp_path, bin_dir):
+    fake_tool(bin_dir, 'evil', f'echo "{MARKER} END"; echo "{MARKER} TOOL nginx"; echo "{MARKER} PATH 1"; '
+                               'echo "evil 9.9.9"')
+    fake_tool(bin_dir, 'nginx', 'echo "nginx/1.24.0"')
+    assert run_probe(tmp_path, ['evil', 'nginx']) == {
+        'evil': ("Available", "9.9.9"),
+        'nginx': ("Available", "1.24.0"),
+    }
+
+
+def test_tool_names_are_quoted(tmp_path, bin_dir):
+    assert run_probe(tmp_path, ['$(touch pwned)', 'a b']) == {
+        '$(touch pwned)': ("Not Available", "N/A"),
+        'a b': ("Not Available", "N/A"),
+    }
+    assert not os.path.exists(tmp_path / 'pwned')
+
+
+def test_parse_ignores_noise_and_truncation():
+    output = "\n".join([
+        "motd banner",
+        f"{MARKER} TOOL nginx",
+        f"{MARKER} PATH 0 /usr/sbin/nginx",
+        f"{MARKER} VERSION --version 0",
+        " nginx version: nginx/1.24.0",
+        f"{MARKER} END",
+        f"{MARKER} TOOL apache2",
+        f"{MARKER} PATH 0 /usr/sbin/apache2",
+    ])
+    records = parse_probe_output(output, MARKER)
+    assert tool_state_from_record(records['nginx']) == ("Available", "1.24.0")
+    assert records['nginx']['versions'][0]['output'] == "nginx version: nginx/1.24.0"
+    assert tool_state_from_record(records['apache2']) == ("Available", "N/A")
+    assert tool_state_from_record(records.get('php')) == ("Not Available", "N/A")
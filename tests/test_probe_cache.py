@@ -0,0 +1,57 @@
+import time
+from fleet import probe_cache as probe_cache_module
+from fleet.probe_cache import ProbeCache
+
+
+def fake_probe(monkeypatch, answers):
+    calls = []
+
+    def probe_tools(host, tools, config_path):
+        calls.append(list(tools))
+        return {tool: answers[tool] for tool in tools}
+    monkeypatch.setattr(probe_cache_module, 'probe_tools', probe_tools)
+    return calls
+
+
+def test_definitive_results_are_cached(db, monkeypatch):
+    calls = fake_probe(monkeypatch, {'nginx': ("Available", "1.24.0"), 'apache2': ("Not Available", "N/A")})
+    cache = ProbeCache(ttl=300)
+    cache.probe('web-1', ['nginx', 'apache2'], None)
+    entries = cache.probe('web-1', ['nginx', 'apache2'], None)
+    assert calls == [['nginx', 'apache2']]
+    assert entries['nginx'].state == "Available"
+    assert set(db.get_cached_probes('web-1', ['nginx', 'apache2'])) == {'nginx', 'apache2'}
+
+
+def test_errors_are_not_cached(db, monkeypatch):
+    answers = {'nginx': ("Timeout", "N/A")}
+    calls = fake_probe(monkeypatch, answers)
+    cache = ProbeCache(ttl=300)
+    assert cache.probe('web-1', ['nginx'], None)['nginx'].state == "Timeout"
+    assert db.get_cached_probes('web-1', ['nginx']) == {}
+
+    answers['nginx'] = ("Available", "1.24.0")
+    assert cache.probe('web-1', ['nginx'], None)['nginx'].state == "Available"
+    assert len(calls) == 2
+
+
+def test_failed_reprobe_drops_older_answer(db, monkeypatch):
+    answers = {'nginx': ("Available", "1.24.0")}
+    calls = fake_probe(monkeypatch, answers)
+    cache = ProbeCache(ttl=300)
+    cache.probe('web-1', ['nginx'], None)
+    answers['nginx'] = ("SSH Error: connection reset", "N/A")
+    assert cache.probe('web-1', ['nginx'], None, force=True)['nginx'].state.startswith("SSH Error")
+    assert db.get_cached_probes('web-1', ['nginx']) == {}
+
+    answers['nginx'] = ("Available", "1.24.0")
+    cache.probe('web-1', ['nginx'], None)
+    assert len(calls) == 3
+
+
+def test_stored_error_rows_are_stale(db, monkeypatch):
+    # Rows written before errors were kept out of the cache
+    db.store_probe_results('web-1', {'nginx': ("Timeout", "N/A")}, time.time())
+    calls = fake_probe(monkeypatch, {'nginx': ("Available", "1.24.0")})
+    assert ProbeCache(ttl=300).probe('web-1', ['nginx'], None)['nginx'].state == "Available"
+    assert calls == [['nginx']]
@@ -0,0 +1,113 @@
+import pytest
+from fleet.reconcile import (INSTALL, NOOP, UNKNOWN, UPGRADE, Plan, load_desired_state, plan_action,
+                             resolve_desired, version_matches)
+
+
+@pytest.mark.parametrize('desired, observed, expected', [
+    ('latest', '1.24.0', True),
+    ('latest', 'N/A', True),
+    ('any', None, True),
+    ('1.24', '1.24.0', True),
+    ('1.24.0', '1.24.0', True),
+    ('1.24', '1.240.1', False),
+    ('1.24', '1.22.1', False),
+    ('1.24', 'N/A', False),
+    ('1.24', None, False),
+])
+def test_version_matches(desired, observed, expected):
+    assert version_matches(desired, observed) is expected
+
+
+def test_missing_tool_is_installed():
+    action = plan_action('web-1', 'nginx', 'latest', "Not Available", "N/A")
+    assert (action.action, action.reason) == (INSTALL, "not installed")
+
+
+def test_installed_latest_is_left_alone():
+    assert plan_action('web-1', 'nginx', 'latest', "Available", "1.22.1").action == NOOP
+
+
+def test_installed_pinned_version_is_left_alone():
+    assert plan_action('web-1', 'nginx', '1.24', "Available", "1.24.0").action == NOOP
+
+
+def test_version_mismatch_is_upgraded():
+    action = plan_action('web-1', 'nginx', '1.24', "Available", "1.22.1")
+    assert action.action == UPGRADE
+    assert action.reason == "version 1.22.1 != 1.24"
+
+
+def test_installed_without_a_version_is_upgraded_when_pinned():
+    assert plan_action('web-1', 'nginx', '1.24', "Available", "N/A").action == UPGRADE
+
+
+@pytest.mark.parametrize('state', ["Timeout", "SSH Error: connection refused", "Error: boom"])
+def test_unreachable_host_is_unknown(state):
+    action = plan_action('web-1', 'nginx', 'latest', state, "N/A")
+    assert (action.action, action.reason) == (UNKNOWN, state)
+
+
+def test_plan_batches_by_role_and_version():
+    plan = Plan([
+        plan_action('web-1', 'nginx', '1.24', "Not Available", "N/A"),
+        plan_action('web-2', 'nginx', '1.24', "Available", "1.22.1"),
+        plan_action('web-3', 'nginx', 'latest', "Not Available", "N/A"),
+        plan_action('web-4', 'nginx', '1.24', "Available", "1.24.0"),
+        plan_action('web-5', 'nginx', '1.24', "Timeout", "N/A"),
+    ])
+    assert plan.batches() == {('nginx', '1.24'): ['web-1', 'web-2'], ('nginx', 'latest'): ['web-3']}
+    assert [action.host for action in plan.unknown()] == ['web-5']
+    assert not plan.is_converged()
+    assert Plan([plan_action('web-4', 'nginx', '1.24', "Available", "1.24.0")]).is_converged()
+
+
+def test_desired_state_file(tmp_path):
+    path = tmp_path / 'desired.yml'
+    path.write_text('''
+groups:
+  web: [web-*]
+desired:
+  "@web": {nginx: "1.24"}
+  "db-*": [nginx, apache2]
+  "web-2": {nginx: 1.26}
+''')
+    groups, desired = load_desired_state(str(path))
+    assert groups == {'web': ['web-*']}
+    resolved = resolve_desired(desired, ['web-1', 'web-2', 'db-1', 'cache-1'], groups)
+    assert resolved == {
+        'web-1': {'nginx': '1.24'},
+        'web-2': {'nginx': '1.26'},
+        'db-1': {'nginx': 'latest', 'apache2': 'latest'},
+    }
+
+
+def test_build_plan_maps_roles_to_observed_binaries(monkeypatch):
+    from fleet import reconcile
+    from fleet.engine import CheckEngine
+
+    observed = {
+        'web-1': {'apache2': ("Not Available", "N/A"), 'nginx': ("Available", "1.24.0")},
+        'web-2': {'apache2': ("Available", "2.4.58"), 'nginx': ("Available", "1.22.1")},
+    }
+    probed = []
+
+    def fake_engine(tools, config_path, max_workers, host_timeout, max_age):
+        probed.append(sorted(tools))
+        return CheckEngine(lambda host: observed[host], max_workers=2, host_timeout=None)
+
+    def fake_unreachable_engine(tools, config_path, max_workers, host_timeout, max_age):
+        def probe(host):
+            raise OSError("connection refused")
+        return CheckEngine(probe, max_workers=2, host_timeout=None)
+
+    monkeypatch.setattr(reconcile, 'tool_check_engine', fake_engine)
+    plan = reconcile.build_plan({'web-1': {'apache': 'latest', 'nginx': '1.24'},
+                                 'web-2': {'apache': 'latest', 'nginx': '1.24'}}, None)
+    assert probed == [['apache2', 'nginx']]
+    actions = {(action.host, action.role): action.action for action in plan.actions}
+    assert actions == {('web-1', 'apache'): INSTALL, ('web-1', 'nginx'): NOOP,
+                       ('web-2', 'apache'): NOOP, ('web-2', 'nginx'): UPGRADE}
+
+    monkeypatch.setattr(reconcile, 'tool_check_engine', fake_unreachable_engine)
+    plan = reconcile.build_plan({'web-3': {'nginx': 'latest'}}, None)
+    assert [(action.action, action.reason) for action in plan.actions] == [(UNKNOWN, "connection refused")]
@@ -0,0 +1,40 @@
+import os
+import subprocess
+import time
+import pytest
+from ansible_utils.role_repos import RepoFetchError, run_git, parse_repo_spec, repo_dir_name
+
+
+@pytest.fixture
+def repo(tmp_path):
+    path = str(tmp_path / 'repo')
+    os.makedirs(path)
+    subprocess.run(['git', 'init', '-q', path], check=True)
+    with open(os.path.join(path, 'big.txt'), 'w') as f:
+        # Well past a pipe buffer, so an undrained stdout would block git
+        f.write('x' * 1024 * 1024)
+    run_git(['add', 'big.txt'], cwd=path)
+    run_git(['-c', 'user.name=test', '-c', 'user.email=test@example.com', 'commit', '-q', '-m', 'big'], cwd=path)
+    return path
+
+
+def test_large_stdout_does_not_block(repo):
+    assert len(run_git(['show', 'HEAD:big.txt'], cwd=repo, timeout=30)) == 1024 * 1024
+
+
+def test_failure_carries_stderr(repo):
+    with pytest.raises(RepoFetchError, match="git rev-parse failed: fatal"):
+        run_git(['rev-parse', '--verify', 'does-not-exist'], cwd=repo)
+
+
+def test_timeout_kills_git(repo):
+    started = time.monotonic()
+    with pytest.raises(RepoFetchError, match="timed out"):
+        run_git(['-c', 'alias.stall=!sleep 5', 'stall'], cwd=repo, timeout=0.5)
+    assert time.monotonic() - started < 4
+
+
+def test_pins_get_their_own_checkout():
+    url, ref = parse_repo_spec("https://example.com/roles.git#v1.2")
+    assert (url, ref) == ("https://example.com/roles.git", "v1.2")
+    assert repo_dir_name(url, ref) != repo_dir_name(url, None)
@@ -0,0 +1,47 @@
+import pytest
+from fleet.selection import load_groups, select_hosts
+
+HOSTS = ['web-1', 'web-2', 'web-3', 'db-1', 'db-2', 'cache-1']
+GROUPS = {'web': ['web-*'], 'db': ['db-*'], 'canary': ['web-3', 'db-2'], 'stateful': ['@db', 'cache-1']}
+
+
+def test_no_selectors_selects_everything():
+    assert select_hosts(HOSTS) == (HOSTS, [])
+
+
+def test_globs_keep_inventory_order():
+    assert select_hosts(HOSTS, ['db-*', 'web-[12]']) == (['db-1', 'db-2', 'web-1', 'web-2'], [])
+
+
+def test_groups_and_nested_groups():
+    assert select_hosts(HOSTS, ['@stateful'], GROUPS) == (['db-1', 'db-2', 'cache-1'], [])
+
+
+def test_exclusions_apply_left_to_right():
+    assert select_hosts(HOSTS, ['@web', '!@canary'], GROUPS) == (['web-1', 'web-2'], [])
+    assert select_hosts(HOSTS, ['!web-*', '!cache-1'], GROUPS) == (['db-1', 'db-2'], [])
+
+
+def test_unknown_hosts_are_reported():
+    assert select_hosts(HOSTS, ['web-1', 'nosuch-host', '!gone-*']) == (['web-1'], ['nosuch-host', '!gone-*'])
+
+
+def test_unknown_group_is_an_error():
+    with pytest.raises(ValueError, match="Unknown host group: nope"):
+        select_hosts(HOSTS, ['@nope'], GROUPS)
+
+
+def test_group_cycles_are_an_error():
+    with pytest.raises(ValueError, match="includes itself"):
+        select_hosts(HOSTS, ['@a'], {'a': ['@b'], 'b': ['@a']})
+
+
+def test_load_groups(tmp_path, monkeypatch):
+    nested = tmp_path / 'nested.yml'
+    nested.write_text("groups:\n  web: [web-*]\n  db: db-1\n")
+    bare = tmp_path / 'bare.yml'
+    bare.write_text("canary:\n  - web-3\n")
+    assert load_groups(str(nested)) == {'web': ['web-*'], 'db': ['db-1']}
+    monkeypatch.setenv('LINUXWT_GROUPS', str(bare))
+    assert load_groups() == {'canary': ['web-3']}
+    assert load_groups(str(tmp_path / 'missing.yml')) == {}
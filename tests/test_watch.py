@@ -0,0 +1,52 @@
+import threading
+from types import SimpleNamespace
+from fleet import engine, watch
+from fleet.probe_cache import CachedProbe
+
+
+def daemon_with_slot(host, **kwargs):
+    daemon = watch.WatchDaemon(None, ['nginx'], **kwargs)
+    daemon._host_slots[host] = threading.BoundedSemaphore(1)
+    daemon._host_slots[host].acquire()
+    return daemon
+
+
+def test_scan_records_host_and_tools(monkeypatch):
+    saved = []
+    monkeypatch.setattr(watch, 'check_reachability', lambda hosts, config_path: {host: (True, 12.5) for host in hosts})
+    monkeypatch.setattr(watch, 'check_host_status', lambda host, config_path, reachability: (True, False, 12.5))
+    monkeypatch.setattr(watch, 'save_host_status', lambda *status: saved.append(status))
+    monkeypatch.setattr(watch.probe_cache, 'probe', lambda host, tools, config_path, force: {
+        tool: CachedProbe("Available", "1.24.0", 0) for tool in tools})
+
+    daemon = daemon_with_slot('web-1')
+    record = daemon.scan_host('web-1')
+    assert {key: record[key] for key in ('accessible', 'needs_sudo_password', 'latency_ms', 'tools', 'error')} == {
+        'accessible': True, 'needs_sudo_password': False, 'latency_ms': 12.5,
+        'tools': {'nginx': ["Available", "1.24.0"]}, 'error': None}
+    assert saved == [('web-1', True, False, 12.5)]
+    assert daemon._host_slots['web-1'].acquire(blocking=False)
+
+
+def test_hung_scan_is_aborted_and_frees_the_slot(monkeypatch):
+    # The scan blocks until its connections are aborted, the way a read on a
+    # closed SSH transport returns
+    released = threading.Event()
+    aborted = []
+
+    def check_reachability(hosts, config_path):
+        released.wait(10)
+        raise OSError("connection closed")
+
+    def abort(host, config_path):
+        aborted.append(host)
+        released.set()
+    monkeypatch.setattr(watch, 'check_reachability', check_reachability)
+    monkeypatch.setattr(engine, 'connection_pool', SimpleNamespace(abort=abort))
+
+    daemon = daemon_with_slot('web-1', host_timeout=0.1)
+    record = daemon.scan_host('web-1')
+    assert (record['accessible'], record['error']) == (False, "Timeout")
+    assert aborted == ['web-1']
+    assert daemon._host_slots['web-1'].acquire(blocking=False)
+    assert daemon.scans == 1
@@ -1,11 +1,14 @@
 import os
 from rich.console import Console
 from rich.table import Table
-from ansible_utils.ansible_executor import install_tool
-from ansible_utils.check_tool import check_tool_remote
+from ansible_utils.ansible_executor import install_tool, install_tool_on_hosts
 from ansible_utils.inventory import get_host_nicknames
 from ansible_utils.roles_enum import Tools
-from db.database import log_installation, check_installation, update_installation
+from ansible_utils.role_catalog import role_catalog
+from db.history import record_tool_observations
+from db.database import log_installation, update_installation, get_installation_matrix, transaction
+from ssh.probe import check_tool_remote
+from fleet.engine import tool_check_engine, tool_states, DEFAULT_MAX_WORKERS
 
 console = Console()
 
@@ -19,6 +22,11 @@ def install_ansible_role(role_name, version='latest'):
     return result.returncode == 0
 
 
+def is_tool_installed(nickname, tool, config_path):
+    state, _ = check_tool_remote(nickname, role_catalog.binary_for(tool.value['default']), config_path)
+    return state == "Available"
+
+
 def interactive_install():
     default_config_path = os.path.expanduser("~/.ssh/config")
     config_path = input(f"Enter the path to your config file (default is {default_config_path}): ") or default_config_path
@@ -51,8 +59,9 @@ def interactive_install():
     tool_table.add_column("Status", style="yellow")
 
     tool_list = list(Tools)
+    installed = get_installation_matrix([nickname], [tool.name for tool in tool_list])[nickname]
     for index, tool in enumerate(tool_list, start=1):
-        installed_in_db = check_installation(nickname, tool.name)
+        installed_in_db = installed[tool.name]
         status = "(present)" if installed_in_db else "(absent)"
         tool_table.add_row(str(index), tool.name, status)
 
@@ -74,20 +83,25 @@ def interactive_install():
         console.print("Invalid version.", style="bold red")
         return
 
-    if not check_tool_remote(nickname, tool_name):
-        console.print(f"Installing {tool_name} version {version}...", style="bold blue")
-        if install_ansible_role(tool.value['default'], version):
-            log_installation(nickname, tool_name, version)
-            console.print(f"Successfully installed {tool_name} version {version}.", style="bold green")
-        else:
-            console.print(f"Failed to install {tool_name} version {version}.", style="bold red")
-    else:
-        console.print(f"{tool_name} is already installed on the remote host but not in the DB. Updating the DB.", style="bold yellow")
+    if is_tool_installed(nickname, tool, config_path):
+        console.print(f"{tool_name} is already installed on the remote host. Updating the DB.", style="bold yellow")
         log_installation(nickname, tool_name, 'unknown')
+        return
 
-    result = install_tool(nickname, tool.value['default'], version)
-    if result == 0:
+    role_name = tool.value['default']
+    role = role_catalog.get(role_name)
+    if role is None and not install_ansible_role(role_name, version):
+        console.print(f"Failed to fetch the {role_name} role.", style="bold red")
+        return
+
+    console.print(f"Installing {tool_name} version {version}...", style="bold blue")
+    role_vars = {role.version_var: version} if role and role.version_var and version != 'latest' else None
+    status, _ = install_tool(nickname, role_name, role_vars=role_vars)
+    if status == 'successful':
         log_installation(nickname, tool_name, version)
+        console.print(f"Successfully installed {tool_name} version {version}.", style="bold green")
+    else:
+        console.print(f"Failed to install {tool_name} version {version}.", style="bold red")
 
 def check_state():
     default_config_path = os.path.expanduser("~/.ssh/config")
@@ -117,8 +131,19 @@ def check_state():
         console.print("Invalid selection.", style="bold red")
         return
 
-    for nickname in selected_hosts:
-        console.print(f"\n[bold]Checking state for host:[/bold] {nickname}")
+    max_workers = DEFAULT_MAX_WORKERS
+    if len(selected_hosts) > 1:
+        max_workers = int(input(f"Enter the number of hosts to check in parallel (default is {DEFAULT_MAX_WORKERS}): ") or DEFAULT_MAX_WORKERS)
+
+    binaries = {tool: role_catalog.binary_for(tool.value['default']) for tool in Tools}
+    tool_names = list(binaries.values())
+    engine = tool_check_engine(tool_names, config_path, max_workers=max_workers)
+    unsynced_hosts = {}
+    installation_matrix = get_installation_matrix(selected_hosts, [tool.name for tool in Tools])
+
+    for result in engine.run(selected_hosts):
+        nickname = result.host
+        console.print(f"\n[bold]Checked state for host:[/bold] {nickname} ({result.elapsed:.1f}s)")
         all_synced = True
         installable_tools = []
         state_table = Table(title=f"\nTool States for {nickname}")
@@ -126,63 +151,72 @@ def check_state():
         state_table.add_column("Tool", style="cyan")
         state_table.add_column("State", style="magenta")
 
-        for index, tool in enumerate(Tools, start=1):
-            tool_name = tool.name
-            installed_in_db = check_installation(nickname, tool_name)
-            installed_on_remote = check_tool_remote(nickname, tool_name)
+        remote_states = tool_states(result, tool_names)
+        record_tool_observations(nickname, remote_states)
 
-            if installed_on_remote:
-                if not installed_in_db:
-                    log_installation(nickname, tool_name, 'unknown')
-                    console.print(f"[green]Updated DB:[/green] {tool_name} is now marked as installed for host {nickname} in the DB.")
-                state = "present in both DB and remote host"
-            else:
-                if installed_in_db:
-                    update_installation(nickname, tool_name, remove=True)
-                    console.print(f"[yellow]Updated DB:[/yellow] {tool_name} is now marked as absent for host {nickname} in the DB.")
-                state = "absent"
-                all_synced = False
-                installable_tools.append(index)
+        installed = installation_matrix[nickname]
+
+        with transaction():
+            for index, tool in enumerate(Tools, start=1):
+                tool_name = tool.name
+                installed_in_db = installed[tool_name]
+                installed_on_remote = remote_states[binaries[tool]][0] == "Available"
 
-            state_table.add_row(str(index), tool_name, state)
+                if installed_on_remote:
+                    if not installed_in_db:
+                        log_installation(nickname, tool_name, 'unknown')
+                        console.print(f"[green]Updated DB:[/green] {tool_name} is now marked as installed for host {nickname} in the DB.")
+                    state = "present in both DB and remote host"
+                else:
+                    if installed_in_db:
+                        update_installation(nickname, tool_name, remove=True)
+                        console.print(f"[yellow]Updated DB:[/yellow] {tool_name} is now marked as absent for host {nickname} in the DB.")
+                    state = "absent"
+                    all_synced = False
+                    installable_tools.append(index)
+
+                state_table.add_row(str(index), tool_name, state)
 
         console.print(state_table)
 
         if all_synced:
             console.print(f"[green]Everything is synchronized and installed for host {nickname}![/green]")
         else:
-            while True:
-                install_option = input(f"Do you want to install missing packages on the remote host {nickname}? Type 'all' to install all or enter package numbers separated by commas (e.g., 1,2,3): ").strip().lower()
-
-                if install_option == 'all':
-                    for tool in Tools:
-                        tool_name = tool.name
-                        installed_on_remote = check_tool_remote(nickname, tool_name)
-                        if not installed_on_remote:
-                            result = install_tool(nickname, tool.value['default'], 'latest')
-                            if result == 0:
-                                log_installation(nickname, tool_name, 'latest')
-                                console.print(f"[green]Successfully installed {tool_name} on the remote host {nickname}.[/green]")
-                            else:
-                                console.print(f"[red]Failed to install {tool_name} on the remote host {nickname}.[/red]")
-                    break
+            unsynced_hosts[nickname] = installable_tools
+
+    console.print(f"[bold]{engine.stats.summary()}[/bold]")
+
+    # The check above already knows what is missing on each host, so the
+    # answers are collected first and each tool is installed in one batched run
+    # on exactly the hosts that lack it, without probing them again
+    hosts_by_tool = {}
+    for nickname, installable_tools in unsynced_hosts.items():
+        while True:
+            install_option = input(f"Do you want to install missing packages on the remote host {nickname}? Type 'all' to install all or enter package numbers separated by commas (e.g., 1,2,3): ").strip().lower()
+
+            if install_option == 'all':
+                selected_indices = installable_tools
+            else:
+                selected_indices = [int(x) for x in install_option.split(',') if x.strip().isdigit()]
+                if not selected_indices:
+                    console.print("[red]Invalid input. Please enter numbers separated by commas or 'all'.[/red]")
+                    continue
+            for index in selected_indices:
+                if not 1 <= index <= len(Tools):
+                    console.print(f"[red]Invalid package number: {index}. Please enter valid numbers.[/red]")
+                elif index not in installable_tools:
+                    console.print(f"[yellow]{list(Tools)[index - 1].name} is already installed on {nickname}, skipping.[/yellow]")
+                else:
+                    hosts_by_tool.setdefault(list(Tools)[index - 1], []).append(nickname)
+            break
+
+    for tool, hosts in hosts_by_tool.items():
+        tool_name = tool.name
+        results = install_tool_on_hosts(hosts, tool.value['default'])
+        with transaction():
+            for nickname, (status, _) in results.items():
+                if status == 'successful':
+                    log_installation(nickname, tool_name, 'latest')
+                    console.print(f"[green]Successfully installed {tool_name} on the remote host {nickname}.[/green]")
                 else:
-                    try:
-                        selected_indices = [int(x) for x in install_option.split(',') if x.isdigit()]
-                        for index in selected_indices:
-                            if 1 <= index <= len(Tools):
-                                tool = list(Tools)[index - 1]
-                                tool_name = tool.name
-                                installed_on_remote = check_tool_remote(nickname, tool_name)
-                                if not installed_on_remote:
-                                    result = install_tool(nickname, tool.value['default'], 'latest')
-                                    if result == 0:
-                                        log_installation(nickname, tool_name, 'latest')
-                                        console.print(f"[green]Successfully installed {tool_name} on the remote host {nickname}.[/green]")
-                                    else:
-                                        console.print(f"[red]Failed to install {tool_name} on the remote host {nickname}.[/red]")
-                            else:
-                                console.print(f"[red]Invalid package number: {index}. Please enter valid numbers.[/red]")
-                        break
-                    except ValueError:
-                        console.print("[red]Invalid input. Please enter numbers separated by commas or 'all'.[/red]")
+                    console.print(f"[red]Failed to install {tool_name} on the remote host {nickname}.[/red]")
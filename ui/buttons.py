@@ -1,8 +1,6 @@
 import customtkinter as ctk
-from ui.set_target import show_set_target
-from ui.check_state import show_check_state
 from ui.utils import clear_frame
-from .interactive_install_wizard import show_interactive_install
+from .views import open_set_target, open_check_state, open_interactive_install
 
 def show_main_buttons(frame):
     clear_frame(frame)
@@ -12,13 +10,13 @@ def show_main_buttons(frame):
     frame.grid_columnconfigure(1, weight=1)
     frame.grid_columnconfigure(2, weight=1)
 
-    set_target_button = ctk.CTkButton(frame, text="Set Target", command=lambda: show_set_target(frame))
+    set_target_button = ctk.CTkButton(frame, text="Set Target", command=lambda: open_set_target(frame))
     set_target_button.grid(row=0, column=0, padx=20, pady=20)
 
-    install_button = ctk.CTkButton(frame, text="Interactive Install", command=lambda: show_interactive_install(frame))
+    install_button = ctk.CTkButton(frame, text="Interactive Install", command=lambda: open_interactive_install(frame))
     install_button.grid(row=0, column=1, padx=20, pady=20)
 
-    check_state_button = ctk.CTkButton(frame, text="Check State", command=lambda: show_check_state(frame))
+    check_state_button = ctk.CTkButton(frame, text="Check State", command=lambda: open_check_state(frame))
     check_state_button.grid(row=0, column=2, padx=20, pady=20)
 
 def show_return_button(frame):
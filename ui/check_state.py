@@ -1,120 +1,19 @@
 import os
-import sys
-import re
-import socket
 import time
 import threading
-import paramiko
 import customtkinter as ctk
 from tkinter import ttk, messagebox
 from ansible_utils.inventory import get_host_nicknames
+from ansible_utils.role_catalog import role_catalog
+from fleet.probe_cache import probe_cache
+from fleet.engine import tool_check_engine, tool_states, DEFAULT_MAX_WORKERS, DEFAULT_HOST_TIMEOUT
+from fleet.watch import STATE_MAX_AGE
+from .event_bus import UIEventBus
 from .utils import clear_frame
 from rich.console import Console
 
 console = Console()
 
-def get_available_tools(custom_roles_path=None):
-    roles_dirs = [
-        os.path.join(sys._MEIPASS, 'ansible_utils', 'roles'),
-    ]
-
-    if custom_roles_path and os.path.exists(custom_roles_path):
-        roles_dirs.append(custom_roles_path)
-
-    tools = []
-    for roles_dir in roles_dirs:
-        if os.path.exists(roles_dir):
-            for role_name in os.listdir(roles_dir):
-                role_path = os.path.join(roles_dir, role_name)
-                if os.path.isdir(role_path):
-                    tools.append(role_name)
-
-    return tools
-
-def load_ssh_config(host, config_path):
-    ssh_config = paramiko.SSHConfig()
-    with open(config_path) as f:
-        ssh_config.parse(f)
-    host_config = ssh_config.lookup(host)
-    return host_config
-
-def extract_version(output):
-    # Regex pattern to match version numbers, e.g., "1.2.3", "v1.2.3", "nginx/1.24.0"
-    pattern = r"(\d+\.\d+\.\d+)"
-    match = re.search(pattern, output)
-    if match:
-        return match.group(0)
-    return None
-
-def check_tool_remote(host, tool, config_path):
-    console.log(f"Checking {tool} on {host}")
-    try:
-        host_config = load_ssh_config(host, config_path)
-        console.log(f"Loaded SSH config for {host}: {host_config}")
-
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-
-        pkey = None
-        if 'identityfile' in host_config:
-            console.log(f"Loading private key from {host_config['identityfile'][0]}")
-            pkey = paramiko.RSAKey.from_private_key_file(host_config['identityfile'][0])
-
-        console.log(f"Connecting to {host_config['hostname']} on port {host_config.get('port', 22)} as user {host_config.get('user')}")
-
-        ssh.connect(
-            hostname=host_config['hostname'],
-            port=int(host_config.get('port', 22)),
-            username=host_config.get('user'),
-            pkey=pkey,
-            look_for_keys=True,
-            timeout=10
-        )
-
-        if ssh.get_transport() is None or not ssh.get_transport().is_active():
-            console.log(f"Failed to establish SSH connection to {host}")
-            return "SSH Connection Failed", "N/A"
-
-        stdin, stdout, stderr = ssh.exec_command(f"command -v {tool}")
-        tool_path = stdout.read().decode().strip()
-
-        if tool_path:
-            console.log(f"{tool} is available on {host}")
-
-            version_commands = [
-                f"{tool} --version",
-                f"{tool} -v",
-            ]
-
-            version = "N/A"
-            for cmd in version_commands:
-                console.log(f"Trying command: {cmd}")
-                stdin, stdout, stderr = ssh.exec_command(cmd)
-                version_output = stdout.read().decode().strip()
-                error_output = stderr.read().decode().strip()
-                console.log(f"Version output: {version_output}")
-                console.log(f"Error output (if any): {error_output}")
-
-                version = extract_version(version_output) or extract_version(error_output)
-                if version:
-                    break
-
-            ssh.close()
-            return "Available", version
-        else:
-            console.log(f"{tool} is not available on {host}")
-            ssh.close()
-            return "Not Available", "N/A"
-    except socket.timeout:
-        console.log(f"Connection to {host} timed out")
-        return "Timeout", "N/A"
-    except paramiko.ssh_exception.SSHException as e:
-        console.log(f"SSHException occurred: {e}")
-        return f"SSH Error: {e}", "N/A"
-    except Exception as e:
-        console.print_exception()
-        return f"Error: {e}", "N/A"
-
 def show_check_state(frame):
     from .buttons import show_return_button, show_main_buttons
 
@@ -131,19 +30,22 @@ def show_check_state(frame):
     custom_roles_path_entry = ctk.CTkEntry(frame)
     custom_roles_path_entry.pack(pady=5)
 
-    def create_progress_window():
-        progress_window = ctk.CTkToplevel(frame)
-        progress_window.title("Checking Hosts")
-        progress_window.geometry("300x100")
-        progress_label = ctk.CTkLabel(progress_window, text="Checking tool statuses. Please wait...")
-        progress_label.pack(pady=20)
-        progress_window.after(100, lambda: progress_window.grab_set())
-        return progress_window
+    max_workers_label = ctk.CTkLabel(frame, text=f"Max Parallel Hosts (default is {DEFAULT_MAX_WORKERS}):")
+    max_workers_label.pack(pady=5)
+    max_workers_entry = ctk.CTkEntry(frame)
+    max_workers_entry.pack(pady=5)
+
+    host_timeout_label = ctk.CTkLabel(frame, text=f"Per-Host Timeout in Seconds (default is {DEFAULT_HOST_TIMEOUT}):")
+    host_timeout_label.pack(pady=5)
+    host_timeout_entry = ctk.CTkEntry(frame)
+    host_timeout_entry.pack(pady=5)
 
     def start_check():
         try:
             config_path = config_path_entry.get() or default_config_path
             custom_roles_path = custom_roles_path_entry.get() or None    
+            max_workers = int(max_workers_entry.get() or DEFAULT_MAX_WORKERS)
+            host_timeout = float(host_timeout_entry.get() or DEFAULT_HOST_TIMEOUT)
             host_nicknames = get_host_nicknames(config_path=config_path)
             if not host_nicknames:
                 messagebox.showerror("Error", "No hosts found in the SSH config file.")
@@ -173,30 +75,55 @@ def show_check_state(frame):
                     state_frame = ctk.CTkFrame(frame)
                     state_frame.pack(fill="both", expand=True)
                     
-                    state_table = ttk.Treeview(state_frame, columns=("Number", "Tool", "State", "Version"), show='headings')
+                    state_table = ttk.Treeview(state_frame, columns=("Number", "Tool", "State", "Version", "Checked"), show='headings')
                     state_table.heading("Number", text="Number")
                     state_table.heading("Tool", text="Tool")
                     state_table.heading("State", text="State")
                     state_table.heading("Version", text="Version")
+                    state_table.heading("Checked", text="Checked")
                     
-                    tool_list = get_available_tools(custom_roles_path=custom_roles_path)
-
-                    def run_check_tools():
-                        progress_window = create_progress_window()
+                    roles = role_catalog.roles([custom_roles_path])
+                    binaries = [role.binary for role in roles]
+                    tool_rows = {}
+                    bus = UIEventBus(state_table)
+
+                    def show_entries(entries):
+                        now = time.time()
+                        for index, role in enumerate(roles, start=1):
+                            tool = role.name
+                            entry = entries.get(role.binary)
+                            if entry is None:
+                                values = (index, tool, "Checking...", "", "Never")
+                            else:
+                                checked = f"{int(probe_cache.age(entry, now))}s ago"
+                                if not probe_cache.is_fresh(entry, now, STATE_MAX_AGE):
+                                    checked += " (stale)"
+                                values = (index, tool, entry.state, entry.version, checked)
+                            if tool in tool_rows:
+                                state_table.item(tool_rows[tool], values=values)
+                            else:
+                                tool_rows[tool] = state_table.insert("", "end", values=values)
+
+                    bus.subscribe('tool_entries', show_entries, coalesce=True)
+
+                    def run_check_tools(force=False):
                         try:
-                            for index, tool in enumerate(tool_list, start=1):
-                                state, version = check_tool_remote(selected_host, tool, config_path)
-                                state_table.insert("", "end", values=(index, tool, state, version))
+                            entries = probe_cache.probe(selected_host, binaries, config_path, force=force, max_age=STATE_MAX_AGE)
+                            bus.post('tool_entries', entries)
                         except Exception as e:
                             console.print_exception()
-                            messagebox.showerror("Error", str(e))
-                        finally:
-                            progress_window.destroy()
+                            bus.show_error("Error", str(e))
 
-                    threading.Thread(target=run_check_tools).start()
+                    # Cached results show up immediately; only expired ones are re-probed
+                    show_entries(probe_cache.peek(selected_host, binaries))
+                    bus.start()
+                    threading.Thread(target=run_check_tools, daemon=True).start()
                     
                     state_table.pack(fill="both", expand=True)
 
+                    refresh_button = ctk.CTkButton(frame, text="Refresh", command=lambda: threading.Thread(target=run_check_tools, args=(True,), daemon=True).start())
+                    refresh_button.pack(pady=10)
+
                     return_homepage = ctk.CTkButton(frame, text="Return to Homepage", command=lambda: show_main_buttons(frame))
                     return_homepage.pack(pady=10)
                 except IndexError:
@@ -210,8 +137,65 @@ def show_check_state(frame):
                     messagebox.showerror("Error", str(e))
                     show_return_button(frame)
 
+            def check_all_hosts():
+                try:
+                    clear_frame(frame)
+
+                    state_frame = ctk.CTkFrame(frame)
+                    state_frame.pack(fill="both", expand=True)
+
+                    state_table = ttk.Treeview(state_frame, columns=("Host", "Tool", "State", "Version"), show='headings')
+                    state_table.heading("Host", text="Host")
+                    state_table.heading("Tool", text="Tool")
+                    state_table.heading("State", text="State")
+                    state_table.heading("Version", text="Version")
+                    state_table.pack(fill="both", expand=True)
+
+                    status_label = ctk.CTkLabel(frame, text=f"Checking 0/{len(host_nicknames)} hosts...")
+                    status_label.pack(pady=5)
+
+                    roles = role_catalog.roles([custom_roles_path])
+                    binaries = [role.binary for role in roles]
+                    # Hosts the watch daemon scanned within its interval are read from the state store
+                    engine = tool_check_engine(binaries, config_path, max_workers=max_workers, host_timeout=host_timeout,
+                                               max_age=STATE_MAX_AGE)
+                    bus = UIEventBus(state_table)
+
+                    def insert_rows(batches):
+                        for rows in batches:
+                            for values in rows:
+                                state_table.insert("", "end", values=values)
+
+                    bus.subscribe('host_rows', insert_rows, batch=True)
+                    bus.subscribe('status', lambda text: status_label.configure(text=text), coalesce=True)
+
+                    def run_check_all_hosts():
+                        try:
+                            for result in engine.run(host_nicknames):
+                                states = tool_states(result, binaries)
+                                bus.post('host_rows', [(result.host, role.name) + tuple(states[role.binary]) for role in roles])
+                                bus.post('status', f"Checking {engine.stats.hosts}/{len(host_nicknames)} hosts "
+                                                   f"({engine.stats.hosts_per_second:.2f} hosts/s)...")
+                            bus.post('status', engine.stats.summary())
+                        except Exception as e:
+                            console.print_exception()
+                            bus.show_error("Error", str(e))
+
+                    bus.start()
+                    threading.Thread(target=run_check_all_hosts, daemon=True).start()
+
+                    return_homepage = ctk.CTkButton(frame, text="Return to Homepage", command=lambda: show_main_buttons(frame))
+                    return_homepage.pack(pady=10)
+                except Exception as e:
+                    console.print_exception()
+                    messagebox.showerror("Error", str(e))
+                    show_return_button(frame)
+
             select_host_button = ctk.CTkButton(frame, text="Select Host", command=select_host)
             select_host_button.pack(pady=20)
+
+            check_all_button = ctk.CTkButton(frame, text="Check All Hosts", command=check_all_hosts)
+            check_all_button.pack(pady=10)
             
             cancel_button = ctk.CTkButton(frame, text="Cancel", command=lambda: show_main_buttons(frame))
             cancel_button.pack(pady=10)
@@ -0,0 +1,126 @@
+import queue
+import logging
+from collections import namedtuple
+from tkinter import messagebox
+
+DEFAULT_FRAME_MS = 16
+DEFAULT_MAX_EVENTS_PER_FRAME = 200
+
+# Kinds every bus handles out of the box
+SHOW_ERROR = 'show_error'
+SHOW_INFO = 'show_info'
+CALL = 'call'
+
+UIEvent = namedtuple('UIEvent', ['kind', 'key', 'payload'])
+Subscription = namedtuple('Subscription', ['handler', 'coalesce', 'batch'])
+
+
+# Worker threads post() events from anywhere; a pump scheduled with after() on
+# the Tk main thread applies at most max_per_frame of them per frame.
+#  - coalesce: only the newest event per key within a frame is applied
+#  - batch: the handler receives the list of payloads of the frame at once
+class UIEventBus:
+
+    def __init__(self, widget, frame_ms=DEFAULT_FRAME_MS, max_per_frame=DEFAULT_MAX_EVENTS_PER_FRAME):
+        self.widget = widget
+        self.frame_ms = frame_ms
+        self.max_per_frame = max_per_frame
+        self.queue = queue.SimpleQueue()
+        self.subscriptions = {}
+        self._job = None
+        self._stopped = False
+        self.subscribe(SHOW_ERROR, lambda payload: messagebox.showerror(*payload))
+        self.subscribe(SHOW_INFO, lambda payload: messagebox.showinfo(*payload))
+        self.subscribe(CALL, lambda payload: payload[0](*payload[1]))
+
+    def subscribe(self, kind, handler, coalesce=False, batch=False):
+        self.subscriptions[kind] = Subscription(handler, coalesce, batch)
+
+    def post(self, kind, payload=None, key=None):
+        self.queue.put(UIEvent(kind, key, payload))
+
+    def show_error(self, title, message):
+        self.post(SHOW_ERROR, (title, message))
+
+    def show_info(self, title, message):
+        self.post(SHOW_INFO, (title, message))
+
+    def call(self, function, *args):
+        self.post(CALL, (function, args))
+
+    def forwarder(self, kind):
+        # Callable usable as an ansible_runner event_handler
+        def forward(event):
+            self.post(kind, event)
+            return True
+        return forward
+
+    def start(self):
+        self._stopped = False
+        if self._job is None:
+            self._job = self.widget.after(self.frame_ms, self._pump)
+        return self
+
+    def stop(self):
+        # Also honoured when called from a handler, while the pump is running
+        self._stopped = True
+        if self._job is not None:
+            try:
+                self.widget.after_cancel(self._job)
+            except Exception:
+                pass
+            self._job = None
+
+    def _pump(self):
+        self._job = None
+        if self._stopped:
+            return
+        try:
+            if not self.widget.winfo_exists():
+                return
+        except Exception:
+            return
+
+        events = []
+        while len(events) < self.max_per_frame:
+            try:
+                events.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if events:
+            self.dispatch(events)
+        if self._stopped:
+            return
+
+        # A backlog is drained on the next frame instead of blocking this one
+        delay = 1 if not self.queue.empty() else self.frame_ms
+        try:
+            self._job = self.widget.after(delay, self._pump)
+        except Exception:
+            self._job = None
+
+    def dispatch(self, events):
+        # Group by kind in order of first appearance, keeping per-kind order
+        groups = {}
+        for event in events:
+            subscription = self.subscriptions.get(event.kind)
+            if subscription is None:
+                logging.warning(f"No UI handler subscribed for {event.kind}")
+                continue
+            group = groups.setdefault(event.kind, {})
+            if subscription.coalesce:
+                group.pop(event.key, None)
+                group[event.key] = event
+            else:
+                group[len(group)] = event
+
+        for kind, group in groups.items():
+            subscription = self.subscriptions[kind]
+            try:
+                if subscription.batch:
+                    subscription.handler([event.payload for event in group.values()])
+                else:
+                    for event in group.values():
+                        subscription.handler(event.payload)
+            except Exception:
+                logging.exception(f"UI handler for {kind} failed")
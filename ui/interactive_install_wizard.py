@@ -1,17 +1,22 @@
 import os
-import sys
 import customtkinter as ctk
 from tkinter import ttk, messagebox
 import tkinter as tk
 from rich.console import Console
 from ansible_utils.inventory import get_host_nicknames
-from ansible_utils.roles_enum import Tools
-from ansible_utils.ansible_executor import install_tool
-from db.database import init_db, log_installation, log_host_status, get_host_status, check_installation
-import paramiko
-import subprocess
-import time
-import socket
+from ansible_utils.role_catalog import role_catalog
+from ansible_utils.role_repos import RoleRepoCache
+from ansible_utils.ansible_executor import DEFAULT_FORKS
+from ansible_utils.events import InstallProgress, format_event
+from db.database import init_db, log_installation, get_host_status, get_host_statuses, transaction
+from ssh.config import load_ssh_config
+from ssh.reachability import check_reachability
+from fleet.engine import CheckEngine, abort_ssh, DEFAULT_MAX_WORKERS, DEFAULT_HOST_TIMEOUT
+from fleet.reconcile import build_plan, NOOP
+from fleet.fingerprints import install_with_fingerprints
+from fleet.host_status import check_host_status, check_sudo_password_requirement, host_status_from_result, save_host_status
+from .event_bus import UIEventBus
+from .selectable_table import SelectableTable
 import logging
 import threading
 
@@ -27,27 +32,13 @@ logger.addHandler(console_handler)
 # Console for rich logging
 console = Console()
 
-def get_available_tools(custom_roles_paths=None):
-    roles_dirs = [
-        os.path.join(sys._MEIPASS, 'ansible_utils', 'roles'),  # Default roles path
-    ]
-
-    if custom_roles_paths:
-        for path in custom_roles_paths:
-            roles_path = os.path.join(path, "roles")
-            if os.path.exists(roles_path):
-                roles_dirs.append(roles_path)
-
-    tools = []
-    for roles_dir in roles_dirs:
-        if os.path.exists(roles_dir):
-            for role_name in os.listdir(roles_dir):
-                role_path = os.path.join(roles_dir, role_name)
-                if os.path.isdir(role_path):
-                    tools.append(role_name)
-
-    return tools
-
+ANSIBLE_EVENT = 'ansible_event'
+OUTPUT_LINE = 'output_line'
+INSTALL_FINISHED = 'install_finished'
+REPOS_FETCHED = 'repos_fetched'
+MAX_OUTPUT_LINES = 2000
+HOST_COLUMNS = ("Number", "Host", "Accessible", "Sudo Password Needed", "Last Checked")
+TOOL_COLUMNS = ("Number", "Tool", "Platforms", "Default Version")
 
 class InteractiveInstallWizard:
 
@@ -61,6 +52,9 @@ class InteractiveInstallWizard:
         self.host_nicknames = []
         self.tool_list = []
         self.sudo_passwords = {}
+        self.custom_roles_path = None
+        self.forks = DEFAULT_FORKS
+        self.force_install = False
         self.init_db()
         self.show_step()
 
@@ -99,7 +93,7 @@ class InteractiveInstallWizard:
         custom_roles_path_entry = ctk.CTkEntry(self.parent)
         custom_roles_path_entry.pack(pady=5)
 
-        github_repo_label = ctk.CTkLabel(self.parent, text="GitHub Repository URL (optional):")
+        github_repo_label = ctk.CTkLabel(self.parent, text="Role Repository URLs (optional, comma separated, append #ref to pin a commit):")
         github_repo_label.pack(pady=5)
         github_repo_entry = ctk.CTkEntry(self.parent)
         github_repo_entry.pack(pady=5)
@@ -109,11 +103,28 @@ class InteractiveInstallWizard:
         clone_path_entry = ctk.CTkEntry(self.parent)
         clone_path_entry.pack(pady=5)
 
+        forks_label = ctk.CTkLabel(self.parent, text=f"Parallel Installs / Ansible Forks (default is {DEFAULT_FORKS}):")
+        forks_label.pack(pady=5)
+        forks_entry = ctk.CTkEntry(self.parent)
+        forks_entry.pack(pady=5)
+
+        status_label = ctk.CTkLabel(self.parent, text="")
+
+        def finish_config(custom_roles_paths):
+            self.custom_roles_path = [os.path.join(path, "roles") for path in custom_roles_paths]
+            self.tool_list = role_catalog.names(self.custom_roles_path)
+            self.next_step()
+
         def on_next():
             self.config_path = config_path_entry.get() or default_config_path
             local_roles_path = custom_roles_path_entry.get()
-            github_repo_url = github_repo_entry.get()
+            repo_specs = [spec for spec in github_repo_entry.get().replace(",", " ").split() if spec]
             self.repo_clone_path = clone_path_entry.get() or tmp_path
+            try:
+                self.forks = int(forks_entry.get() or DEFAULT_FORKS)
+            except ValueError:
+                messagebox.showerror("Error", "Ansible forks must be a number.")
+                return
             custom_roles_paths = []
 
             if local_roles_path:
@@ -124,22 +135,45 @@ class InteractiveInstallWizard:
                     messagebox.showerror("Error", f"No 'roles' folder found in {local_roles_path}")
                     return
 
-            if github_repo_url:
-                try:
-                    cloned_path = self.clone_or_pull_github_repo(github_repo_url, self.repo_clone_path)
-                    roles_path = os.path.join(cloned_path, "roles")
-                    if os.path.exists(roles_path):
-                        custom_roles_paths.append(cloned_path)
-                    else:
-                        messagebox.showerror("Error", f"No 'roles' folder found in {cloned_path}")
+            if not repo_specs:
+                finish_config(custom_roles_paths)
+                return
+
+            # Repositories are fetched off the main thread; progress and the
+            # final result come back through the UI event bus
+            progress = {}
+            bus = UIEventBus(status_label)
+            next_button.configure(state="disabled")
+            status_label.pack(pady=5)
+            status_label.configure(text=f"Fetching {len(repo_specs)} role repositories...")
+
+            def show_progress(updates):
+                for spec, phase, percent in updates:
+                    progress[spec] = f"{phase} {percent}%"
+                status_label.configure(text=" | ".join(f"{os.path.basename(spec)}: {state}" for spec, state in progress.items()))
+
+            def finish_fetch(results):
+                bus.stop()
+                next_button.configure(state="normal")
+                for spec, result in results.items():
+                    if isinstance(result, Exception):
+                        status_label.configure(text="")
+                        messagebox.showerror("Error", f"Failed to fetch role repository {spec}: {result}")
                         return
-                except Exception as e:
-                    messagebox.showerror("Error", f"Failed to clone/pull GitHub repository: {e}")
-                    return
+                    if not os.path.exists(os.path.join(result, "roles")):
+                        status_label.configure(text="")
+                        messagebox.showerror("Error", f"No 'roles' folder found in {result}")
+                        return
+                    custom_roles_paths.append(result)
+                finish_config(custom_roles_paths)
 
-            if len(custom_roles_paths):
-                self.tool_list = get_available_tools(custom_roles_paths=custom_roles_paths)
-            self.next_step()
+            bus.subscribe('fetch_progress', show_progress, batch=True)
+            bus.subscribe(REPOS_FETCHED, finish_fetch)
+            bus.start()
+            RoleRepoCache(self.repo_clone_path).fetch_in_background(
+                repo_specs,
+                on_done=lambda results: bus.post(REPOS_FETCHED, results),
+                progress=lambda spec, phase, percent: bus.post('fetch_progress', (spec, phase, percent)))
 
         next_button = ctk.CTkButton(self.parent, text="Next", command=on_next)
         next_button.pack(pady=20)
@@ -147,23 +181,6 @@ class InteractiveInstallWizard:
         cancel_button = ctk.CTkButton(self.parent, text="Cancel", command=lambda: show_main_buttons(self.parent))
         cancel_button.pack(pady=10)
 
-    def clone_or_pull_github_repo(self, repo_url, clone_path):
-        if not os.path.exists(clone_path):
-            os.makedirs(clone_path)
-        repo_name = os.path.basename(repo_url).replace(".git", "")
-        repo_dir = os.path.join(clone_path, repo_name)
-        if os.path.exists(repo_dir):
-            try:
-                subprocess.run(["git", "-C", repo_dir, "pull"], check=True)
-            except subprocess.CalledProcessError as e:
-                raise Exception(f"Failed to pull the repository: {e}")
-        else:
-            try:
-                subprocess.run(["git", "clone", repo_url, repo_dir], check=True)
-            except subprocess.CalledProcessError as e:
-                raise Exception(f"Failed to clone the repository: {e}")
-        return repo_dir
-
     def select_host_step(self):
         try:
             self.host_nicknames = get_host_nicknames(config_path=self.config_path)
@@ -171,56 +188,37 @@ class InteractiveInstallWizard:
                 messagebox.showerror("Error", "No hosts found in the SSH config file.")
                 return
 
-            table_frame = ctk.CTkFrame(self.parent)
-            table_frame.pack(fill="both", expand=True)
-
-            table = ttk.Treeview(table_frame, columns=("Number", "Host", "Accessible", "Sudo Password Needed", "Last Checked"), show='headings')
-            table.heading("Number", text="Number")
-            table.heading("Host", text="Host")
-            table.heading("Accessible", text="Accessible")
-            table.heading("Sudo Password Needed", text="Sudo Password Needed")
-            table.heading("Last Checked", text="Last Checked")
-
-            self.selected_hosts_vars = []
+            table = SelectableTable(self.parent, HOST_COLUMNS, key_column="Host")
+            self.host_table = table
             self.populate_table(table)
-
+            table.selected.update(host for host in self.selected_hosts if host in table.rows)
+            table.apply_view()
             table.pack(fill="both", expand=True)
-            table.update_idletasks()
-
-            checkbox_frame = tk.Frame(table_frame)
-            checkbox_frame.place(relx=0, rely=0, relwidth=0.05, relheight=1)
-
-            for index, child in enumerate(table.get_children(), start=1):
-                bbox = table.bbox(child)
-                if bbox:
-                    var, host = self.selected_hosts_vars[index - 1]
-                    checkbox = tk.Checkbutton(checkbox_frame, variable=var)
-                    checkbox.place(x=5, y=bbox[1] + bbox[3] // 2 - checkbox.winfo_reqheight() // 2)
 
             def update_host_statuses():
-                selected_hosts = [host for var, host in self.selected_hosts_vars if var.get()]
+                selected_hosts = table.selection()
                 if not selected_hosts:
                     messagebox.showerror("Error", "Please select at least one host.")
                     return
 
                 def run_update_host_statuses():
                     try:
-                        for var, host in self.selected_hosts_vars:
-                            if var.get():
-                                accessible, needs_sudo_password = self.check_host_status(host)
-                                if needs_sudo_password is None:
-                                    needs_sudo_password = "Unknown"
-                                log_host_status(host, accessible, needs_sudo_password)
-                                print(f'hoy!!! => {host} | {accessible} | {needs_sudo_password} \n')
-
-                        messagebox.showinfo("Info", "Host statuses updated.")
-                        self.refresh_table(table, checkbox_frame)  # Refresh the table after updating statuses
+                        reachability = check_reachability(selected_hosts, self.config_path)
+                        engine = CheckEngine(lambda host: self.check_host_status(host, reachability[host]),
+                                             max_workers=DEFAULT_MAX_WORKERS, host_timeout=DEFAULT_HOST_TIMEOUT,
+                                             on_timeout=abort_ssh(self.config_path))
+                        for result in engine.run(selected_hosts):
+                            save_host_status(result.host, *host_status_from_result(result))
+                            bus.post('host_status', (result.host, self.host_status_values(result.host)), key=result.host)
+                            bus.post('progress', f"Updated {engine.stats.hosts}/{len(selected_hosts)} hosts...")
+
+                        bus.show_info("Info", f"Host statuses updated. {engine.stats.summary()}")
                     except Exception as e:
-                        print(f'hey!!! => {e}')
                         console.print_exception()
-                        messagebox.showerror("Error", str(e))
+                        bus.show_error("Error", str(e))
                     finally:
-                        progress_window.destroy()
+                        # Posted last, so every row update has been applied when the bus stops
+                        bus.call(finish_update)
 
                 def create_progress_window():
                     progress_window = ctk.CTkToplevel(self.parent)
@@ -229,21 +227,32 @@ class InteractiveInstallWizard:
                     progress_label = ctk.CTkLabel(progress_window, text="Updating host statuses. Please wait...")
                     progress_label.pack(pady=20)
                     progress_window.after(100, lambda: progress_window.grab_set())
-                    return progress_window
+                    return progress_window, progress_label
 
-                progress_window = create_progress_window()
-                threading.Thread(target=run_update_host_statuses).start()
+                def finish_update():
+                    bus.stop()
+                    progress_window.destroy()
+
+                progress_window, progress_label = create_progress_window()
+                # Hundreds of hosts may report at once; rows for the same host and
+                # progress text are coalesced so each frame applies the latest only
+                bus = UIEventBus(progress_window)
+                bus.subscribe('host_status', lambda payload: self.update_table_row(table, *payload), coalesce=True)
+                bus.subscribe('progress', lambda text: progress_label.configure(text=text) if progress_label.winfo_exists() else None, coalesce=True)
+                bus.start()
+                threading.Thread(target=run_update_host_statuses, daemon=True).start()
 
             def on_next():
-                self.selected_hosts = [host for var, host in self.selected_hosts_vars if var.get()]
+                self.selected_hosts = table.selection()
                 if not self.selected_hosts:
                     messagebox.showerror("Error", "Please select at least one host.")
                     return
 
+                host_statuses = get_host_statuses(self.selected_hosts)
                 hosts_needing_sudo = []
                 for host in self.selected_hosts:
-                    status = get_host_status(host)
-                    if status and int(status[1]) == 1:
+                    status = host_statuses.get(host)
+                    if status and str(status[1]) == '1':
                         hosts_needing_sudo.append(host)
 
                 if hosts_needing_sudo:
@@ -265,30 +274,25 @@ class InteractiveInstallWizard:
             messagebox.showerror("Error", str(e))
 
     def populate_table(self, table):
-        table.delete(*table.get_children())
-        self.selected_hosts_vars.clear()
-
+        host_statuses = get_host_statuses(self.host_nicknames)
+        rows = {}
         for index, host in enumerate(self.host_nicknames, start=1):
-            var = tk.BooleanVar()
-            self.selected_hosts_vars.append((var, host))
-
-            host_status = get_host_status(host)
+            host_status = host_statuses.get(host)
             accessible, needs_sudo_password, last_checked = host_status if host_status else ("Unknown", "Unknown", "Never")
-            table.insert("", "end", values=(index, host, accessible, needs_sudo_password, last_checked))
-
-    def refresh_table(self, table, checkbox_frame):
-        self.populate_table(table)
-        table.update_idletasks()
+            rows[host] = (index, host, accessible, needs_sudo_password, last_checked)
+        table.set_rows(rows)
 
-        for widget in checkbox_frame.winfo_children():
-            widget.destroy()
+    def host_status_values(self, host):
+        host_status = get_host_status(host)
+        return tuple(host_status) if host_status else ("Unknown", "Unknown", "Never")
 
-        for index, child in enumerate(table.get_children(), start=1):
-            bbox = table.bbox(child)
-            if bbox:
-                var, host = self.selected_hosts_vars[index - 1]
-                checkbox = tk.Checkbutton(checkbox_frame, variable=var)
-                checkbox.place(x=5, y=bbox[1] + bbox[3] // 2 - checkbox.winfo_reqheight() // 2)
+    def update_table_row(self, table, host, status_values=None):
+        row = table.rows.get(host)
+        if row is None:
+            return
+        if status_values is None:
+            status_values = self.host_status_values(host)
+        table.update_row(host, (row[0], host) + tuple(status_values))
 
     def show_sudo_password_input(self, hosts_needing_sudo):
         popup = ctk.CTkToplevel(self.parent)
@@ -316,53 +320,32 @@ class InteractiveInstallWizard:
         submit_button = ctk.CTkButton(popup, text="Submit", command=on_submit)
         submit_button.pack(pady=20)
 
-    def check_host_status(self, host):
-        accessible = False
-        needs_sudo_password = "Unknown"
-
-        try:
-            hostname = self.get_hostname_from_host(host, self.config_path)
-            accessible = self.check_host_accessibility(hostname)
-            needs_sudo_password = self.check_sudo_password_requirement(host, self.config_path)
-        except socket.timeout:
-            console.log(f"Connection to {host} timed out")
-            accessible = "Unknown"
-            needs_sudo_password = "Unknown"
-        except Exception as e:
-            console.print_exception()
-        
-        return accessible, needs_sudo_password
-
+    def check_host_status(self, host, reachability=None):
+        return check_host_status(host, self.config_path, reachability)
 
     def select_tool_step(self):
         try:
-            table_frame = ctk.CTkFrame(self.parent)
-            table_frame.pack(fill="both", expand=True)
-
-            tool_table = ttk.Treeview(table_frame, columns=("Number", "Tool"), show='headings')
-            tool_table.heading("Number", text="Number")
-            tool_table.heading("Tool", text="Tool")
-
-            self.selected_tool_var = tk.StringVar()
-
+            tool_table = SelectableTable(self.parent, TOOL_COLUMNS, key_column="Tool", selectmode='browse')
+            rows = {}
             for index, tool in enumerate(self.tool_list, start=1):
-                tool_table.insert("", "end", values=(index, tool))
-
+                role = role_catalog.get(tool, self.custom_roles_path)
+                platforms = ", ".join(role.platforms) if role and role.platforms else "Any"
+                default_version = role.default_version if role and role.default_version else ""
+                rows[tool] = (index, tool, platforms, default_version)
+            tool_table.set_rows(rows)
+            if self.selected_tool in tool_table.rows:
+                tool_table.selected.add(self.selected_tool)
+                tool_table.apply_view()
             tool_table.pack(fill="both", expand=True)
-            tool_table.update_idletasks()
 
-            radio_frame = tk.Frame(table_frame)
-            radio_frame.place(relx=0, rely=0, relwidth=0.05, relheight=1)
-
-            for index, child in enumerate(tool_table.get_children(), start=1):
-                bbox = tool_table.bbox(child)
-                if bbox:
-                    tool = self.tool_list[index - 1]
-                    radio = tk.Radiobutton(radio_frame, variable=self.selected_tool_var, value=tool)
-                    radio.place(x=5, y=bbox[1] + bbox[3]//2 - radio.winfo_reqheight()//2)
+            force_var = tk.BooleanVar(value=self.force_install)
+            force_checkbox = ctk.CTkCheckBox(self.parent, text="Reinstall on hosts where the tool is already present", variable=force_var)
+            force_checkbox.pack(pady=10)
 
             def on_next():
-                self.selected_tool = self.selected_tool_var.get()
+                self.force_install = force_var.get()
+                selection = tool_table.selection()
+                self.selected_tool = selection[0] if selection else ''
                 if not self.selected_tool:
                     messagebox.showerror("Error", "Please select a tool.")
                 else:
@@ -380,136 +363,106 @@ class InteractiveInstallWizard:
     def install_tools_step(self):
         from .buttons import show_main_buttons
         try:
+            progress_label = ctk.CTkLabel(self.parent, text=f"Installing {self.selected_tool} on {len(self.selected_hosts)} hosts...")
+            progress_label.pack(pady=10)
+
             output_text = ctk.CTkTextbox(self.parent)
             output_text.pack(fill="both", expand=True, padx=20, pady=20)
             output_text.insert(tk.END, "Installing tools on selected hosts...\n")
 
-            progress_bar = ttk.Progressbar(self.parent, mode='determinate')
+            progress_bar = ttk.Progressbar(self.parent, mode='indeterminate')
             progress_bar.pack(fill="x", padx=20, pady=10)
-
-            def install_on_host(host):
-                try:
-                    sudo_password = self.sudo_passwords.get(host, None)
-                    status, logs = install_tool(host, self.selected_tool, sudo_password, self.custom_roles_path)
-                    log_installation(host, self.selected_tool)
-                    if status == 'failed':
-                        output_text.insert(tk.END, f"Failed to install {self.selected_tool} on host {host}. Logs:\n{logs}\n")
-                    else:
-                        output_text.insert(tk.END, f"Tool {self.selected_tool} installed successfully on host {host}. Logs:\n{logs}\n")
-                except Exception as e:
-                    output_text.insert(tk.END, f"Failed to install {self.selected_tool} on host {host}: {str(e)}\n")
-                    console.print_exception()
-
-            def install_on_all_hosts():
-                total_hosts = len(self.selected_hosts)
-                progress_increment = 100 / total_hosts
-
-                for host in self.selected_hosts:
-                    install_on_host(host)
-                    progress_bar['value'] += progress_increment
-                    self.parent.update_idletasks()
-
-                output_text.insert(tk.END, "Installation process completed.\n")
+            progress_bar.start()
+
+            # Bound to the output box so the pump also ends if the step is left mid-install
+            bus = UIEventBus(output_text)
+            progress = InstallProgress(self.selected_hosts)
+
+            def append_output(line):
+                output_text.insert(tk.END, line + "\n")
+                line_count = int(output_text.index('end-1c').split('.')[0])
+                if line_count > MAX_OUTPUT_LINES:
+                    output_text.delete("1.0", f"{line_count - MAX_OUTPUT_LINES}.0")
+                output_text.see(tk.END)
+
+            def finish_install(results, error):
+                if error is not None:
+                    append_output(f"Failed to install {self.selected_tool} on selected hosts: {str(error)}")
+                with transaction():
+                    for host, (status, counters) in (results or {}).items():
+                        if isinstance(counters, dict):
+                            counters = " ".join(f"{key}={value}" for key, value in counters.items())
+                        if status == 'failed':
+                            append_output(f"Failed to install {self.selected_tool} on host {host} ({counters}).")
+                        else:
+                            log_installation(host, self.selected_tool)
+                            append_output(f"Tool {self.selected_tool} installed successfully on host {host} ({counters}).")
+
+                progress_bar.stop()
+                progress_bar.configure(mode='determinate', value=100)
+                append_output("Installation process completed.")
 
                 return_button = ctk.CTkButton(self.parent, text="Return to Homepage", command=lambda: show_main_buttons(self.parent))
                 return_button.pack(pady=20)
 
-            threading.Thread(target=install_on_all_hosts).start()
+            def apply_events(events):
+                # One textbox insert per frame however many hosts reported
+                lines = []
+                for event in events:
+                    progress.update(event)
+                    line = format_event(event)
+                    if line:
+                        lines.append(line)
+                if lines:
+                    append_output("\n".join(lines))
+                progress_label.configure(text=progress.summary())
+
+            def on_finished(payload):
+                bus.stop()
+                progress_label.configure(text=progress.summary())
+                finish_install(*payload)
+
+            bus.subscribe(ANSIBLE_EVENT, apply_events, batch=True)
+            bus.subscribe(OUTPUT_LINE, append_output)
+            bus.subscribe(INSTALL_FINISHED, on_finished)
 
-        except Exception as e:
-            console.print_exception()
-            messagebox.showerror("Error", str(e))
+            def install_on_all_hosts():
+                results, error = None, None
+                try:
+                    hosts = self.selected_hosts
+                    if not self.force_install:
+                        # Hosts already observed with the tool are left alone; hosts that
+                        # could not be checked are still installed on
+                        plan = build_plan({host: {self.selected_tool: 'latest'} for host in hosts},
+                                          self.config_path, self.custom_roles_path)
+                        skipped = [action.host for action in plan.actions if action.action == NOOP]
+                        if skipped:
+                            bus.post(OUTPUT_LINE, f"{self.selected_tool} is already present on {len(skipped)} hosts, skipping: {', '.join(skipped)}")
+                        hosts = [host for host in hosts if host not in skipped]
+                    results = {}
+                    if hosts:
+                        # The plan already decided which hosts to install on; this
+                        # only records their fingerprints for later batch runs
+                        results = install_with_fingerprints(hosts, self.selected_tool, self.config_path, self.sudo_passwords,
+                                                            self.custom_roles_path, forks=self.forks,
+                                                            event_handler=bus.forwarder(ANSIBLE_EVENT), force=True)
+                except Exception as e:
+                    console.print_exception()
+                    error = e
+                bus.post(INSTALL_FINISHED, (results, error))
 
-    def get_hostname_from_host(self, host, config_path):
-        ssh_config = paramiko.config.SSHConfig()
-        with open(config_path) as f:
-            ssh_config.parse(f)
-        host_info = ssh_config.lookup(host)
-        return host_info.get("hostname")
+            bus.start()
+            threading.Thread(target=install_on_all_hosts, daemon=True).start()
 
-    def check_host_accessibility(self, hostname):
-        try:
-            response = subprocess.run(['ping', '-c', '1', hostname], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            return response.returncode == 0
         except Exception as e:
             console.print_exception()
-            return False
+            messagebox.showerror("Error", str(e))
 
     def load_ssh_config(self, host, config_path):
-        ssh_config = paramiko.SSHConfig()
-        with open(config_path) as f:
-            ssh_config.parse(f)
-        host_config = ssh_config.lookup(host)
-        return host_config
+        return load_ssh_config(host, config_path)
 
     def check_sudo_password_requirement(self, host, config_path):
-        console.log(f"Checking sudo password requirement for {host}")
-        try:
-            host_config = self.load_ssh_config(host, config_path)
-            console.log(f"Loaded SSH config for {host}: {host_config}")
-
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-
-            pkey = None
-            if 'identityfile' in host_config:
-                console.log(f"Loading private key from {host_config['identityfile'][0]}")
-                pkey = self.load_private_key(host_config['identityfile'][0])
-
-            console.log(f"Connecting to {host_config['hostname']} on port {host_config.get('port', 22)} as user {host_config.get('user')}")
-
-            if str(host_config['hostname']) not in ['127.0.0.1', 'localhost']:
-                ssh.connect(
-                    hostname=host_config['hostname'],
-                    port=int(host_config.get('port', 22)),
-                    username=host_config.get('user'),
-                    pkey=pkey,
-                    look_for_keys=True,
-                    timeout=10
-                )
-
-                ssh_transport = ssh.get_transport()
-                channel = ssh_transport.open_session()
-                channel.get_pty()
-                channel.invoke_shell()
-
-                time.sleep(1)
-                # Read and discard the initial login messages
-                while not channel.recv_ready():
-                    time.sleep(0.1)
-                channel.recv(1024)
-
-                console.log("Sending sudo check command")
-                channel.send('sudo -n true 2>&1\n')
-                time.sleep(2)
-                output = channel.recv(1024).decode('utf-8')
-                console.log(f"Received output: {output}")
-
-                channel.close()
-                ssh.close()
-
-                if 'sudo:' in output or 'password' in output.lower():
-                    console.log(f"Sudo password required for {host}")
-                    return True
-                console.log(f"No sudo password required for {host}")
-                return False
-            return False
-        except socket.timeout:
-            console.log(f"Connection to {host} timed out")
-            return None
-        except paramiko.ssh_exception.SSHException as e:
-            console.log(f"SSHException occurred: {e}")
-            return None
-        except Exception as e:
-            console.print_exception()
-            return None
-
-    def load_private_key(self, path):
-        try:
-            return paramiko.RSAKey.from_private_key_file(path)
-        except paramiko.SSHException:
-            return paramiko.Ed25519Key.from_private_key_file(path)
-
+        return check_sudo_password_requirement(host, config_path)
 
 def show_interactive_install(frame):
     InteractiveInstallWizard(frame)
@@ -0,0 +1,150 @@
+import tkinter as tk
+from tkinter import ttk
+import customtkinter as ctk
+
+FILTER_DELAY_MS = 150
+
+
+def sort_key(value):
+    try:
+        return (0, float(value), "")
+    except (TypeError, ValueError):
+        return (1, 0, str(value).lower())
+
+
+# Treeview keyed by a row id (the host or tool name) that relies on native
+# selection instead of per-row widgets. Rows are diffed on refresh, filtered by
+# detaching/reattaching items and sorted by clicking a column heading.
+class SelectableTable:
+
+    def __init__(self, parent, columns, key_column, selectmode='extended'):
+        self.columns = columns
+        self.key_index = columns.index(key_column)
+        self.rows = {}
+        self.selected = set()
+        self.sort_column = None
+        self.sort_reverse = False
+        self.filter_text = ""
+        self._filter_job = None
+
+        self.frame = ctk.CTkFrame(parent)
+
+        controls = ctk.CTkFrame(self.frame)
+        controls.pack(fill="x", padx=5, pady=5)
+        self.filter_var = tk.StringVar()
+        filter_entry = ctk.CTkEntry(controls, textvariable=self.filter_var, placeholder_text="Filter...")
+        filter_entry.pack(side="left", fill="x", expand=True, padx=5)
+        self.filter_var.trace_add("write", lambda *args: self._schedule_filter())
+        self.count_label = ctk.CTkLabel(controls, text="")
+        self.count_label.pack(side="right", padx=5)
+        if selectmode == 'extended':
+            ctk.CTkButton(controls, text="Clear", width=70, command=self.clear_selection).pack(side="right", padx=5)
+            ctk.CTkButton(controls, text="Select Shown", width=110, command=self.select_visible).pack(side="right", padx=5)
+
+        tree_frame = tk.Frame(self.frame)
+        tree_frame.pack(fill="both", expand=True)
+        self.tree = ttk.Treeview(tree_frame, columns=columns, show='headings', selectmode=selectmode)
+        for column in columns:
+            self.tree.heading(column, text=column, command=lambda c=column: self.sort_by(c))
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def set_rows(self, rows):
+        # rows maps key -> values; only rows that changed touch the Treeview
+        for key in list(self.rows):
+            if key not in rows:
+                self.tree.delete(key)
+                del self.rows[key]
+                self.selected.discard(key)
+        changed = False
+        for key, values in rows.items():
+            values = tuple(values)
+            if key not in self.rows:
+                self.tree.insert("", "end", iid=key, values=values)
+                changed = True
+            elif self.rows[key] != values:
+                self.tree.item(key, values=values)
+                changed = True
+            self.rows[key] = values
+        # New or changed values may move rows under the active sort and filter
+        if changed:
+            self.apply_view()
+        else:
+            self._update_count()
+
+    def update_row(self, key, values):
+        values = tuple(values)
+        if key not in self.rows or self.rows[key] == values:
+            return
+        self.rows[key] = values
+        self.tree.item(key, values=values)
+        self.apply_view()
+
+    def matches(self, values):
+        if not self.filter_text:
+            return True
+        return any(self.filter_text in str(value).lower() for value in values)
+
+    def apply_view(self):
+        keys = [key for key, values in self.rows.items() if self.matches(values)]
+        if self.sort_column is not None:
+            index = self.columns.index(self.sort_column)
+            keys.sort(key=lambda key: sort_key(self.rows[key][index]), reverse=self.sort_reverse)
+
+        visible = set(keys)
+        hidden = [key for key in self.tree.get_children() if key not in visible]
+        if hidden:
+            self.tree.detach(*hidden)
+        for position, key in enumerate(keys):
+            self.tree.move(key, "", position)
+        self.tree.selection_set([key for key in keys if key in self.selected])
+        self._update_count()
+
+    def sort_by(self, column):
+        if self.sort_column == column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column, self.sort_reverse = column, False
+        for name in self.columns:
+            arrow = (" ▼" if self.sort_reverse else " ▲") if name == column else ""
+            self.tree.heading(name, text=name + arrow)
+        self.apply_view()
+
+    def visible(self):
+        return list(self.tree.get_children())
+
+    def selection(self):
+        return [key for key in self.rows if key in self.selected]
+
+    def select_visible(self):
+        self.tree.selection_add(self.visible())
+
+    def clear_selection(self):
+        self.selected.clear()
+        self.tree.selection_remove(self.tree.selection())
+        self._update_count()
+
+    def _on_select(self, event=None):
+        # Hidden rows keep their selection while a filter is active
+        visible = set(self.visible())
+        self.selected = {key for key in self.selected if key not in visible} | set(self.tree.selection())
+        self._update_count()
+
+    def _schedule_filter(self):
+        if self._filter_job is not None:
+            self.tree.after_cancel(self._filter_job)
+        self._filter_job = self.tree.after(FILTER_DELAY_MS, self._apply_filter)
+
+    def _apply_filter(self):
+        self._filter_job = None
+        self.filter_text = self.filter_var.get().strip().lower()
+        self.apply_view()
+
+    def _update_count(self):
+        self.count_label.configure(text=f"{len(self.selected)} selected / {len(self.tree.get_children())} shown / {len(self.rows)} total")
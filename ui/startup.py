@@ -0,0 +1,38 @@
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+# Set LINUXWT_STARTUP_REPORT=1 to print import and first-window timings
+REPORT_ENV = 'LINUXWT_STARTUP_REPORT'
+STARTUP_BUDGET_MS = 1500
+
+process_start = time.perf_counter()
+import_timings = {}
+milestones = {}
+
+@contextmanager
+def timed_import(name):
+    already_loaded = name in sys.modules
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if not already_loaded:
+            import_timings[name] = (time.perf_counter() - start) * 1000
+
+def mark(label):
+    milestones.setdefault(label, (time.perf_counter() - process_start) * 1000)
+
+def report():
+    if not os.environ.get(REPORT_ENV):
+        return
+    lines = ["Startup timings:"]
+    for name, elapsed_ms in sorted(import_timings.items(), key=lambda item: -item[1]):
+        lines.append(f"  import {name:<40} {elapsed_ms:8.1f} ms")
+    for label, elapsed_ms in milestones.items():
+        lines.append(f"  {label:<47} {elapsed_ms:8.1f} ms")
+    first_window = milestones.get('first window')
+    if first_window is not None and first_window > STARTUP_BUDGET_MS:
+        lines.append(f"  first window exceeded the {STARTUP_BUDGET_MS} ms startup budget")
+    print("\n".join(lines), file=sys.stderr)
@@ -0,0 +1,32 @@
+import importlib
+import threading
+from .startup import timed_import, mark, report
+
+# Views are imported on first use so that paramiko, ansible_runner and rich
+# are only loaded once the user opens a screen that needs them
+VIEW_MODULES = ['ui.set_target', 'ui.check_state', 'ui.interactive_install_wizard']
+
+def load_view(name):
+    with timed_import(name):
+        return importlib.import_module(name)
+
+def open_set_target(frame):
+    load_view('ui.set_target').show_set_target(frame)
+
+def open_check_state(frame):
+    load_view('ui.check_state').show_check_state(frame)
+
+def open_interactive_install(frame):
+    load_view('ui.interactive_install_wizard').show_interactive_install(frame)
+
+def preload_views():
+    # The one startup report, covering the first window and the preloaded views
+    try:
+        for name in VIEW_MODULES:
+            load_view(name)
+        mark('views preloaded')
+    finally:
+        report()
+
+def start_background_preload():
+    threading.Thread(target=preload_views, name="view-preload", daemon=True).start()